@@ -0,0 +1,69 @@
+"""Compare two benchmark result files written by ``benchmarks/run.py``.
+
+    uv run python benchmarks/compare.py baseline.json results.json --threshold 0.10
+
+Prints the time ratio (new / baseline) of every benchmark present in both
+files and exits with status 1 if any of them is slower than the baseline by
+more than the threshold.
+"""
+
+import argparse
+import json
+import sys
+
+
+def load(path):
+    """Results of ``path`` keyed by (name, size)."""
+    with open(path) as f:
+        data = json.load(f)
+    return {(r["name"], r["size"]): r for r in data["results"]}
+
+
+def compare(baseline, new, threshold, metric="best"):
+    """Ratios of the benchmarks in both result sets.
+
+    Args:
+        baseline: Results keyed by (name, size), as returned by ``load``.
+        new: Results to check, keyed the same way.
+        threshold: Allowed slowdown as a fraction (0.10 = 10%).
+        metric: "best" or "median" time per call.
+
+    Returns:
+        List of ``(name, size, ratio, regressed)`` tuples in baseline order.
+    """
+    rows = []
+    for key, base in baseline.items():
+        if key not in new:
+            continue
+        ratio = new[key][metric] / base[metric]
+        rows.append((*key, ratio, ratio > 1.0 + threshold))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline", help="Baseline results JSON")
+    parser.add_argument("new", help="New results JSON")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Allowed slowdown as a fraction (default: 0.10)")
+    parser.add_argument("--metric", choices=["best", "median"], default="best",
+                        help="Time per call to compare (default: best)")
+    args = parser.parse_args(argv)
+
+    baseline, new = load(args.baseline), load(args.new)
+    rows = compare(baseline, new, args.threshold, args.metric)
+    for name, size, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<24} {size:>6}  {ratio:6.3f}x{flag}")
+
+    missing = sorted(set(baseline) ^ set(new))
+    if missing:
+        print(f"{len(missing)} benchmarks appear in only one file", file=sys.stderr)
+    regressions = sum(row[3] for row in rows)
+    print(f"{len(rows)} compared, {regressions} slower than the baseline "
+          f"by more than {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""Benchmark suite for atmospeed.
+
+Times every public function at scalar and array sizes, and the ``batch`` CLI
+on generated CSV files, then writes the results as JSON:
+
+    uv run python benchmarks/run.py --output results.json
+
+Inputs come from a fixed random seed, so two runs time the same work. The
+package is imported from ``src/`` of this checkout, which makes it possible
+to benchmark two branches and compare them with ``benchmarks/compare.py``.
+"""
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+import atmospeed  # noqa: E402
+from atmospeed import _speed_conv as sc  # noqa: E402
+from atmospeed.cli import main as cli_main  # noqa: E402
+
+SIZES = {"scalar": None, "1e3": 1_000, "1e6": 1_000_000, "1e7": 10_000_000}
+CSV_ROWS = {"1e3": 1_000, "1e5": 100_000, "1e6": 1_000_000}
+SEED = 1976
+
+# (name, speed input, needs delta ISA) for the 12 speed conversions
+CONVERSIONS = [
+    ("kcas_to_keas", "kts", False),
+    ("kcas_to_ktas", "kts", True),
+    ("kcas_to_mach", "kts", False),
+    ("keas_to_kcas", "kts", False),
+    ("keas_to_ktas", "kts", True),
+    ("keas_to_mach", "kts", False),
+    ("ktas_to_kcas", "kts", True),
+    ("ktas_to_keas", "kts", True),
+    ("ktas_to_mach", "kts", True),
+    ("mach_to_kcas", "mach", False),
+    ("mach_to_keas", "mach", False),
+    ("mach_to_ktas", "mach", True),
+]
+
+
+def make_inputs(n):
+    """Benchmark inputs: Python floats for ``n=None``, otherwise arrays of ``n``."""
+    if n is None:
+        return SimpleNamespace(hp=31000.0, disa=10.0, kts=280.0, mach=0.78,
+                               elevation=1500.0, altimeter=29.92,
+                               schedule_kcas=280.0, schedule_mach=0.78)
+    rng = np.random.default_rng(SEED)
+    return SimpleNamespace(
+        hp=rng.uniform(0.0, 65000.0, n),
+        disa=rng.uniform(-30.0, 30.0, n),
+        kts=rng.uniform(100.0, 500.0, n),
+        mach=rng.uniform(0.2, 0.9, n),
+        elevation=rng.uniform(-1000.0, 14000.0, n),
+        altimeter=rng.uniform(28.5, 31.0, n),
+        schedule_kcas=rng.uniform(250.0, 340.0, n),
+        schedule_mach=rng.uniform(0.72, 0.86, n),
+    )
+
+
+def function_cases():
+    """Yield ``(name, func)`` pairs; ``func`` takes the inputs namespace."""
+    yield "theta", lambda x: atmospeed.theta(x.hp, x.disa)
+    yield "delta", lambda x: atmospeed.delta(x.hp)
+    yield "sigma", lambda x: atmospeed.sigma(x.hp, x.disa)
+    yield "isa", lambda x: atmospeed.isa(x.hp)
+    yield "pressure_altitude", lambda x: atmospeed.pressure_altitude(x.elevation, x.altimeter)
+    yield "crossover_altitude", lambda x: atmospeed.crossover_altitude(x.schedule_kcas,
+                                                                       x.schedule_mach)
+    for name, speed, with_disa in CONVERSIONS:
+        func = getattr(sc, name)
+        if with_disa:
+            yield name, lambda x, f=func, s=speed: f(getattr(x, s), x.hp, x.disa)
+        else:
+            yield name, lambda x, f=func, s=speed: f(getattr(x, s), x.hp)
+    yield "Atmo", lambda x: atmospeed.Atmo(hp=x.hp, temperature=x.disa)
+    yield "Speed", lambda x: atmospeed.Speed(x.kts, "cas")
+    # Atmo derives its state lazily; these include the first evaluation
+    yield "Atmo.snapshot", lambda x: atmospeed.Atmo(hp=x.hp, temperature=x.disa).snapshot()
+    yield "Speed.to_tas", lambda x: atmospeed.Speed(x.kts, "cas").to_tas(
+        atmospeed.Atmo(hp=x.hp, temperature=x.disa))
+
+
+def measure(func, repeat, min_time):
+    """Time ``func`` and return a result dict (times per call, in seconds).
+
+    The loop count is chosen so that one repetition takes at least
+    ``min_time``; the best and median of ``repeat`` repetitions are kept.
+    """
+    func()  # warm up caches and compiled kernels
+    timer = timeit.Timer(func)
+    loops = 1
+    while True:
+        elapsed = timer.timeit(loops)
+        if elapsed >= min_time:
+            break
+        loops *= 10 if elapsed < min_time / 10 else 2
+    times = [t / loops for t in timer.repeat(repeat, loops)]
+    return {"loops": loops, "repeat": repeat,
+            "best": min(times), "median": statistics.median(times)}
+
+
+def write_csv(path, rows):
+    """Write a batch input file of ``rows`` mixed-type conversions."""
+    x = make_inputs(rows)
+    types = np.array(["cas", "eas", "tas", "mach"])[np.arange(rows) % 4]
+    values = np.where(types == "mach", x.mach, x.kts)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["hp", "temperature", "speed_value", "speed_type"])
+        writer.writerows(zip(np.round(x.hp, 1).tolist(), np.round(x.disa, 2).tolist(),
+                             np.round(values, 4).tolist(), types.tolist()))
+
+
+def run_functions(sizes, repeat, min_time, select, report):
+    for size in sizes:
+        x = make_inputs(SIZES[size])
+        for name, func in function_cases():
+            if select and not any(s in name for s in select):
+                continue
+            result = measure(lambda: func(x), repeat, min_time)
+            report({"name": name, "size": size, **result})
+
+
+def run_batch(rows, repeat, min_time, report):
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        for label in rows:
+            src = os.path.join(tmp, f"in_{label}.csv")
+            dst = os.path.join(tmp, f"out_{label}.csv")
+            write_csv(src, CSV_ROWS[label])
+            for to_type in ("cas", "tas", "mach"):
+                argv = ["batch", src, dst, "--to", to_type]
+
+                def batch():
+                    with contextlib.redirect_stdout(devnull):
+                        cli_main(argv)
+
+                result = measure(batch, repeat, min_time)
+                report({"name": f"batch --to {to_type}", "size": label, **result})
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "backend": atmospeed.get_backend(),
+        "precision": atmospeed.get_precision(),
+    }
+
+
+def _labels(value, known):
+    labels = [s.strip() for s in value.split(",") if s.strip()]
+    unknown = [s for s in labels if s not in known]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown size {', '.join(unknown)} (choose from {', '.join(known)})")
+    return labels
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-o", "--output", default="benchmark.json",
+                        help="JSON results file (default: benchmark.json)")
+    parser.add_argument("--sizes", type=lambda v: _labels(v, SIZES), default=list(SIZES),
+                        help=f"Comma-separated input sizes (default: {','.join(SIZES)})")
+    parser.add_argument("--csv-rows", type=lambda v: _labels(v, CSV_ROWS), default=list(CSV_ROWS),
+                        help=f"Comma-separated batch file sizes (default: {','.join(CSV_ROWS)})")
+    parser.add_argument("--no-batch", action="store_true", help="Skip the batch CLI benchmarks")
+    parser.add_argument("--select", action="append", default=[],
+                        help="Only time functions whose name contains this (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Repetitions per benchmark (default: 5)")
+    parser.add_argument("--min-time", type=float, default=0.2,
+                        help="Minimum seconds per repetition (default: 0.2)")
+    parser.add_argument("--backend", default="numpy", help="Kernel backend (default: numpy)")
+    parser.add_argument("--precision", default="float64", help="Array precision (default: float64)")
+    args = parser.parse_args(argv)
+
+    atmospeed.set_backend(args.backend)
+    atmospeed.set_precision(args.precision)
+    results = []
+
+    def report(entry):
+        results.append(entry)
+        print(f"{entry['name']:<24} {entry['size']:>6}  best {_format(entry['best'])}  "
+              f"median {_format(entry['median'])}", file=sys.stderr)
+
+    start = time.perf_counter()
+    run_functions(args.sizes, args.repeat, args.min_time, args.select, report)
+    if not args.no_batch:
+        run_batch(args.csv_rows, args.repeat, args.min_time, report)
+
+    data = {"meta": {**metadata(), "duration": round(time.perf_counter() - start, 1)},
+            "results": results}
+    with open(args.output, "w") as f:
+        json.dump(data, f, indent=1)
+        f.write("\n")
+    print(f"Wrote {len(results)} results to {args.output}", file=sys.stderr)
+
+
+def _format(seconds):
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.3f} {unit:<2}"
+    return f"{seconds / 1e-9:8.1f} ns"
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,53 @@
 """AtmoSpeed — Standard atmosphere properties and airspeed conversions.
 
 Based on the 1976 US Standard Atmosphere (NASA-TM-X-74335).
+
+Public names are imported from their submodules on first access (PEP 562),
+so ``import atmospeed`` itself loads nothing, and NumPy is only imported
+once a function or class is used.
 """
 
-from .altitude import pressure_altitude
-from .atmo import Atmo
-from .convert import length_convert, speed_convert
-from .ratio import delta, sigma, theta
-from .speed import Speed
-from .temperature import calc_delta_isa, isa, oat
-from .units import LengthUnit, PressureUnit, SpeedType, SpeedUnit, TemperatureUnit
+import importlib
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ._buffers import clear_buffers
+    from .altitude import (
+        crossover_altitude, density_altitude, hp_from_delta, hp_from_pressure, hp_from_sigma,
+        pressure_altitude,
+    )
+    from .atmo import Atmo, AtmoState
+    from .backend import get_backend, set_backend
+    from .cache import cache_info, clear_cache, disable_cache, enable_cache
+    from .convert import length_convert, speed_convert
+    from .converter import Converter, make_converter
+    from .interp import RatioTable
+    from .precision import get_precision, set_precision, use_precision
+    from .profiling import profile
+    from .ratio import delta, sigma, theta
+    from .speed import Speed, SpeedArray
+    from .table import Table, make_table
+    from .temperature import calc_delta_isa, isa, oat
+    from .units import (
+        DensityUnit, LengthUnit, PressureUnit, SpeedType, SpeedUnit, TemperatureUnit,
+    )
 
 __all__ = [
     "Atmo",
+    "AtmoState",
     "Speed",
+    "SpeedArray",
+    "Converter",
+    "make_converter",
+    "RatioTable",
+    "Table",
+    "make_table",
     "pressure_altitude",
+    "hp_from_delta",
+    "hp_from_pressure",
+    "hp_from_sigma",
+    "crossover_altitude",
+    "density_altitude",
     "theta",
     "delta",
     "sigma",
@@ -22,10 +55,79 @@ __all__ = [
     "oat",
     "calc_delta_isa",
     "length_convert",
+    "enable_cache",
+    "disable_cache",
+    "clear_cache",
+    "cache_info",
+    "clear_buffers",
+    "set_backend",
+    "get_backend",
+    "set_precision",
+    "get_precision",
+    "use_precision",
+    "profile",
     "speed_convert",
+    "DensityUnit",
     "LengthUnit",
     "PressureUnit",
     "SpeedType",
     "SpeedUnit",
     "TemperatureUnit",
 ]
+
+# Public name -> submodule that defines it
+_EXPORTS = {
+    "clear_buffers": "_buffers",
+    "crossover_altitude": "altitude",
+    "density_altitude": "altitude",
+    "hp_from_delta": "altitude",
+    "hp_from_pressure": "altitude",
+    "hp_from_sigma": "altitude",
+    "pressure_altitude": "altitude",
+    "Atmo": "atmo",
+    "AtmoState": "atmo",
+    "get_backend": "backend",
+    "set_backend": "backend",
+    "cache_info": "cache",
+    "clear_cache": "cache",
+    "disable_cache": "cache",
+    "enable_cache": "cache",
+    "length_convert": "convert",
+    "speed_convert": "convert",
+    "Converter": "converter",
+    "make_converter": "converter",
+    "RatioTable": "interp",
+    "get_precision": "precision",
+    "set_precision": "precision",
+    "use_precision": "precision",
+    "profile": "profiling",
+    "delta": "ratio",
+    "sigma": "ratio",
+    "theta": "ratio",
+    "Speed": "speed",
+    "SpeedArray": "speed",
+    "Table": "table",
+    "make_table": "table",
+    "calc_delta_isa": "temperature",
+    "isa": "temperature",
+    "oat": "temperature",
+    "DensityUnit": "units",
+    "LengthUnit": "units",
+    "PressureUnit": "units",
+    "SpeedType": "units",
+    "SpeedUnit": "units",
+    "TemperatureUnit": "units",
+}
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,584 @@
+"""Internal fused atmosphere kernel.
+
+Computes ISA temperature, theta, delta and sigma from pressure altitude in a
+single pass: one unit conversion, one validation, one layer lookup, and
+in-place arithmetic on as few buffers as possible. Every kernel writes its
+result into ``out`` when given and takes its scratch from a ``Workspace``,
+so callers with their own buffers allocate nothing. The public functions in
+``temperature`` and ``ratio`` and the speed kernels in ``_speed_conv`` all
+route through it. Accepts scalars or numpy arrays; always returns arrays.
+With a numba backend selected, the compiled ufuncs replace it.
+
+The seven layers of the 1976 atmosphere are a table of per-layer
+parameters. Arrays in one layer use its parameters as scalars, and arrays
+in two adjacent layers (flight data spanning the tropopause) evaluate each
+layer's formula under a mask from a single comparison. Arrays that span
+more layers look up every element's layer with ``np.searchsorted`` and
+gather its parameters with ``np.take``; the temperature-gradient and
+isothermal formulas are then each evaluated once, under a mask, so the
+cost does not depend on the number of layers.
+"""
+
+import functools
+import math
+from typing import NamedTuple
+
+import numpy as np
+
+from .constants import (
+    DELTA_AT_TROPOPAUSE,
+    DENSITY_SL_STD_KG_M3,
+    DENSITY_SL_STD_SLUG_FT3,
+    GAS_CONSTANT_AIR,
+    GRAVITY_STD,
+    HEIGHT_TOP_FT,
+    LAPSE_RATE_C_PER_FT,
+    LAPSE_RATE_F_PER_FT,
+    LAYER_BASES_M,
+    LAYER_GRADIENTS_K_PER_M,
+    PRESSURE_SL_STD_HPA,
+    PRESSURE_SL_STD_INHG,
+    PRESSURE_SL_STD_PA,
+    PRESSURE_SL_STD_PSF,
+    TEMP_SL_STD_C,
+    TEMP_SL_STD_F,
+    TEMP_SL_STD_K,
+    TEMP_SL_STD_R,
+    TEMP_STRATOSPHERE_C,
+    TEMP_STRATOSPHERE_F,
+    TROPOSPHERE_DELTA_EXP,
+    TROPOPAUSE_CONST_US,
+    ZERO_C_IN_K,
+    ZERO_C_IN_R,
+)
+from . import backend as _backend
+from ._buffers import Workspace
+from .precision import float_dtype
+from .convert import length_to_feet
+from .units import DensityUnit, LengthUnit, PressureUnit, TemperatureUnit
+
+TOP_ERROR = "Altitude is above the 1976 standard atmosphere (86 km / 278386 ft)"
+
+# Layer base altitudes in feet. An altitude on a base belongs to the layer
+# below it, and the first layer extends below sea level.
+_LAYER_BASES_FT = tuple(base / 0.3048 for base in LAYER_BASES_M)
+_LAYER_BOUNDS_FT = _LAYER_BASES_FT[1:]
+_ISOTHERMAL = tuple(gradient == 0.0 for gradient in LAYER_GRADIENTS_K_PER_M)
+
+
+def _celsius_layers():
+    """Base temperatures (C) and lapse rates (C/ft, positive when cooling).
+
+    The troposphere and the lower stratosphere keep the rounded constants
+    the library has always used; the layers above continue from them.
+    """
+    temps = [TEMP_SL_STD_C, TEMP_STRATOSPHERE_C]
+    lapses = [LAPSE_RATE_C_PER_FT, 0.0]
+    for i in range(2, len(LAYER_BASES_M)):
+        gradient = LAYER_GRADIENTS_K_PER_M[i - 1]
+        temps.append(temps[-1] + gradient * (LAYER_BASES_M[i] - LAYER_BASES_M[i - 1]))
+        lapses.append(0.0 - LAYER_GRADIENTS_K_PER_M[i] * 0.3048)
+    return temps, lapses
+
+
+_BASE_TEMPS_C, _LAPSES_C = _celsius_layers()
+# Temperature of each layer extrapolated to sea level: T = temp - h * lapse
+_INTERCEPTS_C = [temp + lapse * base
+                 for temp, lapse, base in zip(_BASE_TEMPS_C, _LAPSES_C, _LAYER_BASES_FT)]
+
+
+def _unit_layers(sl_temp, lapse, strato_temp, scale, shift):
+    """Per-layer (intercepts, lapse rates) in one temperature unit."""
+    temps = (sl_temp, strato_temp) + tuple(scale * t + shift for t in _INTERCEPTS_C[2:])
+    lapses = (lapse, 0.0) + tuple(scale * rate for rate in _LAPSES_C[2:])
+    return temps, lapses
+
+
+# Temperature unit -> (per-layer intercepts, per-layer lapse rates per ft,
+# offset to absolute scale, sea level absolute temperature). The ISA
+# temperature in layer i is temps[i] - h * lapses[i].
+_TEMP_SCALES = {
+    TemperatureUnit.C: (*_unit_layers(TEMP_SL_STD_C, LAPSE_RATE_C_PER_FT, TEMP_STRATOSPHERE_C,
+                                      1.0, 0.0),
+                        ZERO_C_IN_K, TEMP_SL_STD_K),
+    TemperatureUnit.F: (*_unit_layers(TEMP_SL_STD_F, LAPSE_RATE_F_PER_FT, TEMP_STRATOSPHERE_F,
+                                      1.8, 32.0),
+                        ZERO_C_IN_R, TEMP_SL_STD_R),
+    TemperatureUnit.K: (*_unit_layers(TEMP_SL_STD_K, LAPSE_RATE_C_PER_FT,
+                                      TEMP_STRATOSPHERE_C + ZERO_C_IN_K, 1.0, ZERO_C_IN_K),
+                        0.0, TEMP_SL_STD_K),
+    TemperatureUnit.R: (*_unit_layers(TEMP_SL_STD_R, LAPSE_RATE_F_PER_FT,
+                                      TEMP_STRATOSPHERE_F + ZERO_C_IN_R, 1.8, 32.0 + ZERO_C_IN_R),
+                        0.0, TEMP_SL_STD_R),
+}
+_TEMPS_C, _LAPSES_PER_FT_C = _TEMP_SCALES[TemperatureUnit.C][:2]
+
+
+def _pressure_layers():
+    """Per-layer base temperature (K), delta exponent, scale height (ft) and base delta.
+
+    Gradient layers: delta = delta_base * (T / T_base) ** exponent.
+    Isothermal layers: delta = delta_base * exp((h_base - h) / scale_height).
+    Unused entries are 0 (exponent) and infinity (scale height), so that
+    either formula evaluated in the other kind of layer gives delta_base.
+    """
+    temps_k = [TEMP_SL_STD_K, TEMP_STRATOSPHERE_C + ZERO_C_IN_K]
+    temps_k += [temp + ZERO_C_IN_K for temp in _BASE_TEMPS_C[2:]]
+    exponents = [TROPOSPHERE_DELTA_EXP, 0.0]
+    heights = [math.inf, TROPOPAUSE_CONST_US]
+    for gradient, temp_k in zip(LAYER_GRADIENTS_K_PER_M[2:], temps_k[2:]):
+        if gradient == 0.0:
+            exponents.append(0.0)
+            heights.append(GAS_CONSTANT_AIR * temp_k / GRAVITY_STD / 0.3048)
+        else:
+            exponents.append(-GRAVITY_STD / (GAS_CONSTANT_AIR * gradient))
+            heights.append(math.inf)
+
+    deltas = [1.0, DELTA_AT_TROPOPAUSE]
+    for i in range(1, len(temps_k) - 1):
+        top = _LAYER_BASES_FT[i + 1]
+        if _ISOTHERMAL[i]:
+            deltas.append(deltas[i] * math.exp((_LAYER_BASES_FT[i] - top) / heights[i]))
+        else:
+            deltas.append(deltas[i] * (temps_k[i + 1] / temps_k[i]) ** exponents[i])
+    return tuple(temps_k), tuple(exponents), tuple(heights), tuple(deltas)
+
+
+_TEMPS_K, _DELTA_EXPONENTS, _SCALE_HEIGHTS_FT, _DELTA_BASES = _pressure_layers()
+# Standard-day density ratio at each layer base: delta / theta there. In a
+# gradient layer sigma follows the delta formula with the exponent less one.
+_SIGMA_BASES = tuple(d * TEMP_SL_STD_K / t for d, t in zip(_DELTA_BASES, _TEMPS_K))
+_SIGMA_EXPONENTS = tuple(e - 1.0 if e else 0.0 for e in _DELTA_EXPONENTS)
+# Exponents of the inverse formulas
+_DELTA_ROOTS = tuple(1.0 / e if e else 0.0 for e in _DELTA_EXPONENTS)
+_SIGMA_ROOTS = tuple(1.0 / e if e else 0.0 for e in _SIGMA_EXPONENTS)
+# Lapse rate over base temperature (1/ft): T / T_i = 1 + (h_i - h) * ratio
+_LAPSE_RATIOS = tuple(lapse / temp for lapse, temp in zip(_LAPSES_PER_FT_C, _TEMPS_K))
+# Ratios at the layer bases above sea level, ascending, to search ratios in
+_DELTA_BOUNDS = _DELTA_BASES[:0:-1]
+_SIGMA_BOUNDS = _SIGMA_BASES[:0:-1]
+
+# Sea level standard pressure and density per unit
+_PRESSURE_SL = {
+    PressureUnit.HPA: PRESSURE_SL_STD_HPA,
+    PressureUnit.INHG: PRESSURE_SL_STD_INHG,
+    PressureUnit.PA: PRESSURE_SL_STD_PA,
+    PressureUnit.PSF: PRESSURE_SL_STD_PSF,
+}
+_DENSITY_SL = {
+    DensityUnit.KG_M3: DENSITY_SL_STD_KG_M3,
+    DensityUnit.SLUG_FT3: DENSITY_SL_STD_SLUG_FT3,
+}
+
+# Masked evaluation only pays off when each kind of layer comes in long
+# runs of elements (traces, sorted grids); heavily interleaved layers
+# evaluate both formulas everywhere instead.
+_MIN_RUN_LENGTH = 64
+
+# Elements per np.searchsorted call, so its index temporary stays small
+_SEARCH_BLOCK = 4096
+
+
+class AtmosState(NamedTuple):
+    """Atmospheric state computed by ``state``."""
+
+    hp_ft: np.ndarray
+    isa: np.ndarray
+    theta: np.ndarray
+    delta: np.ndarray
+    sigma: np.ndarray
+
+
+def altitude_ft(hp, alt_unit="ft", ws=None):
+    """Convert pressure altitude to a float array in feet and validate it once.
+
+    The array has the dtype of the precision policy. A unit conversion
+    writes into workspace scratch when ``ws`` is given.
+    """
+    dtype = float_dtype()
+    if alt_unit != LengthUnit.FT:
+        out = None if ws is None else ws.get("atmos.hp_ft", np.shape(hp), dtype)
+        hp = length_to_feet(hp, alt_unit, out=out)
+    hp_ft = np.asarray(hp, dtype=dtype)
+    validate_altitude(hp_ft)
+    return hp_ft
+
+
+def validate_altitude(hp_ft):
+    """Raise ValueError if any altitude is above the top of the 1976 layers."""
+    hp_ft = np.asarray(hp_ft)
+    # fmax.reduce skips NaNs like the comparison does, without a mask temporary
+    if hp_ft.size and np.fmax.reduce(hp_ft, axis=None) > HEIGHT_TOP_FT:
+        raise ValueError(TOP_ERROR)
+
+
+def isa(hp_ft, temp_unit=TemperatureUnit.C, out=None, ws=None, layer=None):
+    """ISA temperature in ``temp_unit`` for validated altitudes in feet.
+
+    ``layer`` is the result of ``locate`` for ``hp_ft``, if the caller has it.
+    """
+    if out is None:
+        out = np.empty(hp_ft.shape, hp_ft.dtype)
+    nb = _backend.kernels()
+    if nb is not None:
+        return nb.isa(temp_unit)(hp_ft, out=out)
+    ws = ws or Workspace()
+    if layer is None:
+        layer = locate(hp_ft, ws)
+    temps, lapses = _TEMP_SCALES[temp_unit][:2]
+    if isinstance(layer, LayerSplit):
+        # The lower layer everywhere, then the upper one under its mask
+        low, high = layer.low, layer.low + 1
+        np.multiply(hp_ft, lapses[low], out=out)
+        np.subtract(temps[low], out, out=out)
+        if lapses[high]:
+            np.multiply(hp_ft, lapses[high], out=out, where=layer.upper)
+            np.subtract(temps[high], out, out=out, where=layer.upper)
+        else:
+            np.copyto(out, temps[high], where=layer.upper)
+        return out
+    np.multiply(hp_ft, _gather(lapses, layer, ws, hp_ft.dtype), out=out)
+    return np.subtract(_gather(temps, layer, ws, hp_ft.dtype), out, out=out)
+
+
+def theta(hp_ft, delta_isa=0, temp_unit=TemperatureUnit.C, out=None, ws=None):
+    """Temperature ratio for validated altitudes in feet and delta ISA in ``temp_unit``."""
+    if out is None:
+        out = np.empty(np.broadcast_shapes(hp_ft.shape, np.shape(delta_isa)), hp_ft.dtype)
+    nb = _backend.kernels()
+    if nb is not None:
+        return nb.theta(temp_unit)(hp_ft, delta_isa, out=out)
+    if np.may_share_memory(out, delta_isa):
+        # The ISA temperature is written before delta ISA is added
+        delta_isa = delta_isa.copy()
+    isa(hp_ft, temp_unit, out, ws)
+    return _theta_from_isa(out, delta_isa, temp_unit)
+
+
+def delta(hp_ft, out=None, ws=None):
+    """Pressure ratio for validated altitudes in feet."""
+    if out is None:
+        out = np.empty(hp_ft.shape, hp_ft.dtype)
+    nb = _backend.kernels()
+    if nb is not None:
+        return nb.delta(hp_ft, out=out)
+    ws = ws or Workspace()
+    if np.may_share_memory(out, hp_ft):
+        # The isothermal formula reads the altitudes after the temperature
+        # has been written, so work in scratch when out is the input
+        result = delta(hp_ft, ws.get("atmos.aliased_delta", hp_ft.shape, hp_ft.dtype), ws)
+        np.copyto(out, result)
+        return out
+    layer = locate(hp_ft, ws)
+    isa(hp_ft, TemperatureUnit.C, out, ws, layer)
+    np.add(out, ZERO_C_IN_K, out=out)
+    return _delta_from_isa_k(hp_ft, out, layer, ws)
+
+
+def hp_from_delta(delta_, out=None, ws=None):
+    """Pressure altitude in feet for positive pressure ratios — the inverse of ``delta``.
+
+    Gradient layers: h = (T0_i - T_base_i * (delta / delta_i) ** (1 / n_i) + 273.15) / L_i.
+    Isothermal layers: h = h_i - H_i * ln(delta / delta_i).
+
+    ``out`` may be ``delta_`` itself. NaN ratios come back as NaN.
+    """
+    return _ratio_hp(delta_, _DELTA_BASES, _DELTA_ROOTS, _DELTA_BOUNDS, out, ws)
+
+
+def hd_from_sigma(sigma_, out=None, ws=None):
+    """Density altitude in feet for positive density ratios — the standard-day
+    altitude of each ratio.
+
+    The inverse of the standard-day sigma, which follows the delta formulas
+    with the gradient-layer exponents less one.
+
+    ``out`` may be ``sigma_`` itself. NaN ratios come back as NaN.
+    """
+    return _ratio_hp(sigma_, _SIGMA_BASES, _SIGMA_ROOTS, _SIGMA_BOUNDS, out, ws)
+
+
+def _ratio_hp(ratio, bases, roots, bounds, out, ws):
+    """Standard-day altitude of pressure or density ratios, per layer."""
+    if out is None:
+        out = np.empty(ratio.shape, ratio.dtype)
+    ws = ws or Workspace()
+    layer = _search(ratio, bounds, "right", ws)
+    # Ratios fall with altitude: the layer is the number of bounds above the ratio
+    if isinstance(layer, int):
+        return _layer_hp(ratio, out, bases, roots, len(bounds) - layer, ws)
+    # Each branch only reads and writes its own elements, so out may alias ratio
+    if isinstance(layer, LayerSplit):
+        below = layer.upper
+        above = np.logical_not(below, out=ws.get("atmos.lower", below.shape, bool))
+        top = len(bounds) - layer.low
+        _layer_hp(ratio, out, bases, roots, top - 1, ws, where=below)
+        return _layer_hp(ratio, out, bases, roots, top, ws, where=above)
+    np.subtract(len(bounds), layer, out=layer)
+    isothermal, gradient = _isothermal_masks(layer, ws)
+    _gradient_hp(ratio, out, bases, roots, layer, ws, where=gradient)
+    return _isothermal_hp(ratio, out, bases, layer, ws, where=isothermal)
+
+
+def _layer_hp(ratio, out, bases, roots, layer, ws, where=True):
+    """``_isothermal_hp`` or ``_gradient_hp``, for one layer."""
+    if _ISOTHERMAL[layer]:
+        return _isothermal_hp(ratio, out, bases, layer, ws, where=where)
+    return _gradient_hp(ratio, out, bases, roots, layer, ws, where=where)
+
+
+def _gradient_hp(ratio, out, bases, roots, layer, ws, where=True):
+    dtype = ratio.dtype
+    base = _gather(bases, layer, ws, dtype)
+    if np.ndim(base) or base != 1.0:
+        ratio = np.divide(ratio, base, out=out, where=where)
+    np.power(ratio, _gather(roots, layer, ws, dtype), out=out, where=where)
+    np.multiply(out, _gather(_TEMPS_K, layer, ws, dtype), out=out, where=where)
+    np.subtract(out, ZERO_C_IN_K, out=out, where=where)
+    np.subtract(_gather(_TEMPS_C, layer, ws, dtype), out, out=out, where=where)
+    np.divide(out, _gather(_LAPSES_PER_FT_C, layer, ws, dtype), out=out, where=where)
+    return out
+
+
+def _isothermal_hp(ratio, out, bases, layer, ws, where=True):
+    dtype = ratio.dtype
+    np.divide(ratio, _gather(bases, layer, ws, dtype), out=out, where=where)
+    np.log(out, out=out, where=where)
+    np.multiply(out, _gather(_SCALE_HEIGHTS_FT, layer, ws, dtype), out=out, where=where)
+    np.subtract(_gather(_LAYER_BASES_FT, layer, ws, dtype), out, out=out, where=where)
+    return out
+
+
+def state(hp_ft, delta_isa=0, temp_unit=TemperatureUnit.C, table=None, out=None, ws=None):
+    """Fused ISA temperature, theta, delta and sigma for validated altitudes in feet.
+
+    Args:
+        hp_ft: Pressure altitude array in feet, already validated.
+        delta_isa: Temperature deviation from ISA in ``temp_unit``.
+        temp_unit: Unit of ``delta_isa`` and of the returned ISA temperature.
+        table: Optional ``RatioTable`` to interpolate delta from.
+        out: Optional array to write sigma into.
+        ws: Workspace for the other fields and scratch. With a persistent
+            workspace the returned ISA, theta and delta arrays are scratch
+            that the next call overwrites.
+
+    Returns:
+        AtmosState with every field as an array of the dtype of ``hp_ft``.
+    """
+    shape = np.broadcast_shapes(hp_ft.shape, np.shape(delta_isa))
+    dtype = hp_ft.dtype
+    ws = ws or Workspace()
+    if out is None:
+        out = np.empty(shape, dtype)
+    isa_t = ws.get("state.isa", hp_ft.shape, dtype)
+    theta_t = ws.get("state.theta", shape, dtype)
+    delta_ = ws.get("state.delta", hp_ft.shape, dtype)
+
+    if _backend.kernels() is not None:
+        isa(hp_ft, temp_unit, isa_t)
+        theta(hp_ft, delta_isa, temp_unit, theta_t)
+        if table is not None:
+            table.delta(hp_ft, delta_, ws)
+        else:
+            delta(hp_ft, delta_)
+        return AtmosState(hp_ft, isa_t, theta_t, delta_, np.divide(delta_, theta_t, out=out))
+
+    layer = locate(hp_ft, ws)
+    isa(hp_ft, temp_unit, isa_t, ws, layer)
+    np.add(isa_t, delta_isa, out=theta_t)
+    _theta_from_isa(theta_t, 0, temp_unit)
+
+    if table is not None:
+        table.delta(hp_ft, delta_, ws)
+    else:
+        if temp_unit == TemperatureUnit.C:
+            np.add(isa_t, ZERO_C_IN_K, out=delta_)
+        else:
+            isa(hp_ft, TemperatureUnit.C, delta_, ws, layer)
+            np.add(delta_, ZERO_C_IN_K, out=delta_)
+        _delta_from_isa_k(hp_ft, delta_, layer, ws)
+    np.divide(delta_, theta_t, out=out)
+    return AtmosState(hp_ft, isa_t, theta_t, delta_, out)
+
+
+def locate(hp_ft, ws):
+    """Layer of every altitude in feet.
+
+    Returns an int when all altitudes lie in one layer (the common case,
+    which then needs no per-element parameters), a ``LayerSplit`` when they
+    lie in two adjacent layers, or else an intp index array in workspace
+    scratch. NaN altitudes give NaN results in any layer.
+    """
+    return _search(hp_ft, _LAYER_BOUNDS_FT, "left", ws)
+
+
+class LayerSplit(NamedTuple):
+    """Elements in two adjacent layers: ``upper`` masks those in layer ``low + 1``."""
+
+    low: int
+    upper: np.ndarray
+
+
+def _search(values, bounds, side, ws):
+    """``np.searchsorted(bounds, values, side)``, as an int if every value gives the
+    same, or as a ``LayerSplit`` if the values give two consecutive results.
+    """
+    if not values.size:
+        return 0
+    dtype = values.dtype
+    bounds = _layer_array(bounds, dtype)
+    # fmin/fmax skip NaNs, which may then take any layer
+    ends = np.searchsorted(bounds, np.array([np.fmin.reduce(values, axis=None),
+                                             np.fmax.reduce(values, axis=None)], dtype), side)
+    low, high = int(ends[0]), int(ends[1])
+    if low == high:
+        return low
+    if high == low + 1:
+        # One comparison is much cheaper than a search and a gather per parameter
+        above = np.greater if side == "left" else np.greater_equal
+        return LayerSplit(low, above(values, bounds[low],
+                                     out=ws.get("atmos.upper", values.shape, bool)))
+    index = ws.get("atmos.layer", values.shape, np.intp)
+    flat_values = values.reshape(-1)
+    flat_index = index.reshape(-1)
+    for start in range(0, flat_values.size, _SEARCH_BLOCK):
+        stop = start + _SEARCH_BLOCK
+        flat_index[start:stop] = np.searchsorted(bounds, flat_values[start:stop], side)
+    return index
+
+
+@functools.lru_cache(maxsize=None)
+def _layer_array(values, dtype):
+    """A per-layer parameter tuple as a read-only array of ``dtype``."""
+    array = np.array(values, dtype)
+    array.flags.writeable = False
+    return array
+
+
+def _gather(values, layer, ws, dtype):
+    """Per-element layer parameter: a float for a single layer, else a gathered array.
+
+    Gathered arrays share one scratch buffer, so each must be used up
+    before the next ``_gather`` call. ``LayerSplit`` results are handled by
+    the callers, with one scalar parameter per mask.
+    """
+    if isinstance(layer, int):
+        return values[layer]
+    # Indices are in range; mode="clip" just stops take from buffering out
+    return np.take(_layer_array(values, dtype), layer, mode="clip",
+                   out=ws.get("atmos.gather", layer.shape, dtype))
+
+
+def _isothermal_masks(layer, ws):
+    """Masks of the elements in isothermal and in gradient layers."""
+    isothermal = np.take(_layer_array(_ISOTHERMAL, np.dtype(bool)), layer, mode="clip",
+                         out=ws.get("atmos.isothermal", layer.shape, bool))
+    gradient = np.logical_not(isothermal, out=ws.get("atmos.gradient", layer.shape, bool))
+    return isothermal, gradient
+
+
+def _theta_from_isa(temp, delta_isa, temp_unit):
+    """Turn an ISA temperature buffer of the broadcast shape into theta in place."""
+    _, _, offset, sl_abs = _TEMP_SCALES[temp_unit]
+    if np.ndim(delta_isa) or delta_isa != 0:
+        np.add(temp, delta_isa, out=temp)
+    if offset:
+        np.add(temp, offset, out=temp)
+    np.divide(temp, sl_abs, out=temp)
+    return temp
+
+
+def _delta_from_isa_k(hp_ft, temp, layer, ws):
+    """Turn an ISA Kelvin buffer into delta in place.
+
+    Gradient layers: delta = delta_i * (T / T_i) ** n_i.
+    Isothermal layers: delta = delta_i * exp((h_i - h) / H_i).
+    """
+    if isinstance(layer, int):
+        return _layer_delta(hp_ft, temp, layer, ws)
+    if isinstance(layer, LayerSplit):
+        return _split_delta(hp_ft, temp, layer, ws)
+
+    isothermal, gradient = _isothermal_masks(layer, ws)
+    n_isothermal = np.count_nonzero(isothermal)
+    if n_isothermal == 0:
+        return _gradient_delta(hp_ft, temp, layer, ws)
+    if n_isothermal == isothermal.size:
+        return _isothermal_delta(hp_ft, temp, layer, ws)
+
+    if _short_runs(isothermal, ws):
+        # The unused parameters of each formula make it give delta_i in the
+        # other kind of layer, so both can run on every element
+        _gradient_delta(hp_ft, temp, layer, ws)
+        other = ws.get("atmos.isothermal_delta", temp.shape, temp.dtype)
+        np.copyto(temp, _isothermal_delta(hp_ft, other, layer, ws), where=isothermal)
+        return temp
+
+    _gradient_delta(hp_ft, temp, layer, ws, where=gradient)
+    return _isothermal_delta(hp_ft, temp, layer, ws, where=isothermal)
+
+
+def _split_delta(hp_ft, temp, split, ws):
+    """``_delta_from_isa_k`` for altitudes in two adjacent layers."""
+    low, high = split.low, split.low + 1
+    upper = split.upper
+    if _short_runs(upper, ws):
+        # Both formulas on every element, as for interleaved layers above
+        other = ws.get("atmos.upper_delta", temp.shape, temp.dtype)
+        if not _ISOTHERMAL[high]:
+            np.copyto(other, temp)
+        _layer_delta(hp_ft, other, high, ws)
+        _layer_delta(hp_ft, temp, low, ws)
+        np.copyto(temp, other, where=upper)
+        return temp
+    lower = np.logical_not(upper, out=ws.get("atmos.lower", upper.shape, bool))
+    _layer_delta(hp_ft, temp, low, ws, where=lower)
+    return _layer_delta(hp_ft, temp, high, ws, where=upper)
+
+
+def _short_runs(mask, ws):
+    """Whether the mask changes too often for masked evaluation to pay off."""
+    flat = mask.reshape(-1)
+    changes = ws.get("atmos.layer_changes", (flat.size - 1,), bool)
+    runs = np.count_nonzero(np.not_equal(flat[1:], flat[:-1], out=changes)) + 1
+    return mask.size // runs < _MIN_RUN_LENGTH
+
+
+def _layer_delta(hp_ft, temp, layer, ws, where=True):
+    """``_isothermal_delta`` or ``_gradient_delta``, for one layer."""
+    if _ISOTHERMAL[layer]:
+        return _isothermal_delta(hp_ft, temp, layer, ws, where=where)
+    return _gradient_delta(hp_ft, temp, layer, ws, where=where)
+
+
+def _gradient_delta(hp_ft, temp, layer, ws, where=True):
+    """delta_i * (T / T_i) ** n_i for ISA Kelvin held in ``temp``, in place.
+
+    float64 evaluates the formula as written, like the scalar path. In
+    float32 the rounding of T / T_i is multiplied by n_i, which reaches 34
+    above 20 km, so single precision takes the ratio from the altitude and
+    uses exp(n_i * log1p((h_i - h) * L_i / T_i)).
+    """
+    dtype = temp.dtype
+    if dtype == np.float64:
+        np.divide(temp, _gather(_TEMPS_K, layer, ws, dtype), out=temp, where=where)
+        np.power(temp, _gather(_DELTA_EXPONENTS, layer, ws, dtype), out=temp, where=where)
+    else:
+        np.subtract(_gather(_LAYER_BASES_FT, layer, ws, dtype), hp_ft, out=temp, where=where)
+        np.multiply(temp, _gather(_LAPSE_RATIOS, layer, ws, dtype), out=temp, where=where)
+        np.log1p(temp, out=temp, where=where)
+        np.multiply(temp, _gather(_DELTA_EXPONENTS, layer, ws, dtype), out=temp, where=where)
+        np.exp(temp, out=temp, where=where)
+    base = _gather(_DELTA_BASES, layer, ws, dtype)
+    if np.ndim(base) or base != 1.0:
+        np.multiply(temp, base, out=temp, where=where)
+    return temp
+
+
+def _isothermal_delta(hp_ft, out, layer, ws, where=True):
+    dtype = out.dtype
+    np.subtract(_gather(_LAYER_BASES_FT, layer, ws, dtype), hp_ft, out=out, where=where)
+    np.divide(out, _gather(_SCALE_HEIGHTS_FT, layer, ws, dtype), out=out, where=where)
+    np.exp(out, out=out, where=where)
+    np.multiply(out, _gather(_DELTA_BASES, layer, ws, dtype), out=out, where=where)
+    return out
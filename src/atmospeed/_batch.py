@@ -0,0 +1,713 @@
+"""Columnar batch conversion engine behind ``atmospeed batch``.
+
+Each CSV column is parsed once into a numpy array, the unit and speed type
+columns are encoded categorically, and the rows are converted as one
+``SpeedArray`` against one array-valued ``Atmo``. Results are identical to converting every row
+with ``Atmo`` and ``Speed``.
+
+Files can be converted whole or streamed in fixed-size blocks of rows, which
+keeps peak memory independent of the file size. Large files can also be split
+into byte ranges at line boundaries and converted in a process pool.
+
+Besides CSV, ``run_columns`` reads NumPy ``.npy`` and ``.npz`` files and raw
+structured-array records, memory-mapped where the format allows, and writes
+CSV, ``.npy`` or ``.npz`` column by column. Result columns are formatted by
+the vectorized formatter in ``_format``.
+"""
+
+import collections
+import contextlib
+import csv
+import io
+import itertools
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from ._format import csv_bytes, fixed_field, format_fixed, text_field
+from . import backend
+from .atmo import Atmo
+from .convert import length_to_feet
+from .precision import float_dtype, get_precision, set_precision
+from .profiling import phase
+from .speed import SpeedArray
+from .temperature import isa
+from .units import LengthUnit, SpeedType, SpeedUnit, TemperatureUnit
+
+REQUIRED_COLUMNS = ("hp", "temperature", "speed_value", "speed_type")
+
+# Size of the byte ranges handed to worker processes in parallel mode
+PARALLEL_BLOCK_BYTES = 4 * 1024 * 1024
+
+_TRUE_VALUES = ("true", "1", "yes", "")
+
+# Columns parsed as floats; the others are categorical
+_FLOAT_COLUMNS = ("hp", "temperature", "speed_value")
+
+
+def run(input_path, output_path, to_type, chunk_size=None, progress=None, decimals=4):
+    """Convert a CSV file of speed conditions and write it back with a result column.
+
+    Args:
+        input_path: Input CSV file path.
+        output_path: Output CSV file path.
+        to_type: Target speed type.
+        chunk_size: Number of rows read, converted and written per block.
+            None (default) converts the whole file in one block.
+        progress: Optional ``Progress`` reporter updated after every block.
+        decimals: Digits after the decimal point of the result (default 4).
+
+    Returns:
+        Number of data rows processed.
+
+    Raises:
+        ValueError: If a required column is missing (even with no data
+            rows) or a row cannot be converted.
+
+    Note:
+        The output file is written block by block, so an invalid row in a
+        later block leaves the rows before it already written. An output
+        path that is the input file is only replaced once all rows are
+        converted.
+    """
+    n_rows = 0
+    with _output_target(input_path, output_path) as target, \
+            open(input_path, newline="") as f_in, open(target, "w", newline="") as f_out:
+        reader = csv.reader(f_in)
+        fieldnames = next(reader, [])
+        # Checked here too, for files with no data rows
+        _check_columns(fieldnames)
+        writer = csv.writer(f_out)
+        writer.writerow(fieldnames + [f"{to_type}_result"])
+
+        for rows in _blocks(reader, chunk_size):
+            results = convert_rows(fieldnames, rows, to_type, first_row=n_rows + 1)
+            _write_rows(writer, rows, results, decimals)
+            n_rows += len(rows)
+            if progress is not None:
+                progress.update(n_rows, f_in.buffer.tell())
+
+    return n_rows
+
+
+def run_parallel(input_path, output_path, to_type, workers,
+                 block_bytes=PARALLEL_BLOCK_BYTES, progress=None, decimals=4):
+    """Convert a CSV file in a process pool; output is identical to ``run``.
+
+    The data rows are split into byte ranges of about ``block_bytes`` at line
+    boundaries. Each range is parsed, converted and formatted by a worker
+    process, and the parent writes the results back in the original order.
+    At most ``2 * workers`` ranges are in flight, which bounds memory.
+
+    Args:
+        input_path: Input CSV file path.
+        output_path: Output CSV file path.
+        to_type: Target speed type.
+        workers: Number of worker processes.
+        block_bytes: Approximate size of each byte range (default 4 MiB).
+        progress: Optional ``Progress`` reporter updated after every range.
+        decimals: Digits after the decimal point of the result (default 4).
+
+    Returns:
+        Number of data rows processed.
+
+    Raises:
+        ValueError: If a required column is missing (checked before any
+            worker starts) or a row cannot be converted.
+
+    Note:
+        Ranges are cut at newlines, so quoted fields must not contain line
+        breaks.
+    """
+    with open(input_path, "rb") as f_in:
+        header = f_in.readline()
+        ranges = _line_ranges(f_in, f_in.tell(), os.fstat(f_in.fileno()).st_size,
+                              block_bytes)
+    fieldnames = next(csv.reader(_text(header)), [])
+    _check_columns(fieldnames)
+
+    n_rows = 0
+    # Forked workers can deadlock on threads the parent has started (the
+    # numba-parallel backend), so workers are spawned and given its settings
+    pool = ProcessPoolExecutor(max_workers=workers,
+                               mp_context=multiprocessing.get_context("spawn"),
+                               initializer=_init_worker,
+                               initargs=(get_precision(), backend.get_backend()))
+    with _output_target(input_path, output_path) as target, \
+            open(target, "w", newline="") as f_out, pool:
+        writer = csv.writer(f_out)
+        writer.writerow(fieldnames + [f"{to_type}_result"])
+
+        pending = collections.deque()
+        try:
+            for start, stop in ranges:
+                pending.append((stop, pool.submit(
+                    _convert_range, input_path, start, stop, fieldnames, to_type, decimals
+                )))
+                if len(pending) >= 2 * workers:
+                    n_rows = _write_range(f_out, pending.popleft(), n_rows, progress)
+            while pending:
+                n_rows = _write_range(f_out, pending.popleft(), n_rows, progress)
+        except BaseException:
+            pool.shutdown(cancel_futures=True)
+            raise
+
+    return n_rows
+
+
+def run_columns(input_path, output_path, to_type, chunk_size=None, progress=None,
+                decimals=4, record_dtype=None):
+    """Convert a batch file column by column, with NumPy binary input or output.
+
+    Input formats:
+
+    - CSV, as for ``run``.
+    - ``.npy``: a 1-D structured array with one field per column,
+      memory-mapped.
+    - ``.npz``: one 1-D array per column.
+    - Raw records without a header, when ``record_dtype`` is given,
+      memory-mapped with ``np.memmap``.
+
+    Binary columns hold the CSV values: floats for the numeric columns,
+    strings for units and speed types, and booleans (or strings) for
+    ``temp_is_delta_isa``.
+
+    Output formats, from the extension of ``output_path``: ``.npy`` (a
+    structured array of the input fields plus the result), ``.npz`` (one
+    array per column plus the result), otherwise CSV. CSV output formats
+    every float column with ``decimals`` digits.
+
+    Args:
+        input_path: Input file path.
+        output_path: Output file path.
+        to_type: Target speed type.
+        chunk_size: Number of rows converted and written per block. None
+            (default) converts the whole file in one block.
+        progress: Optional ``Progress`` reporter updated after every block.
+        decimals: Digits after the decimal point in CSV output (default 4).
+        record_dtype: Structured dtype (or ``parse_record_dtype`` spec) of
+            raw input records.
+
+    Returns:
+        Number of data rows processed.
+
+    Raises:
+        ValueError: If the input is not a valid batch file, a required
+            column is missing, or a row cannot be converted.
+    """
+    with phase("batch.read"):
+        columns = read_columns(input_path, record_dtype)
+    n_rows = len(next(iter(columns.values()))) if columns else 0
+    result_name = f"{to_type}_result"
+    if result_name in columns:
+        raise ValueError(f"Input already has a {result_name} column")
+    _check_columns(columns)
+
+    # Memory-mapped input stays in use until the last block is converted
+    with _output_target(input_path, output_path) as target:
+        output = _open_output(target, columns, result_name, n_rows, decimals)
+        try:
+            step = n_rows if chunk_size is None else chunk_size
+            for start in range(0, n_rows, max(step, 1)):
+                block = {name: column[start:start + step] for name, column in columns.items()}
+                results = convert_block(block, to_type)
+                with phase("batch.write"):
+                    output.write(start, block, results)
+                if progress is not None:
+                    done = start + len(results)
+                    progress.update(done, progress.total_bytes * done // n_rows)
+        finally:
+            with phase("batch.write"):
+                output.close()
+    return n_rows
+
+
+def file_format(path, record_dtype=None):
+    """Batch format of ``path``: "raw" with a record dtype, "npy" or "npz"
+    by extension, otherwise "csv"."""
+    if record_dtype is not None:
+        return "raw"
+    extension = os.path.splitext(path)[1].lower()
+    if extension in (".npy", ".npz"):
+        return extension[1:]
+    return "csv"
+
+
+def parse_record_dtype(spec):
+    """Structured dtype from a ``name:type,...`` spec such as ``hp:f8,speed_type:S4``.
+
+    Raises:
+        ValueError: If the spec is malformed or names an unknown type.
+    """
+    try:
+        fields = [tuple(item.split(":")) for item in spec.split(",")]
+        return np.dtype([(name.strip(), code.strip()) for name, code in fields])
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"Invalid record dtype {spec!r}: {exc}") from None
+
+
+def read_columns(path, record_dtype=None):
+    """Read a batch file into a dict of column name to 1-D array.
+
+    ``.npy`` and raw inputs are memory-mapped; the arrays are views of the
+    file, so reading costs nothing until a block is converted.
+
+    Raises:
+        ValueError: If the file is not a valid batch file of its format.
+    """
+    fmt = file_format(path, record_dtype)
+    if fmt == "csv":
+        return _read_csv_columns(path)
+    if fmt == "npz":
+        with np.load(path) as data:
+            columns = {name: data[name] for name in data.files}
+    else:
+        if fmt == "npy":
+            records = np.load(path, mmap_mode="r")
+        else:
+            records = _read_raw(path, record_dtype)
+        if records.dtype.names is None or records.ndim != 1:
+            raise ValueError(f"{path}: expected a 1-D structured array with one field per column")
+        columns = {name: records[name] for name in records.dtype.names}
+    lengths = {column.shape for column in columns.values()}
+    if len(lengths) > 1 or any(len(shape) != 1 for shape in lengths):
+        raise ValueError(f"{path}: columns must be 1-D arrays of equal length")
+    return columns
+
+
+def convert_block(columns, to_type):
+    """Convert a block of column arrays (as from ``read_columns``).
+
+    Returns:
+        Array of converted values, one per row.
+    """
+    return convert_columns(**_parse_columns(columns.get, len(columns["hp"])),
+                           to_type=to_type)
+
+
+class Progress:
+    """Periodic rows/s and ETA report for long batch jobs.
+
+    Progress is measured in bytes of input consumed, so the ETA is available
+    without counting the rows of the file up front.
+
+    Args:
+        total_bytes: Size of the input file in bytes.
+        interval: Minimum number of seconds between reports (default 5).
+        stream: Output stream (default stderr).
+    """
+
+    def __init__(self, total_bytes, interval=5.0, stream=None):
+        self.total_bytes = total_bytes
+        self._interval = interval
+        self._stream = stream if stream is not None else sys.stderr
+        self._start = time.perf_counter()
+        self._last_report = self._start
+
+    @classmethod
+    def for_file(cls, path, **kwargs):
+        """Create a reporter sized to the file at ``path``."""
+        return cls(os.path.getsize(path), **kwargs)
+
+    def update(self, rows, bytes_done):
+        """Report if at least ``interval`` seconds passed since the last report."""
+        now = time.perf_counter()
+        if now - self._last_report < self._interval:
+            return
+        self._last_report = now
+
+        elapsed = now - self._start
+        rate = rows / elapsed if elapsed > 0 else 0.0
+        fraction = min(bytes_done / self.total_bytes, 1.0) if self.total_bytes else 1.0
+        if fraction > 0:
+            eta = f"{elapsed * (1.0 - fraction) / fraction:.0f} s"
+        else:
+            eta = "unknown"
+        print(f"{rows} rows, {rate:,.0f} rows/s, {fraction:.1%} done, ETA {eta}",
+              file=self._stream)
+
+
+def convert_rows(fieldnames, rows, to_type, first_row=1):
+    """Convert a block of CSV rows to the target speed type.
+
+    Args:
+        fieldnames: Header row of the CSV file.
+        rows: List of data rows, each a list of strings matching ``fieldnames``.
+        to_type: Target speed type.
+        first_row: Data row number of ``rows[0]``, used in error messages.
+
+    Returns:
+        Array of converted values, one per row.
+
+    Raises:
+        ValueError: If a required column is missing, a row has the wrong
+            number of fields, a unit is unknown, or an altitude is above
+            86 km.
+    """
+    _check_columns(fieldnames)
+    _check_rows(fieldnames, rows, first_row)
+
+    columns = list(zip(*rows)) if rows else [()] * len(fieldnames)
+    n_rows = len(rows)
+
+    def column(name):
+        if name in fieldnames:
+            return columns[fieldnames.index(name)]
+        return None
+
+    return convert_columns(**_parse_columns(column, n_rows), to_type=to_type)
+
+
+def convert_columns(hp, temperature, speed_value, speed_type, alt_unit,
+                    temp_unit, speed_unit, temp_is_delta_isa, to_type):
+    """Convert whole columns of speed conditions to the target speed type.
+
+    The categorical arguments are ``(categories, codes)`` pairs, where
+    ``codes`` is an integer array indexing into ``categories``.
+
+    Args:
+        hp: Pressure altitude array.
+        temperature: Temperature array (delta ISA or OAT per row).
+        speed_value: Speed value array.
+        speed_type: Categorical input speed types.
+        alt_unit: Categorical altitude units.
+        temp_unit: Categorical temperature units.
+        speed_unit: Categorical speed units.
+        temp_is_delta_isa: Categorical booleans, False where temperature is OAT.
+        to_type: Target speed type.
+
+    Returns:
+        Array of converted values in each row's speed unit (Mach is unitless).
+    """
+    # Normalize the atmosphere to feet and delta ISA in Celsius per unit
+    # group, with the same functions Atmo applies to a single point.
+    with phase("batch.units"):
+        hp_ft = np.empty_like(hp)
+        for unit, mask in _groups(*alt_unit):
+            hp_ft[mask] = length_to_feet(hp[mask], unit)
+
+        disa_c = np.empty_like(temperature)
+        for unit, unit_mask in _groups(*temp_unit):
+            for is_disa, disa_mask in _groups(*temp_is_delta_isa):
+                mask = unit_mask & disa_mask
+                disa = temperature[mask]
+                if not is_disa:
+                    disa = disa - isa(hp_ft[mask], alt_unit="ft", temp_unit=unit)
+                if unit in (TemperatureUnit.F, TemperatureUnit.R):
+                    disa = disa / 1.8
+                disa_c[mask] = disa
+
+    with phase("batch.convert"):
+        atmo = Atmo(hp=hp_ft, temperature=disa_c)
+        speeds = SpeedArray.from_codes(
+            speed_value,
+            _recode(speed_type, SpeedArray.TYPES),
+            _recode(speed_unit, SpeedArray.UNITS),
+        )
+        return speeds.to(to_type, atmo)
+
+
+@contextlib.contextmanager
+def _output_target(input_path, output_path):
+    """Path to write the output to.
+
+    The input is still being read while the output is written, so when
+    both are the same file the output goes to a temporary file next to it,
+    which replaces the input once complete.
+    """
+    if not (os.path.exists(output_path) and os.path.samefile(input_path, output_path)):
+        yield output_path
+        return
+    fd, temp_path = tempfile.mkstemp(suffix=os.path.splitext(output_path)[1],
+                                     dir=os.path.dirname(os.path.abspath(output_path)))
+    os.close(fd)
+    try:
+        yield temp_path
+        shutil.copymode(output_path, temp_path)
+        os.replace(temp_path, output_path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _write_rows(writer, rows, results, decimals=4):
+    """Write rows with their formatted result appended."""
+    with phase("batch.write"):
+        writer.writerows(
+            row + [text] for row, text in zip(rows, format_fixed(results, decimals))
+        )
+
+
+class _CsvOutput:
+    """CSV output written a block at a time from whole columns."""
+
+    def __init__(self, path, names, decimals):
+        self._decimals = decimals
+        self._file = open(path, "wb")
+        header = io.StringIO()
+        csv.writer(header).writerow(names)
+        self._file.write(header.getvalue().encode())
+
+    def write(self, start, block, results):
+        fields = [self._field(column) for column in block.values()]
+        fields.append(fixed_field(results, self._decimals))
+        self._file.write(csv_bytes(fields))
+
+    def close(self):
+        self._file.close()
+
+    def _field(self, column):
+        if column.dtype.kind == "f":
+            return fixed_field(column, self._decimals)
+        return text_field(column)
+
+
+class _NpyOutput:
+    """``.npy`` output: a memory-mapped structured array filled column by column."""
+
+    def __init__(self, path, dtype, n_rows):
+        if n_rows:
+            self._records = np.lib.format.open_memmap(path, mode="w+", dtype=dtype,
+                                                      shape=(n_rows,))
+        else:
+            np.save(path, np.empty(0, dtype))
+            self._records = None
+        self._result_name = dtype.names[-1]
+
+    def write(self, start, block, results):
+        stop = start + len(results)
+        for name, column in block.items():
+            self._records[name][start:stop] = column
+        self._records[self._result_name][start:stop] = results
+
+    def close(self):
+        if self._records is not None:
+            self._records.flush()
+            self._records = None
+
+
+class _NpzOutput:
+    """``.npz`` output: the input columns plus the result column."""
+
+    def __init__(self, path, columns, result_name, n_rows):
+        self._path = path
+        self._columns = columns
+        self._result_name = result_name
+        self._results = np.empty(n_rows, float_dtype())
+
+    def write(self, start, block, results):
+        self._results[start:start + len(results)] = results
+
+    def close(self):
+        with open(self._path, "wb") as f:
+            np.savez(f, **self._columns, **{self._result_name: self._results})
+
+
+def _open_output(path, columns, result_name, n_rows, decimals):
+    fmt = file_format(path)
+    if fmt == "npy":
+        dtype = np.dtype([(name, column.dtype) for name, column in columns.items()]
+                         + [(result_name, float_dtype())])
+        return _NpyOutput(path, dtype, n_rows)
+    if fmt == "npz":
+        return _NpzOutput(path, columns, result_name, n_rows)
+    return _CsvOutput(path, list(columns) + [result_name], decimals)
+
+
+def _read_csv_columns(path):
+    """CSV file as columns: floats for the numeric columns, strings otherwise."""
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        fieldnames = next(reader, [])
+        rows = [row for row in reader if row]
+    _check_rows(fieldnames, rows, 1)
+    columns = list(zip(*rows)) if rows else [()] * len(fieldnames)
+    with phase("batch.parse"):
+        return {
+            name: (_parse_float(column, len(rows)) if name in _FLOAT_COLUMNS
+                   else np.array(column, dtype=str))
+            for name, column in zip(fieldnames, columns)
+        }
+
+
+def _read_raw(path, dtype):
+    """Memory-map a file of raw records of a structured dtype."""
+    if not isinstance(dtype, np.dtype):
+        dtype = parse_record_dtype(dtype)
+    size = os.path.getsize(path)
+    if size % dtype.itemsize:
+        raise ValueError(f"{path}: size {size} is not a multiple of the "
+                         f"{dtype.itemsize}-byte record")
+    if size == 0:
+        return np.empty(0, dtype)
+    return np.memmap(path, dtype=dtype, mode="r")
+
+
+def _check_columns(names):
+    missing = [name for name in REQUIRED_COLUMNS if name not in names]
+    if missing:
+        raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+
+
+def _check_rows(fieldnames, rows, first_row):
+    for i, row in enumerate(rows, start=first_row):
+        if len(row) != len(fieldnames):
+            raise ValueError(f"Row {i} has {len(row)} fields, "
+                             f"expected {len(fieldnames)}")
+
+
+def _float_column(column, n_rows):
+    """A numeric column as a float array; text columns parse like ``float()``."""
+    if not isinstance(column, np.ndarray):
+        return _parse_float(column, n_rows)
+    if column.dtype.kind in "US":
+        return _parse_float(column.tolist(), n_rows)
+    return np.asarray(column, dtype=float)
+
+
+def _text(data):
+    """Decode bytes the way ``open(path, newline="")`` decodes the file."""
+    return io.TextIOWrapper(io.BytesIO(data), newline="")
+
+
+def _line_ranges(f, start, end, block_bytes):
+    """Split ``[start, end)`` of a binary file into ranges ending at newlines."""
+    ranges = []
+    while start < end:
+        f.seek(min(start + block_bytes, end) - 1)
+        f.readline()
+        stop = min(f.tell(), end)
+        ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _init_worker(precision, backend_name):
+    """Worker: compute with the parent's precision and backend."""
+    set_precision(precision)
+    backend.set_backend(backend_name)
+
+
+def _convert_range(path, start, stop, fieldnames, to_type, decimals):
+    """Worker: convert the rows in a byte range and return them as CSV text."""
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(stop - start)
+    rows = [row for row in csv.reader(_text(data)) if row]
+    try:
+        results = convert_rows(fieldnames, rows, to_type)
+    except ValueError as exc:
+        raise ValueError(f"{exc} (in the block starting at byte {start})") from None
+
+    out = io.StringIO()
+    _write_rows(csv.writer(out), rows, results, decimals)
+    return out.getvalue(), len(rows)
+
+
+def _write_range(f_out, item, n_rows, progress):
+    """Write a finished range in order and return the updated row count."""
+    stop, future = item
+    with phase("batch.wait"):
+        text, count = future.result()
+    with phase("batch.write"):
+        f_out.write(text)
+    n_rows += count
+    if progress is not None:
+        progress.update(n_rows, stop)
+    return n_rows
+
+
+def _blocks(reader, chunk_size):
+    """Yield lists of non-empty rows, ``chunk_size`` at a time (all if None)."""
+    rows = (row for row in reader if row)
+    if chunk_size is None:
+        with phase("batch.read"):
+            block = list(rows)
+        yield block
+        return
+    while True:
+        with phase("batch.read"):
+            block = list(itertools.islice(rows, chunk_size))
+        if not block:
+            return
+        yield block
+
+
+def _parse_columns(column, n_rows):
+    """Parse and encode the columns returned by ``column(name)`` (None if absent)."""
+    with phase("batch.parse"):
+        return dict(
+            hp=_float_column(column("hp"), n_rows),
+            temperature=_float_column(column("temperature"), n_rows),
+            speed_value=_float_column(column("speed_value"), n_rows),
+            speed_type=_encode(column("speed_type"), n_rows, SpeedType,
+                               lambda s: s.strip().lower()),
+            alt_unit=_encode(column("alt_unit"), n_rows, LengthUnit,
+                             lambda s: s.strip() or "ft", default="ft"),
+            temp_unit=_encode(column("temp_unit"), n_rows, TemperatureUnit,
+                              lambda s: s.strip() or "C", default="C"),
+            speed_unit=_encode(column("speed_unit"), n_rows, SpeedUnit,
+                               lambda s: s.strip() or "kts", default="kts"),
+            temp_is_delta_isa=_encode(column("temp_is_delta_isa"), n_rows, bool,
+                                      lambda s: s.strip().lower() in _TRUE_VALUES,
+                                      default=True),
+        )
+
+
+def _parse_float(column, n_rows):
+    """Parse a text column into a float array with ``float()`` semantics."""
+    return np.fromiter(map(float, column), dtype=float, count=n_rows)
+
+
+def _encode(column, n_rows, category, normalize, default=None):
+    """Encode a text column as ``(categories, codes)``.
+
+    Normalization and enum coercion run once per distinct value rather than
+    once per row. Spellings that normalize to the same category (``"CAS"``,
+    ``" cas"``) share one code. A missing optional column encodes as
+    ``default`` throughout.
+    """
+    if column is None:
+        return [category(default)], np.zeros(n_rows, dtype=np.intp)
+    if isinstance(column, np.ndarray):
+        # Binary columns: distinct values from np.unique, decoded to text
+        if column.dtype.kind in "iuf":
+            column = column != 0
+        distinct, codes = np.unique(column, return_inverse=True)
+        distinct = [value.decode() if isinstance(value, bytes) else str(value)
+                    for value in distinct.tolist()]
+        codes = codes.reshape(-1)
+    else:
+        index = {}
+        codes = np.array([index.setdefault(value, len(index)) for value in column],
+                         dtype=np.intp)
+        distinct = list(index)
+    categories = []
+    remap = np.empty(len(distinct), dtype=np.intp)
+    for i, value in enumerate(distinct):
+        value = category(normalize(value))
+        if value not in categories:
+            categories.append(value)
+        remap[i] = categories.index(value)
+    return categories, remap[codes]
+
+
+def _recode(categorical, members):
+    """Translate ``(categories, codes)`` into codes indexing ``members``."""
+    categories, codes = categorical
+    lookup = np.array([members.index(value) for value in categories], dtype=np.intp)
+    return lookup[codes]
+
+
+def _groups(categories, codes):
+    """Yield ``(category, mask)`` for every category present in ``codes``."""
+    for code, value in enumerate(categories):
+        mask = codes == code
+        if mask.any():
+            yield value, mask
@@ -0,0 +1,136 @@
+"""Internal output and scratch buffer handling for the ``out=`` API.
+
+Kernels write every intermediate step into either the output array or a
+named scratch buffer from a ``Workspace``. Without ``out=``, a workspace
+allocates fresh buffers like plain NumPy expressions would. With ``out=``,
+it hands out views of per-thread buffers that are kept between calls, so
+repeated calls on same-sized data allocate nothing once warmed up. Each
+name keeps one buffer that only grows, up to ``_KEEP_BYTES``; larger
+scratch is allocated per call and freed with it.
+"""
+
+import math
+import threading
+import weakref
+
+import numpy as np
+
+# Largest scratch buffer a thread keeps between calls (1 MiB)
+_KEEP_BYTES = 1 << 20
+
+_local = threading.local()
+_all_buffers = weakref.WeakSet()
+
+
+class _Buffers(dict):
+    """One thread's kept scratch buffers by name, weakly registered by identity."""
+
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+
+class Workspace:
+    """Scratch buffers for one kernel call.
+
+    Args:
+        persistent: Reuse this thread's buffers across calls instead of
+            allocating fresh ones.
+    """
+
+    __slots__ = ("_cache",)
+
+    def __init__(self, persistent=False):
+        if not persistent:
+            self._cache = None
+            return
+        try:
+            self._cache = _local.buffers
+        except AttributeError:
+            self._cache = _local.buffers = _Buffers()
+            _all_buffers.add(self._cache)
+
+    def get(self, name, shape, dtype=float):
+        """Scratch buffer ``name``. Names must be unique along a call chain."""
+        if self._cache is None:
+            return np.empty(shape, dtype)
+        size = math.prod(shape)
+        buffer = self._cache.get(name)
+        if buffer is None or buffer.dtype != dtype or buffer.size < size:
+            buffer = np.empty(size, dtype)
+            if buffer.nbytes <= _KEEP_BYTES:
+                self._cache[name] = buffer
+        return buffer[:size].reshape(shape)
+
+
+def clear_buffers():
+    """Free the scratch buffers every thread keeps for ``out=`` calls.
+
+    Buffers up to 1 MiB each are kept per thread, so that repeated ``out=``
+    calls allocate nothing. This drops them; they are allocated again on
+    the next ``out=`` call.
+    """
+    for buffers in list(_all_buffers):
+        buffers.clear()
+
+
+def output(out, shape, dtype=float):
+    """Validate a caller's ``out`` array for a result of ``shape`` and ``dtype``.
+
+    Follows NumPy ufunc rules: the result must broadcast to ``out.shape``
+    and be castable to ``out.dtype`` under "same_kind" casting.
+
+    Args:
+        out: Output array, or None to allocate a fresh one.
+        shape: Broadcast shape of the inputs.
+        dtype: Dtype the result is computed in.
+
+    Returns:
+        ``out``, or a new array of ``shape`` and ``dtype``.
+
+    Raises:
+        TypeError: If ``out`` is not an ndarray or has an incompatible dtype.
+        ValueError: If ``out`` has an incompatible shape or is read-only.
+    """
+    if out is None:
+        return np.empty(shape, dtype)
+    if not isinstance(out, np.ndarray):
+        raise TypeError(f"out must be a numpy array, not {type(out).__name__}")
+    try:
+        compatible = np.broadcast_shapes(shape, out.shape) == out.shape
+    except ValueError:
+        compatible = False
+    if not compatible:
+        raise ValueError(f"out has shape {out.shape}, which the result shape "
+                         f"{tuple(shape)} does not broadcast to")
+    if not np.can_cast(dtype, out.dtype, "same_kind"):
+        raise TypeError(f"Cannot cast {np.dtype(dtype)} results to out dtype {out.dtype} "
+                        f"with casting rule 'same_kind'")
+    if not out.flags.writeable:
+        raise ValueError("out array is read-only")
+    return out
+
+
+def target(out, shape, ws, dtype=float):
+    """Buffer a kernel should compute into: ``out`` itself if its dtype
+    matches, otherwise workspace scratch to be cast by ``finish``."""
+    out = output(out, shape, dtype)
+    if out.dtype == dtype:
+        return out
+    return ws.get("result", out.shape, dtype)
+
+
+def finish(out, result):
+    """Copy ``result`` into ``out`` if they differ, and return the final value.
+
+    Without ``out``, 0-d results come back as NumPy scalars, as from a
+    NumPy expression.
+    """
+    if out is None:
+        return result[()] if result.ndim == 0 else result
+    if result is not out:
+        np.copyto(out, result, casting="same_kind")
+    return out
+
+
+def result_shape(*values):
+    return np.broadcast_shapes(*(np.shape(value) for value in values))
@@ -0,0 +1,123 @@
+"""Internal vectorized CSV formatting.
+
+Every column of a block is formatted into a byte matrix with one row per
+value, padded with NUL bytes. Placing the matrices side by side with
+separator columns and dropping the NULs gives the CSV text of the whole
+block, without a Python object per row or per value.
+
+Floats are formatted exactly like ``f"{value:.{decimals}f}"``: digits come
+from the value scaled to an integer, and the few values whose rounding is
+in doubt (within a few ulps of a tie, beyond 2**53, NaN, infinity) are
+formatted by Python, as is every value when there are more decimals than
+the integer digits can hold.
+"""
+
+import numpy as np
+
+_COMMA = ord(",")
+_QUOTE_CHARS = (b",", b'"', b"\r", b"\n")
+
+# Most decimals whose scale factor 10 ** decimals fits in an int64
+_MAX_INT_DECIMALS = 18
+
+
+def format_fixed(values, decimals=4):
+    """Format floats like ``f"{value:.{decimals}f}"``.
+
+    Args:
+        values: Float array (any shape; flattened).
+        decimals: Digits after the decimal point.
+
+    Returns:
+        List of str, one per value.
+    """
+    text = csv_bytes([fixed_field(values, decimals)], lineterminator=b"\n")
+    return text.decode().split("\n")[:-1]
+
+
+def fixed_field(values, decimals=4):
+    """Byte matrix of floats formatted with ``decimals`` digits, right-aligned."""
+    values = np.asarray(values, dtype=np.float64).reshape(-1)
+    if decimals > _MAX_INT_DECIMALS:
+        texts = [f"{value:.{decimals}f}".encode() for value in values.tolist()]
+        field = np.zeros((values.size, max([1] + [len(text) for text in texts])), np.uint8)
+        for row, text in zip(field, texts):
+            row[row.size - len(text):] = np.frombuffer(text, np.uint8)
+        return field
+    with np.errstate(over="ignore", invalid="ignore"):
+        scaled = np.abs(values) * 10.0 ** decimals
+        # Scaling rounds by at most half an ulp, so rounding to an integer
+        # can only differ from the exact decimal rounding close to a tie
+        exact = ((np.abs(scaled - np.floor(scaled) - 0.5) > scaled * 2.0 ** -50)
+                 & (scaled < 2.0 ** 53))
+    n = np.where(exact, np.rint(scaled), 0.0).astype(np.int64)
+    whole, frac = np.divmod(n, 10 ** decimals)
+
+    int_width = len(str(int(whole.max()))) if whole.size else 1
+    n_digits = np.ones(whole.shape, np.int64)
+    for k in range(1, int_width):
+        n_digits += whole >= 10 ** k
+    point = decimals + 1 if decimals else 0
+
+    fallback = np.flatnonzero(~exact)
+    texts = [f"{value:.{decimals}f}".encode() for value in values[fallback].tolist()]
+    width = max([1 + int_width + point] + [len(text) for text in texts])
+
+    field = np.zeros((values.size, width), np.uint8)
+    col = width - 1
+    for _ in range(decimals):
+        frac, digit = np.divmod(frac, 10)
+        field[:, col] = digit + 48
+        col -= 1
+    if decimals:
+        field[:, col] = ord(".")
+        col -= 1
+    for k in range(int_width):
+        whole, digit = np.divmod(whole, 10)
+        field[:, col] = np.where(n_digits > k, digit + 48, 0)
+        col -= 1
+    # Python keeps the sign of negative values that round to zero
+    negative = np.flatnonzero(np.signbit(values) & exact)
+    field[negative, width - 1 - point - n_digits[negative]] = ord("-")
+
+    for i, text in zip(fallback.tolist(), texts):
+        field[i] = 0
+        field[i, width - len(text):] = np.frombuffer(text, np.uint8)
+    return field
+
+
+def text_field(values):
+    """Byte matrix of string values, quoted where CSV needs it."""
+    values = np.asarray(values).reshape(-1)
+    if values.dtype == bool:
+        values = np.where(values, b"True", b"False")
+    elif values.dtype.kind == "U":
+        try:
+            values = values.astype("S")
+        except UnicodeEncodeError:
+            values = np.char.encode(values, "utf-8")
+    elif values.dtype.kind != "S":
+        values = values.astype("S")
+    quote = np.zeros(values.shape, bool)
+    for char in _QUOTE_CHARS:
+        quote |= np.char.find(values, char) >= 0
+    if quote.any():
+        quoted = [b'"' + value.replace(b'"', b'""') + b'"' for value in values[quote].tolist()]
+        width = max(values.dtype.itemsize, max(len(value) for value in quoted))
+        values = values.astype(f"S{width}")
+        values[quote] = quoted
+    width = max(values.dtype.itemsize, 1)
+    return values.astype(f"S{width}").view(np.uint8).reshape(values.size, width)
+
+
+def csv_bytes(fields, lineterminator=b"\r\n"):
+    """CSV text of a block from the byte matrices of its columns."""
+    n_rows = fields[0].shape[0] if fields else 0
+    parts = []
+    for i, field in enumerate(fields):
+        if i:
+            parts.append(np.full((n_rows, 1), _COMMA, np.uint8))
+        parts.append(field)
+    parts.append(np.tile(np.frombuffer(lineterminator, np.uint8), (n_rows, 1)))
+    block = np.concatenate(parts, axis=1)
+    return block[block != 0].tobytes()
@@ -0,0 +1,154 @@
+"""Internal numba kernels, imported only when the numba backend is selected.
+
+The pure-Python formulas in ``_scalar`` are recompiled with numba as they
+are and wrapped in NumPy ufuncs, so each kernel is a single loop that
+broadcasts its inputs and allocates nothing but its output. Compound
+kernels evaluate the atmosphere ratios inline, element by element.
+"""
+
+import types
+
+import numba
+
+from . import _scalar
+from ._atmos import _TEMP_SCALES
+from .units import TemperatureUnit
+
+# _scalar functions compiled for use inside the kernels
+_COMPILED = (
+    "layer", "isa_at", "theta_at", "delta", "_theta_from_isa", "_common_kcas_term",
+    "kcas_to_keas", "kcas_to_mach", "kcas_to_ktas",
+    "keas_to_kcas", "keas_to_mach", "keas_to_ktas",
+    "ktas_to_kcas", "ktas_to_keas", "ktas_to_mach",
+    "mach_to_kcas", "mach_to_keas", "mach_to_ktas",
+)
+
+# Speed kernels by the ratios they take after the value
+_BY_DELTA = ("kcas_to_keas", "kcas_to_mach", "keas_to_kcas", "keas_to_mach",
+             "mach_to_kcas", "mach_to_keas")
+_BY_THETA_DELTA = ("kcas_to_ktas", "ktas_to_kcas")
+_BY_SIGMA = ("keas_to_ktas", "ktas_to_keas")
+_BY_THETA = ("ktas_to_mach", "mach_to_ktas")
+
+_F8_1 = ["float64(float64)"]
+_F8_2 = ["float64(float64, float64)"]
+_F8_3 = ["float64(float64, float64, float64)"]
+
+
+class Kernels:
+    """Compiled ufuncs for one numba target ("cpu" or "parallel").
+
+    Attributes are ``delta(hp)``, and for every speed kernel name both the
+    ratio-level ufunc (``kcas_to_keas(kcas, d)``) and the fused
+    altitude-level ufunc (``kcas_to_keas_at(kcas, hp_ft[, disa_c])``). The
+    layer tables of a temperature unit are compiled into its ``isa(unit)``
+    ufunc (``(hp)``) and ``theta(unit)`` ufunc (``(hp, disa)``) on first use.
+    """
+
+    def __init__(self, target):
+        jit = _compile_scalar_module()
+        self._jit = jit
+        self._target = target
+        self._by_unit = {}
+
+        def vectorize(signatures):
+            return numba.vectorize(signatures, target=target)
+
+        self.delta = vectorize(["float64(float64)"])(jit["delta"].py_func)
+
+        theta_at = jit["theta_at"]
+        delta = jit["delta"]
+
+        for name in _BY_DELTA:
+            setattr(self, name, vectorize(_F8_2)(jit[name].py_func))
+            setattr(self, name + "_at", vectorize(_F8_2)(_fuse_delta(jit[name], delta)))
+        for name in _BY_THETA_DELTA:
+            setattr(self, name, vectorize(_F8_3)(jit[name].py_func))
+            setattr(self, name + "_at",
+                    vectorize(_F8_3)(_fuse_theta_delta(jit[name], theta_at, delta)))
+        for name in _BY_SIGMA:
+            setattr(self, name, vectorize(_F8_2)(jit[name].py_func))
+            setattr(self, name + "_at",
+                    vectorize(_F8_3)(_fuse_sigma(jit[name], theta_at, delta)))
+        for name in _BY_THETA:
+            setattr(self, name, vectorize(_F8_2)(jit[name].py_func))
+            setattr(self, name + "_at", vectorize(_F8_3)(_fuse_theta(jit[name], theta_at)))
+
+    def isa(self, temp_unit):
+        """ISA temperature ufunc ``(hp_ft)`` for one temperature unit."""
+        return self._unit_kernel("isa", temp_unit)
+
+    def theta(self, temp_unit):
+        """Temperature ratio ufunc ``(hp_ft, delta_isa)`` for one temperature unit."""
+        return self._unit_kernel("theta", temp_unit)
+
+    def _unit_kernel(self, name, temp_unit):
+        key = (name, TemperatureUnit(temp_unit))
+        kernel = self._by_unit.get(key)
+        if kernel is None:
+            temps, lapses, offset, sl_abs = _TEMP_SCALES[key[1]]
+            if name == "isa":
+                isa_at = self._jit["isa_at"]
+
+                def func(hp_ft):
+                    return isa_at(hp_ft, temps, lapses)
+                signature = _F8_1
+            else:
+                theta_at = self._jit["theta_at"]
+
+                def func(hp_ft, delta_isa):
+                    return theta_at(hp_ft, delta_isa, temps, lapses, offset, sl_abs)
+                signature = _F8_2
+            kernel = self._by_unit[key] = numba.vectorize(signature, target=self._target)(func)
+        return kernel
+
+
+def _compile_scalar_module():
+    """Compile the ``_COMPILED`` functions of ``_scalar`` with numba.
+
+    Each function is rebuilt over a copy of the module namespace in which
+    its helpers are already jitted, so calls between them compile too.
+    """
+    namespace = dict(vars(_scalar))
+    compiled = {}
+    for name in _COMPILED:
+        func = getattr(_scalar, name)
+        rebuilt = types.FunctionType(func.__code__, namespace, name, func.__defaults__)
+        compiled[name] = namespace[name] = numba.njit(rebuilt)
+    return compiled
+
+
+# Celsius scales of theta_at, as used by the speed kernels
+_C_SCALES = _TEMP_SCALES[TemperatureUnit.C]
+
+
+def _fuse_delta(kernel, delta):
+    def fused(value, hp_ft):
+        return kernel(value, delta(hp_ft))
+    return fused
+
+
+def _fuse_theta(kernel, theta_at):
+    temps, lapses, offset, sl_abs = _C_SCALES
+
+    def fused(value, hp_ft, disa_c):
+        return kernel(value, theta_at(hp_ft, disa_c, temps, lapses, offset, sl_abs))
+    return fused
+
+
+def _fuse_theta_delta(kernel, theta_at, delta):
+    temps, lapses, offset, sl_abs = _C_SCALES
+
+    def fused(value, hp_ft, disa_c):
+        t = theta_at(hp_ft, disa_c, temps, lapses, offset, sl_abs)
+        return kernel(value, t, delta(hp_ft))
+    return fused
+
+
+def _fuse_sigma(kernel, theta_at, delta):
+    temps, lapses, offset, sl_abs = _C_SCALES
+
+    def fused(value, hp_ft, disa_c):
+        t = theta_at(hp_ft, disa_c, temps, lapses, offset, sl_abs)
+        return kernel(value, delta(hp_ft) / t)
+    return fused
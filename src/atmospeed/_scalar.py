@@ -0,0 +1,212 @@
+"""Internal pure-Python scalar fast path.
+
+Single-point calls skip NumPy entirely: the same formulas as ``_atmos`` and
+``_speed_conv``, evaluated with ``math`` on Python floats, in the same
+operation order so results agree with the array path to within an ulp.
+Public functions check ``is_scalar`` up front and route here.
+
+The ``*_at`` functions and the speed kernels use only floats and ``math``,
+so the numba backend compiles them as they are.
+"""
+
+import math
+
+import numpy as np
+
+from ._atmos import (
+    _DELTA_BASES,
+    _DELTA_EXPONENTS,
+    _DELTA_ROOTS,
+    _ISOTHERMAL,
+    _LAPSES_PER_FT_C,
+    _LAYER_BASES_FT,
+    _LAYER_BOUNDS_FT,
+    _SCALE_HEIGHTS_FT,
+    _SIGMA_BASES,
+    _SIGMA_ROOTS,
+    _TEMP_SCALES,
+    _TEMPS_C,
+    _TEMPS_K,
+    TOP_ERROR,
+)
+from .constants import A0_KTS, HEIGHT_TOP_FT, SPEED_CALC_CONST, ZERO_C_IN_K
+from .convert import length_to_feet
+from .units import TemperatureUnit
+
+_SCALAR_TYPES = frozenset((float, int, np.float64))
+
+
+def is_scalar(*values):
+    """True if every value is a Python or NumPy float, or a Python int."""
+    return all(type(value) in _SCALAR_TYPES for value in values)
+
+
+def altitude_ft(hp, alt_unit="ft"):
+    """Convert a scalar pressure altitude to feet and validate it."""
+    if alt_unit != "ft":
+        hp = length_to_feet(hp, alt_unit)
+    if hp > HEIGHT_TOP_FT:
+        raise ValueError(TOP_ERROR)
+    return float(hp)
+
+
+def temp_scales(temp_unit):
+    """``_TEMP_SCALES`` entry for a unit given as a string or enum."""
+    scales = _TEMP_SCALES.get(temp_unit)
+    if scales is None:
+        scales = _TEMP_SCALES[TemperatureUnit(temp_unit)]
+    return scales
+
+
+def isa(hp_ft, temp_unit="C"):
+    """ISA temperature in ``temp_unit`` for a validated altitude in feet."""
+    temps, lapses, _, _ = temp_scales(temp_unit)
+    return isa_at(hp_ft, temps, lapses)
+
+
+def theta(hp_ft, delta_isa=0, temp_unit="C"):
+    """Temperature ratio for a validated altitude in feet."""
+    return theta_at(hp_ft, delta_isa, *temp_scales(temp_unit))
+
+
+def state(hp_ft, delta_isa=0, temp_unit="C"):
+    """ISA temperature, theta, delta and sigma for a validated altitude in feet."""
+    return state_at(hp_ft, delta_isa, *temp_scales(temp_unit))
+
+
+def layer(hp_ft):
+    """Index of the 1976 layer of an altitude in feet (the lower one on a base)."""
+    for i, bound in enumerate(_LAYER_BOUNDS_FT):
+        if hp_ft <= bound:
+            return i
+    return len(_LAYER_BOUNDS_FT)
+
+
+def isa_at(hp_ft, temps, lapses):
+    """ISA temperature for the layer table of one ``_TEMP_SCALES`` entry."""
+    i = layer(hp_ft)
+    return temps[i] - hp_ft * lapses[i]
+
+
+def theta_at(hp_ft, delta_isa, temps, lapses, offset, sl_abs):
+    """Temperature ratio for the scales of one ``_TEMP_SCALES`` entry."""
+    return _theta_from_isa(isa_at(hp_ft, temps, lapses), delta_isa, offset, sl_abs)
+
+
+def state_at(hp_ft, delta_isa, temps, lapses, offset, sl_abs):
+    """``state`` for the scales of one ``_TEMP_SCALES`` entry."""
+    isa_t = isa_at(hp_ft, temps, lapses)
+    theta_t = _theta_from_isa(isa_t, delta_isa, offset, sl_abs)
+    delta_ = delta(hp_ft)
+    return isa_t, theta_t, delta_, delta_ / theta_t
+
+
+def delta(hp_ft):
+    """Pressure ratio for a validated altitude in feet."""
+    i = layer(hp_ft)
+    if _ISOTHERMAL[i]:
+        return _DELTA_BASES[i] * math.exp((_LAYER_BASES_FT[i] - hp_ft) / _SCALE_HEIGHTS_FT[i])
+    isa_k = _TEMPS_C[i] - hp_ft * _LAPSES_PER_FT_C[i] + ZERO_C_IN_K
+    return math.pow(isa_k / _TEMPS_K[i], _DELTA_EXPONENTS[i]) * _DELTA_BASES[i]
+
+
+def hp_from_delta(delta_):
+    """Pressure altitude in feet for a positive pressure ratio."""
+    return _ratio_hp(delta_, _DELTA_BASES, _DELTA_ROOTS)
+
+
+def hd_from_sigma(sigma_):
+    """Density altitude in feet for a positive density ratio."""
+    return _ratio_hp(sigma_, _SIGMA_BASES, _SIGMA_ROOTS)
+
+
+def _ratio_hp(ratio, bases, roots):
+    # Ratios fall with altitude: the layer is the last whose base ratio is above
+    i = 0
+    while i + 1 < len(bases) and ratio < bases[i + 1]:
+        i += 1
+    if _ISOTHERMAL[i]:
+        return _LAYER_BASES_FT[i] - _SCALE_HEIGHTS_FT[i] * math.log(ratio / bases[i])
+    isa_c = math.pow(ratio / bases[i], roots[i]) * _TEMPS_K[i] - ZERO_C_IN_K
+    return (_TEMPS_C[i] - isa_c) / _LAPSES_PER_FT_C[i]
+
+
+def _theta_from_isa(temp, delta_isa, offset, sl_abs):
+    if delta_isa != 0:
+        temp = temp + delta_isa
+    if offset:
+        temp = temp + offset
+    return temp / sl_abs
+
+
+# --- Speed kernels: knots in and out, ratios precomputed ---
+
+def _common_kcas_term(kcas, d):
+    term1 = 1.0 + 0.2 * math.pow(kcas / A0_KTS, 2)
+    term2 = math.pow(term1, 3.5) - 1.0
+    term3 = (1.0 / d) * term2 + 1.0
+    return math.pow(term3, 1.0 / 3.5) - 1.0
+
+
+def kcas_to_keas(kcas, d):
+    return SPEED_CALC_CONST * math.sqrt(d * _common_kcas_term(kcas, d))
+
+
+def kcas_to_mach(kcas, d):
+    return math.sqrt(5.0 * _common_kcas_term(kcas, d))
+
+
+def kcas_to_ktas(kcas, t, d):
+    return SPEED_CALC_CONST * math.sqrt(t * _common_kcas_term(kcas, d))
+
+
+def keas_to_kcas(keas, d):
+    term1 = 1.0 + (1.0 / d) * math.pow(keas / SPEED_CALC_CONST, 2)
+    term2 = math.pow(term1, 3.5) - 1.0
+    term3 = d * term2 + 1.0
+    return SPEED_CALC_CONST * math.sqrt(math.pow(term3, 1.0 / 3.5) - 1.0)
+
+
+def keas_to_mach(keas, d):
+    return keas / A0_KTS * math.sqrt(1.0 / d)
+
+
+def keas_to_ktas(keas, s):
+    return keas / math.sqrt(s)
+
+
+def ktas_to_kcas(ktas, t, d):
+    term1 = 1.0 + (1.0 / t) * math.pow(ktas / SPEED_CALC_CONST, 2)
+    term2 = math.pow(term1, 3.5) - 1.0
+    term3 = d * term2 + 1.0
+    return SPEED_CALC_CONST * math.sqrt(math.pow(term3, 1.0 / 3.5) - 1.0)
+
+
+def ktas_to_keas(ktas, s):
+    return ktas * math.sqrt(s)
+
+
+def ktas_to_mach(ktas, t):
+    return ktas / (A0_KTS * math.sqrt(t))
+
+
+def crossover_delta(kcas, mach):
+    """Pressure ratio at which ``mach`` and ``kcas`` are the same speed."""
+    cas_term = math.pow(math.pow(kcas / SPEED_CALC_CONST, 2) + 1.0, 3.5) - 1.0
+    mach_term = math.pow(0.2 * mach * mach + 1.0, 3.5) - 1.0
+    return cas_term / mach_term
+
+
+def mach_to_kcas(mach, d):
+    term1 = math.pow(0.2 * mach * mach + 1.0, 3.5) - 1.0
+    term2 = d * term1 + 1.0
+    term3 = math.pow(term2, 1.0 / 3.5) - 1.0
+    return SPEED_CALC_CONST * math.sqrt(term3)
+
+
+def mach_to_keas(mach, d):
+    return A0_KTS * mach * math.sqrt(d)
+
+
+def mach_to_ktas(mach, t):
+    return A0_KTS * mach * math.sqrt(t)
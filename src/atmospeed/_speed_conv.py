@@ -1,94 +1,366 @@
 """Internal speed conversion functions. All operate in knots (KCAS/KEAS/KTAS),
-feet (hp), and Celsius (delta ISA). Accept scalars or numpy arrays."""
+feet (hp), and Celsius (delta ISA). Accept scalars or numpy arrays.
+
+Atmosphere ratios come from the fused ``_atmos`` kernel, computed once per
+call even where a conversion needs several of them. The underscored
+variants take the ratios directly (theta ``t``, delta ``d``, sigma ``s``),
+so callers holding a precomputed atmospheric state skip the ratio chain.
+They evaluate their formula step by step in place, into ``out`` and
+workspace scratch, in the same operation order as the formula shown.
+Scalar inputs take the pure-Python path in ``_scalar``, and a numba backend
+replaces the array path with fused compiled kernels. Where ``math`` raises
+for a scalar outside its domain (an OAT below absolute zero, an overflow),
+the call falls back to the array path, which gives NaN or inf as it would
+for an array of the same values."""
 
 import numpy as np
 
+from . import _atmos, _buffers, _scalar
+from . import backend as _backend
+from . import precision as _precision
 from .constants import A0_KTS, SPEED_CALC_CONST
-from .ratio import delta as calc_delta
-from .ratio import sigma as calc_sigma
-from .ratio import theta as calc_theta
+from .profiling import instrument
 
 
-# --- From KCAS ---
+def _convert(kernel, ratios, value, hp_ft, disa_c, out):
+    """Evaluate ``kernel`` at altitude, computing the ``ratios`` it takes first.
+
+    With ``out``, every buffer comes from this thread's persistent
+    workspace, so repeated calls on same-shaped inputs allocate nothing.
+    """
+    ws = _buffers.Workspace(persistent=out is not None)
+    hp_ft = _atmos.altitude_ft(hp_ft, ws=ws)
+    value = _precision.as_float(value)
+    if disa_c is None:
+        args = (hp_ft,)
+    else:
+        args = (hp_ft, disa_c if _scalar.is_scalar(disa_c) else _precision.as_float(disa_c))
+    result = _buffers.target(out, _buffers.result_shape(value, *args), ws, hp_ft.dtype)
+
+    nb = _backend.kernels()
+    if nb is not None:
+        getattr(nb, kernel.__name__.lstrip("_") + "_at")(value, *args, out=result)
+    else:
+        kernel(value, *_ratios(ratios, hp_ft, disa_c, ws), out=result, ws=ws)
+    return _buffers.finish(out, result)
 
-def _common_kcas_term(kcas, hp_ft):
-    d = calc_delta(hp_ft, alt_unit="ft")
-    term1 = 1.0 + 0.2 * np.power(kcas / A0_KTS, 2)
-    term2 = np.power(term1, 3.5) - 1.0
-    term3 = (1.0 / d) * term2 + 1.0
-    return np.power(term3, 1.0 / 3.5) - 1.0
 
+def _ratios(names, hp_ft, disa_c, ws):
+    shape = _buffers.result_shape(hp_ft, disa_c)
+    if names == ("delta",):
+        return (_atmos.delta(hp_ft, ws.get("speed.delta", hp_ft.shape, hp_ft.dtype), ws),)
+    if names == ("theta",):
+        theta = ws.get("speed.theta", shape, hp_ft.dtype)
+        return (_atmos.theta(hp_ft, disa_c, out=theta, ws=ws),)
+    state = _atmos.state(hp_ft, disa_c, out=ws.get("speed.sigma", shape, hp_ft.dtype), ws=ws)
+    return tuple(getattr(state, name) for name in names)
 
-def kcas_to_keas(kcas, hp_ft):
-    d = calc_delta(hp_ft, alt_unit="ft")
-    return SPEED_CALC_CONST * np.sqrt(d * _common_kcas_term(kcas, hp_ft))
 
+def _prepare(out, ws, *values):
+    """Output array and workspace for a ratio-level kernel.
 
-def kcas_to_mach(kcas, hp_ft):
-    return np.sqrt(5.0 * _common_kcas_term(kcas, hp_ft))
+    A new output takes the promoted dtype of the inputs, so float32 inputs
+    give a float32 result.
+    """
+    if out is None:
+        out = np.empty(_buffers.result_shape(*values), np.result_type(*values, 1.0))
+    return out, ws or _buffers.Workspace()
 
 
-def kcas_to_ktas(kcas, hp_ft, disa_c):
-    t = calc_theta(hp_ft, delta_isa=disa_c, alt_unit="ft", temp_unit="C")
-    return SPEED_CALC_CONST * np.sqrt(t * _common_kcas_term(kcas, hp_ft))
+def _scratch(ws, name, like):
+    """Workspace buffer shaped like ratio ``like``, in its float dtype."""
+    return ws.get(name, np.shape(like), np.result_type(like, 1.0))
+
+
+# --- From KCAS ---
+
+def _common_kcas_term(kcas, d, out, ws):
+    # ((1/d) * ((1 + 0.2 * (kcas/a0)**2)**3.5 - 1) + 1)**(1/3.5) - 1
+    np.divide(kcas, A0_KTS, out=out)
+    np.power(out, 2, out=out)
+    np.multiply(0.2, out, out=out)
+    _pow_minus_one(out, 3.5)
+    inv_d = np.divide(1.0, d, out=_scratch(ws, "speed.inv_ratio", d))
+    np.multiply(inv_d, out, out=out)
+    return _pow_minus_one(out, 1.0 / 3.5)
+
+
+@instrument
+def kcas_to_keas(kcas, hp_ft, out=None):
+    if out is None and _scalar.is_scalar(kcas, hp_ft):
+        try:
+            return _scalar.kcas_to_keas(kcas, _scalar.delta(_scalar.altitude_ft(hp_ft)))
+        except (ValueError, ArithmeticError):
+            pass
+    return _convert(_kcas_to_keas, ("delta",), kcas, hp_ft, None, out)
+
+
+def _kcas_to_keas(kcas, d, out=None, ws=None):
+    # C * sqrt(d * common)
+    out, ws = _prepare(out, ws, kcas, d)
+    _common_kcas_term(kcas, d, out, ws)
+    np.multiply(d, out, out=out)
+    np.sqrt(out, out=out)
+    return np.multiply(SPEED_CALC_CONST, out, out=out)
+
+
+@instrument
+def kcas_to_mach(kcas, hp_ft, out=None):
+    if out is None and _scalar.is_scalar(kcas, hp_ft):
+        try:
+            return _scalar.kcas_to_mach(kcas, _scalar.delta(_scalar.altitude_ft(hp_ft)))
+        except (ValueError, ArithmeticError):
+            pass
+    return _convert(_kcas_to_mach, ("delta",), kcas, hp_ft, None, out)
+
+
+def _kcas_to_mach(kcas, d, out=None, ws=None):
+    # sqrt(5 * common)
+    out, ws = _prepare(out, ws, kcas, d)
+    _common_kcas_term(kcas, d, out, ws)
+    np.multiply(5.0, out, out=out)
+    return np.sqrt(out, out=out)
+
+
+@instrument
+def kcas_to_ktas(kcas, hp_ft, disa_c, out=None):
+    if out is None and _scalar.is_scalar(kcas, hp_ft, disa_c):
+        try:
+            _, t, d, s = _scalar.state(_scalar.altitude_ft(hp_ft), disa_c)
+            return _scalar.kcas_to_ktas(kcas, t, d)
+        except (ValueError, ArithmeticError):
+            pass
+    return _convert(_kcas_to_ktas, ("theta", "delta"), kcas, hp_ft, disa_c, out)
+
+
+def _kcas_to_ktas(kcas, t, d, out=None, ws=None):
+    # C * sqrt(t * common)
+    out, ws = _prepare(out, ws, kcas, t, d)
+    _common_kcas_term(kcas, d, out, ws)
+    np.multiply(t, out, out=out)
+    np.sqrt(out, out=out)
+    return np.multiply(SPEED_CALC_CONST, out, out=out)
 
 
 # --- From KEAS ---
 
-def keas_to_kcas(keas, hp_ft):
-    d = calc_delta(hp_ft, alt_unit="ft")
-    term1 = 1.0 + (1.0 / d) * np.power(keas / SPEED_CALC_CONST, 2)
-    term2 = np.power(term1, 3.5) - 1.0
-    term3 = d * term2 + 1.0
-    return SPEED_CALC_CONST * np.sqrt(np.power(term3, 1.0 / 3.5) - 1.0)
+@instrument
+def keas_to_kcas(keas, hp_ft, out=None):
+    if out is None and _scalar.is_scalar(keas, hp_ft):
+        try:
+            return _scalar.keas_to_kcas(keas, _scalar.delta(_scalar.altitude_ft(hp_ft)))
+        except (ValueError, ArithmeticError):
+            pass
+    return _convert(_keas_to_kcas, ("delta",), keas, hp_ft, None, out)
+
+
+def _keas_to_kcas(keas, d, out=None, ws=None):
+    # C * sqrt((d * ((1 + (1/d) * (keas/C)**2)**3.5 - 1) + 1)**(1/3.5) - 1)
+    out, ws = _prepare(out, ws, keas, d)
+    return _impact_to_kcas(keas, d, d, out, ws)
 
 
-def keas_to_mach(keas, hp_ft):
-    d = calc_delta(hp_ft, alt_unit="ft")
-    return keas / A0_KTS * np.sqrt(1.0 / d)
+@instrument
+def keas_to_mach(keas, hp_ft, out=None):
+    if out is None and _scalar.is_scalar(keas, hp_ft):
+        try:
+            return _scalar.keas_to_mach(keas, _scalar.delta(_scalar.altitude_ft(hp_ft)))
+        except (ValueError, ArithmeticError):
+            pass
+    return _convert(_keas_to_mach, ("delta",), keas, hp_ft, None, out)
 
 
-def keas_to_ktas(keas, hp_ft, disa_c):
-    s = calc_sigma(hp_ft, delta_isa=disa_c, alt_unit="ft", temp_unit="C")
-    return keas / np.sqrt(s)
+def _keas_to_mach(keas, d, out=None, ws=None):
+    # keas / a0 * sqrt(1/d)
+    out, ws = _prepare(out, ws, keas, d)
+    np.divide(keas, A0_KTS, out=out)
+    root = np.divide(1.0, d, out=_scratch(ws, "speed.inv_ratio", d))
+    np.sqrt(root, out=root)
+    return np.multiply(out, root, out=out)
+
+
+@instrument
+def keas_to_ktas(keas, hp_ft, disa_c, out=None):
+    if out is None and _scalar.is_scalar(keas, hp_ft, disa_c):
+        try:
+            _, t, d, s = _scalar.state(_scalar.altitude_ft(hp_ft), disa_c)
+            return _scalar.keas_to_ktas(keas, s)
+        except (ValueError, ArithmeticError):
+            pass
+    return _convert(_keas_to_ktas, ("sigma",), keas, hp_ft, disa_c, out)
+
+
+def _keas_to_ktas(keas, s, out=None, ws=None):
+    # keas / sqrt(s)
+    out, ws = _prepare(out, ws, keas, s)
+    root = np.sqrt(s, out=_scratch(ws, "speed.root_ratio", s))
+    return np.divide(keas, root, out=out)
 
 
 # --- From KTAS ---
 
-def ktas_to_kcas(ktas, hp_ft, disa_c):
-    t = calc_theta(hp_ft, delta_isa=disa_c, alt_unit="ft", temp_unit="C")
-    term1 = 1.0 + (1.0 / t) * np.power(ktas / SPEED_CALC_CONST, 2)
-    term2 = np.power(term1, 3.5) - 1.0
-    d = calc_delta(hp_ft, alt_unit="ft")
-    term3 = d * term2 + 1.0
-    return SPEED_CALC_CONST * np.sqrt(np.power(term3, 1.0 / 3.5) - 1.0)
+@instrument
+def ktas_to_kcas(ktas, hp_ft, disa_c, out=None):
+    if out is None and _scalar.is_scalar(ktas, hp_ft, disa_c):
+        try:
+            _, t, d, s = _scalar.state(_scalar.altitude_ft(hp_ft), disa_c)
+            return _scalar.ktas_to_kcas(ktas, t, d)
+        except (ValueError, ArithmeticError):
+            pass
+    return _convert(_ktas_to_kcas, ("theta", "delta"), ktas, hp_ft, disa_c, out)
 
 
-def ktas_to_keas(ktas, hp_ft, disa_c):
-    s = calc_sigma(hp_ft, delta_isa=disa_c, alt_unit="ft", temp_unit="C")
-    return ktas * np.sqrt(s)
+def _ktas_to_kcas(ktas, t, d, out=None, ws=None):
+    # C * sqrt((d * ((1 + (1/t) * (ktas/C)**2)**3.5 - 1) + 1)**(1/3.5) - 1)
+    out, ws = _prepare(out, ws, ktas, t, d)
+    return _impact_to_kcas(ktas, t, d, out, ws)
 
 
-def ktas_to_mach(ktas, hp_ft, disa_c):
-    t = calc_theta(hp_ft, delta_isa=disa_c, alt_unit="ft", temp_unit="C")
-    return ktas / (A0_KTS * np.sqrt(t))
+@instrument
+def ktas_to_keas(ktas, hp_ft, disa_c, out=None):
+    if out is None and _scalar.is_scalar(ktas, hp_ft, disa_c):
+        try:
+            _, t, d, s = _scalar.state(_scalar.altitude_ft(hp_ft), disa_c)
+            return _scalar.ktas_to_keas(ktas, s)
+        except (ValueError, ArithmeticError):
+            pass
+    return _convert(_ktas_to_keas, ("sigma",), ktas, hp_ft, disa_c, out)
 
 
-# --- From Mach ---
+def _ktas_to_keas(ktas, s, out=None, ws=None):
+    # ktas * sqrt(s)
+    out, ws = _prepare(out, ws, ktas, s)
+    root = np.sqrt(s, out=_scratch(ws, "speed.root_ratio", s))
+    return np.multiply(ktas, root, out=out)
+
 
-def mach_to_kcas(mach, hp_ft):
-    term1 = np.power(0.2 * mach * mach + 1.0, 3.5) - 1.0
-    d = calc_delta(hp_ft, alt_unit="ft")
-    term2 = d * term1 + 1.0
-    term3 = np.power(term2, 1.0 / 3.5) - 1.0
-    return SPEED_CALC_CONST * np.sqrt(term3)
+@instrument
+def ktas_to_mach(ktas, hp_ft, disa_c, out=None):
+    if out is None and _scalar.is_scalar(ktas, hp_ft, disa_c):
+        try:
+            return _scalar.ktas_to_mach(ktas, _scalar.theta(_scalar.altitude_ft(hp_ft), disa_c))
+        except (ValueError, ArithmeticError):
+            pass
+    return _convert(_ktas_to_mach, ("theta",), ktas, hp_ft, disa_c, out)
 
 
-def mach_to_keas(mach, hp_ft):
-    d = calc_delta(hp_ft, alt_unit="ft")
-    return A0_KTS * mach * np.sqrt(d)
+def _ktas_to_mach(ktas, t, out=None, ws=None):
+    # ktas / (a0 * sqrt(t))
+    out, ws = _prepare(out, ws, ktas, t)
+    a = np.sqrt(t, out=_scratch(ws, "speed.root_ratio", t))
+    np.multiply(A0_KTS, a, out=a)
+    return np.divide(ktas, a, out=out)
 
 
-def mach_to_ktas(mach, hp_ft, disa_c):
-    t = calc_theta(hp_ft, delta_isa=disa_c, alt_unit="ft", temp_unit="C")
-    return A0_KTS * mach * np.sqrt(t)
+# --- From Mach ---
+
+@instrument
+def mach_to_kcas(mach, hp_ft, out=None):
+    if out is None and _scalar.is_scalar(mach, hp_ft):
+        try:
+            return _scalar.mach_to_kcas(mach, _scalar.delta(_scalar.altitude_ft(hp_ft)))
+        except (ValueError, ArithmeticError):
+            pass
+    return _convert(_mach_to_kcas, ("delta",), mach, hp_ft, None, out)
+
+
+def _mach_to_kcas(mach, d, out=None, ws=None):
+    # C * sqrt((d * ((0.2 * mach * mach + 1)**3.5 - 1) + 1)**(1/3.5) - 1)
+    out, ws = _prepare(out, ws, mach, d)
+    if np.may_share_memory(out, mach):
+        # mach is read twice; keep it intact while out is overwritten
+        copy = _scratch(ws, "speed.value", mach)
+        np.copyto(copy, mach)
+        mach = copy
+    np.multiply(0.2, mach, out=out)
+    np.multiply(out, mach, out=out)
+    return _pitot_to_kcas(d, out)
+
+
+@instrument
+def mach_to_keas(mach, hp_ft, out=None):
+    if out is None and _scalar.is_scalar(mach, hp_ft):
+        try:
+            return _scalar.mach_to_keas(mach, _scalar.delta(_scalar.altitude_ft(hp_ft)))
+        except (ValueError, ArithmeticError):
+            pass
+    return _convert(_mach_to_keas, ("delta",), mach, hp_ft, None, out)
+
+
+def _mach_to_keas(mach, d, out=None, ws=None):
+    # a0 * mach * sqrt(d)
+    out, ws = _prepare(out, ws, mach, d)
+    np.multiply(A0_KTS, mach, out=out)
+    root = np.sqrt(d, out=_scratch(ws, "speed.root_ratio", d))
+    return np.multiply(out, root, out=out)
+
+
+@instrument
+def mach_to_ktas(mach, hp_ft, disa_c, out=None):
+    if out is None and _scalar.is_scalar(mach, hp_ft, disa_c):
+        try:
+            return _scalar.mach_to_ktas(mach, _scalar.theta(_scalar.altitude_ft(hp_ft), disa_c))
+        except (ValueError, ArithmeticError):
+            pass
+    return _convert(_mach_to_ktas, ("theta",), mach, hp_ft, disa_c, out)
+
+
+def _mach_to_ktas(mach, t, out=None, ws=None):
+    # a0 * mach * sqrt(t)
+    out, ws = _prepare(out, ws, mach, t)
+    np.multiply(A0_KTS, mach, out=out)
+    root = np.sqrt(t, out=_scratch(ws, "speed.root_ratio", t))
+    return np.multiply(out, root, out=out)
+
+
+# --- CAS/Mach crossover ---
+
+def _crossover_delta(kcas, mach, out=None, ws=None):
+    # ((1 + (kcas/C)**2)**3.5 - 1) / ((0.2 * mach * mach + 1)**3.5 - 1),
+    # the delta at which _mach_to_kcas(mach, delta) == kcas
+    out, ws = _prepare(out, ws, kcas, mach)
+    # Mach goes first, so out may alias either input
+    mach_term = ws.get("speed.mach_term", np.shape(mach), out.dtype)
+    np.multiply(0.2, mach, out=mach_term)
+    np.multiply(mach_term, mach, out=mach_term)
+    _pow_minus_one(mach_term, 3.5)
+    np.divide(kcas, SPEED_CALC_CONST, out=out)
+    np.power(out, 2, out=out)
+    _pow_minus_one(out, 3.5)
+    return np.divide(out, mach_term, out=out)
+
+
+# --- Shared steps ---
+
+def _impact_to_kcas(speed, ratio, d, out, ws):
+    """KCAS from KEAS (``ratio`` = d) or KTAS (``ratio`` = t), into ``out``."""
+    np.divide(speed, SPEED_CALC_CONST, out=out)
+    np.power(out, 2, out=out)
+    inv = np.divide(1.0, ratio, out=_scratch(ws, "speed.inv_ratio", ratio))
+    np.multiply(inv, out, out=out)
+    return _pitot_to_kcas(d, out)
+
+
+def _pitot_to_kcas(d, out):
+    """C * sqrt((d * ((1 + y)**3.5 - 1) + 1)**(1/3.5) - 1) for ``y`` held in ``out``."""
+    _pow_minus_one(out, 3.5)
+    np.multiply(d, out, out=out)
+    _pow_minus_one(out, 1.0 / 3.5)
+    np.sqrt(out, out=out)
+    return np.multiply(SPEED_CALC_CONST, out, out=out)
+
+
+def _pow_minus_one(out, exponent):
+    """(1 + y)**exponent - 1 for ``y`` held in ``out``, in place.
+
+    float64 evaluates the formula as written, like the scalar path. In
+    float32 that loses most digits to cancellation at low speeds, where
+    y is small, so single precision uses expm1(exponent * log1p(y)).
+    """
+    if out.dtype == np.float64:
+        np.add(out, 1.0, out=out)
+        np.power(out, exponent, out=out)
+        return np.subtract(out, 1.0, out=out)
+    np.log1p(out, out=out)
+    np.multiply(out, exponent, out=out)
+    return np.expm1(out, out=out)
@@ -0,0 +1,216 @@
+"""Asyncio helpers that keep large array conversions off the event loop.
+
+A conversion awaited through this module is split into chunks along the
+first axis, and the chunks are computed in a thread pool. NumPy releases
+the GIL inside its loops, so the event loop keeps running (and chunks of
+different conversions run in parallel) while a conversion is in progress.
+The result is identical to the same call made directly.
+
+At most ``get_max_workers()`` chunks run at the same time across all
+conversions, and each conversion keeps at most that many chunks queued, so
+concurrent conversions share the workers. Cancelling the awaiting task
+drops the chunks that have not started and waits for the running ones, so
+nothing writes into the result after the cancellation completes.
+
+The precision set with ``use_precision`` in the awaiting task applies to
+the chunks, as it would to a direct call.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from . import _buffers
+from .atmo import Atmo
+from .speed import Speed, SpeedArray
+from .units import SpeedType
+
+# Elements per chunk: large enough to amortize the hand-off to a thread,
+# small enough that every array of a chunk stays in cache
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+_max_workers = os.cpu_count() or 1
+_executor = None
+# Guards swapping the shared pool against submitting to it
+_executor_lock = threading.Lock()
+
+
+def set_max_workers(n):
+    """Limit the number of chunks computed at the same time.
+
+    Conversions in progress submit their remaining chunks to the new
+    shared pool; the chunks already queued on the old one still run.
+
+    Args:
+        n: Maximum number of worker threads (default: the CPU count).
+
+    Raises:
+        ValueError: If ``n`` is less than 1.
+    """
+    global _max_workers, _executor
+    if n < 1:
+        raise ValueError("max_workers must be at least 1")
+    with _executor_lock:
+        old, _executor = _executor, None
+        _max_workers = n
+    if old is not None:
+        old.shutdown(wait=False)
+
+
+def get_max_workers():
+    """Maximum number of chunks computed at the same time."""
+    return _max_workers
+
+
+async def convert(speed, to_type, atmo, out=None, chunk_size=None, executor=None):
+    """Convert a ``Speed`` or ``SpeedArray`` without blocking the event loop.
+
+    Equivalent to ``speed.to_<type>(atmo, out=out)`` (``speed.to`` for a
+    ``SpeedArray``).
+
+    Args:
+        speed: ``Speed`` or ``SpeedArray`` to convert.
+        to_type: Target speed type: "cas", "eas", "tas" or "mach".
+        atmo: ``Atmo`` to convert at.
+        out: Optional array to write the result into.
+        chunk_size: Elements per chunk (default ``DEFAULT_CHUNK_SIZE``).
+        executor: Executor to run the chunks in (default: a shared thread
+            pool of ``get_max_workers()`` threads).
+
+    Returns:
+        The converted speeds, as the direct call would return them.
+
+    Raises:
+        ValueError: If ``to_type`` is unknown or an altitude is above 86 km.
+    """
+    to_type = SpeedType(to_type)
+    if isinstance(speed, SpeedArray):
+        columns = (speed.values, speed.type_codes, speed.unit_codes)
+    else:
+        columns = (speed.value,)
+    shape = np.broadcast_shapes(*(np.shape(c) for c in columns), atmo.shape)
+    hp_ft, disa, *columns = _broadcast((atmo.hp_ft, atmo.delta_isa, *columns), shape, out)
+
+    def job(index, out):
+        # Delta ISA is stored in the Atmo's unit, whatever the input was
+        chunk_atmo = Atmo(hp=hp_ft[index], temperature=disa[index],
+                          temp_unit=atmo.temp_unit, table=atmo._table)
+        if isinstance(speed, SpeedArray):
+            chunk = SpeedArray.from_codes(*(c[index] for c in columns))
+            return chunk.to(to_type, chunk_atmo, out=out)
+        chunk = Speed(columns[0][index], speed.speed_type, speed.speed_unit)
+        return getattr(chunk, f"to_{to_type}")(chunk_atmo, out=out)
+
+    return await _run(job, hp_ft.shape, out, chunk_size, executor)
+
+
+async def apply(func, *args, out=None, chunk_size=None, executor=None, **kwargs):
+    """Call an element-wise function without blocking the event loop.
+
+    ``func`` is any function of this package that takes arrays and an
+    ``out`` argument, such as ``sigma`` or ``_speed_conv.kcas_to_ktas``.
+    Positional arguments are broadcast and split into chunks; keyword
+    arguments are passed to every call unchanged.
+
+    Args:
+        func: Element-wise function to call.
+        *args: Array arguments of ``func``.
+        out: Optional array to write the result into.
+        chunk_size: Elements per chunk (default ``DEFAULT_CHUNK_SIZE``).
+        executor: Executor to run the chunks in (default: a shared thread
+            pool of ``get_max_workers()`` threads).
+        **kwargs: Other arguments of ``func``, such as units.
+
+    Returns:
+        The result of ``func(*args, out=out, **kwargs)``.
+    """
+    shape = np.broadcast_shapes(*(np.shape(a) for a in args))
+    args = _broadcast(args, shape, out)
+
+    def job(index, out):
+        return func(*(a[index] for a in args), out=out, **kwargs)
+
+    return await _run(job, args[0].shape if args else (), out, chunk_size, executor)
+
+
+def _broadcast(values, shape, out):
+    """``values`` as arrays broadcast to the result shape (including ``out``'s)."""
+    if out is not None:
+        shape = _buffers.output(out, shape, out.dtype).shape
+    return [np.broadcast_to(np.asarray(value), shape) for value in values]
+
+
+async def _run(job, shape, out, chunk_size, executor):
+    """Compute ``job(index, out)`` over chunks of the first axis of ``shape``."""
+    if not shape:
+        return await _offload(executor, job, (), out)
+
+    chunk_size = DEFAULT_CHUNK_SIZE if chunk_size is None else chunk_size
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    rows = max(1, chunk_size // max(1, int(np.prod(shape[1:]))))
+    chunks = [slice(start, start + rows) for start in range(0, shape[0], rows)]
+    if not chunks:
+        return await _offload(executor, job, slice(None), out)
+
+    if out is None:
+        # The first chunk tells the result dtype
+        first = await _offload(executor, job, chunks[0], None)
+        result = np.empty(shape, np.result_type(first))
+        result[chunks[0]] = first
+        chunks = chunks[1:]
+    else:
+        result = out
+
+    running = {}
+    try:
+        for index in chunks:
+            while len(running) >= _max_workers:
+                await _wait_first(running)
+            future = _submit(executor, job, index, result[index])
+            running[asyncio.wrap_future(future)] = future
+        while running:
+            await _wait_first(running)
+    except BaseException:
+        # Running chunks cannot be interrupted: drop the queued ones and
+        # wait for the rest, so nothing writes into the result afterwards
+        for future in running.values():
+            future.cancel()
+        started = [asyncio.wrap_future(f) for f in running.values() if not f.cancelled()]
+        if started:
+            await asyncio.wait(started)
+        raise
+    return result
+
+
+async def _offload(executor, job, index, out):
+    return await asyncio.wrap_future(_submit(executor, job, index, out))
+
+
+def _submit(executor, job, index, out):
+    """Run ``job(index, out)`` in the awaiting task's context, in ``executor`` or
+    else in the current shared pool.
+    """
+    call = (contextvars.copy_context().run, job, index, out)
+    if executor is not None:
+        return executor.submit(*call)
+    with _executor_lock:
+        return _default_executor().submit(*call)
+
+
+async def _wait_first(running):
+    done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+    for future in done:
+        del running[future]
+        future.result()
+
+
+def _default_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(_max_workers, thread_name_prefix="atmospeed-aio")
+    return _executor
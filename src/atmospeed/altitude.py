@@ -1,18 +1,22 @@
-"""Pressure altitude calculation from airport elevation and altimeter setting."""
+"""Pressure altitude calculation from airport elevation and altimeter setting,
+from static pressure, pressure ratio or density ratio, and at the CAS/Mach
+crossover; density altitude."""
+
+import math
 
 import numpy as np
 
-from .constants import (
-    PRESSURE_CALC_CONST,
-    PRESSURE_CALC_EXP,
-    PRESSURE_SL_STD_HPA,
-    PRESSURE_SL_STD_INHG,
-)
-from .convert import length_convert, length_to_feet
-from .units import LengthUnit, PressureUnit
+from . import _atmos, _buffers, _scalar, _speed_conv
+from .constants import PRESSURE_CALC_CONST, PRESSURE_CALC_EXP
+from .convert import length_convert, length_to_feet, speed_to_knots
+from .precision import float_dtype
+from .units import LengthUnit, PressureUnit, TemperatureUnit
+
+_SIGMA_OAT = "Density ratio and absolute temperature"
+_CAS_MACH = "CAS and Mach"
 
 
-def pressure_altitude(elevation, altimeter, elev_unit="ft", altimeter_unit="inHg"):
+def pressure_altitude(elevation, altimeter, elev_unit="ft", altimeter_unit="inHg", out=None):
     """Calculate pressure altitude from airport elevation and altimeter setting (QNH).
 
     Args:
@@ -20,22 +24,218 @@ def pressure_altitude(elevation, altimeter, elev_unit="ft", altimeter_unit="inHg
         altimeter: Altimeter setting (QNH).
         elev_unit: Elevation unit (default "ft").
         altimeter_unit: Pressure unit (default "inHg").
+        out: Optional array to write the result into, with NumPy ufunc
+            shape and dtype rules.
 
     Returns:
-        Pressure altitude in the same unit as the elevation input.
+        Pressure altitude in the same unit as the elevation input (``out``
+        if given).
     """
     elev_unit = LengthUnit(elev_unit)
     altimeter_unit = PressureUnit(altimeter_unit)
+    p_sl = _atmos._PRESSURE_SL[altimeter_unit]
 
-    elev_ft = length_to_feet(elevation, elev_unit)
+    if out is not None:
+        return _pressure_altitude_into(elevation, altimeter, elev_unit, p_sl, out)
 
-    p_sl = (PRESSURE_SL_STD_INHG if altimeter_unit == PressureUnit.INHG
-            else PRESSURE_SL_STD_HPA)
+    elev_ft = length_to_feet(elevation, elev_unit)
 
+    power = math.pow if _scalar.is_scalar(elev_ft, altimeter) else np.power
     hp_ft = elev_ft + PRESSURE_CALC_CONST * (
-        1.0 - np.power(altimeter / p_sl, PRESSURE_CALC_EXP)
+        1.0 - power(altimeter / p_sl, PRESSURE_CALC_EXP)
     )
 
     if elev_unit == LengthUnit.FT:
         return hp_ft
     return length_convert(hp_ft, LengthUnit.FT, elev_unit)
+
+
+def _pressure_altitude_into(elevation, altimeter, elev_unit, p_sl, out):
+    """``pressure_altitude`` through persistent scratch, written into ``out``."""
+    out = _buffers.output(out, _buffers.result_shape(elevation, altimeter))
+    ws = _buffers.Workspace(persistent=True)
+    elev_ft = length_to_feet(elevation, elev_unit,
+                             out=ws.get("altitude.elev_ft", np.shape(elevation)))
+    hp_ft = ws.get("altitude.hp_ft", _buffers.result_shape(elevation, altimeter))
+    np.divide(altimeter, p_sl, out=hp_ft)
+    np.power(hp_ft, PRESSURE_CALC_EXP, out=hp_ft)
+    np.subtract(1.0, hp_ft, out=hp_ft)
+    np.multiply(PRESSURE_CALC_CONST, hp_ft, out=hp_ft)
+    np.add(elev_ft, hp_ft, out=hp_ft)
+    return length_convert(hp_ft, LengthUnit.FT, elev_unit, out=out)
+
+
+def hp_from_delta(delta, alt_unit="ft", out=None):
+    """Calculate pressure altitude from pressure ratio — the inverse of ``delta``.
+
+    Args:
+        delta: Pressure ratio P / P_SL_std (scalar or array).
+        alt_unit: Output altitude unit (default "ft").
+        out: Optional array to write the result into, with NumPy ufunc
+            shape and dtype rules.
+
+    Returns:
+        Pressure altitude (``out`` if given).
+
+    Raises:
+        ValueError: If any ratio is not positive or gives an altitude above
+            86 km.
+    """
+    alt_unit = LengthUnit(alt_unit)
+    if out is None and _scalar.is_scalar(delta):
+        return _solve_scalar(delta, alt_unit)
+    ws = _buffers.Workspace(persistent=out is not None)
+    return _solve(np.asarray(delta, dtype=float_dtype()), alt_unit, out, ws)
+
+
+def hp_from_pressure(pressure, pressure_unit="hPa", alt_unit="ft", out=None):
+    """Calculate pressure altitude from static pressure.
+
+    Args:
+        pressure: Static pressure (scalar or array).
+        pressure_unit: Pressure unit (default "hPa").
+        alt_unit: Output altitude unit (default "ft").
+        out: Optional array to write the result into, with NumPy ufunc
+            shape and dtype rules.
+
+    Returns:
+        Pressure altitude (``out`` if given).
+
+    Raises:
+        ValueError: If any pressure is not positive or gives an altitude
+            above 86 km.
+    """
+    p_sl = _atmos._PRESSURE_SL[PressureUnit(pressure_unit)]
+    alt_unit = LengthUnit(alt_unit)
+    if out is None and _scalar.is_scalar(pressure):
+        return _solve_scalar(pressure / p_sl, alt_unit, "Pressure")
+    ws = _buffers.Workspace(persistent=out is not None)
+    ratio = ws.get("altitude.delta", np.shape(pressure), float_dtype())
+    return _solve(np.divide(pressure, p_sl, out=ratio), alt_unit, out, ws, "Pressure")
+
+
+def hp_from_sigma(sigma, oat, temp_unit="C", alt_unit="ft", out=None):
+    """Calculate pressure altitude from density ratio and outside air temperature.
+
+    Uses delta = sigma * theta, with theta from the OAT.
+
+    Args:
+        sigma: Density ratio rho / rho_SL_std (scalar or array).
+        oat: Outside air temperature (scalar or array).
+        temp_unit: Temperature unit (default "C").
+        alt_unit: Output altitude unit (default "ft").
+        out: Optional array to write the result into, with NumPy ufunc
+            shape and dtype rules.
+
+    Returns:
+        Pressure altitude (``out`` if given).
+
+    Raises:
+        ValueError: If any density ratio or absolute temperature is not
+            positive, or the result is above 86 km.
+    """
+    _, _, offset, sl_abs = _atmos._TEMP_SCALES[TemperatureUnit(temp_unit)]
+    alt_unit = LengthUnit(alt_unit)
+    if out is None and _scalar.is_scalar(sigma, oat):
+        return _solve_scalar(sigma * ((oat + offset) / sl_abs), alt_unit, _SIGMA_OAT)
+    ws = _buffers.Workspace(persistent=out is not None)
+    ratio = ws.get("altitude.delta", _buffers.result_shape(sigma, oat), float_dtype())
+    np.add(oat, offset, out=ratio)
+    np.divide(ratio, sl_abs, out=ratio)
+    return _solve(np.multiply(sigma, ratio, out=ratio), alt_unit, out, ws, _SIGMA_OAT)
+
+
+def density_altitude(sigma, alt_unit="ft", out=None):
+    """Calculate density altitude: the standard-day altitude with the same density.
+
+    Args:
+        sigma: Density ratio rho / rho_SL_std (scalar or array), such as
+            ``Atmo.sigma``.
+        alt_unit: Output altitude unit (default "ft").
+        out: Optional array to write the result into, with NumPy ufunc
+            shape and dtype rules.
+
+    Returns:
+        Density altitude (``out`` if given).
+
+    Raises:
+        ValueError: If any ratio is not positive or gives an altitude above
+            86 km.
+    """
+    alt_unit = LengthUnit(alt_unit)
+    if out is None and _scalar.is_scalar(sigma):
+        return _solve_scalar(sigma, alt_unit, "Density ratio", _scalar.hd_from_sigma)
+    ws = _buffers.Workspace(persistent=out is not None)
+    return _solve(np.asarray(sigma, dtype=float_dtype()), alt_unit, out, ws, "Density ratio",
+                  _atmos.hd_from_sigma)
+
+
+def crossover_altitude(cas, mach, speed_unit="kts", alt_unit="ft", out=None):
+    """Calculate the CAS/Mach crossover altitude of climb or descent schedules.
+
+    The pressure altitude at which ``cas`` and ``mach`` are the same speed:
+    the inverse of the Mach to CAS relation, solved for delta. It does not
+    depend on temperature. Pairs are broadcast, so arrays of thousands of
+    schedules are solved in one call.
+
+    Args:
+        cas: Calibrated airspeed (scalar or array).
+        mach: Mach number (scalar or array).
+        speed_unit: Unit of ``cas`` (default "kts").
+        alt_unit: Output altitude unit (default "ft").
+        out: Optional array to write the result into, with NumPy ufunc
+            shape and dtype rules.
+
+    Returns:
+        Crossover pressure altitude (``out`` if given).
+
+    Raises:
+        ValueError: If any CAS or Mach is not positive, or a crossover is
+            above 86 km.
+    """
+    alt_unit = LengthUnit(alt_unit)
+    if out is None and _scalar.is_scalar(cas, mach):
+        kcas = speed_to_knots(cas, speed_unit)
+        if kcas <= 0 or mach <= 0:
+            raise ValueError(f"{_CAS_MACH} must be positive")
+        return _solve_scalar(_scalar.crossover_delta(kcas, mach), alt_unit)
+    ws = _buffers.Workspace(persistent=out is not None)
+    dtype = float_dtype()
+    kcas = speed_to_knots(cas, speed_unit, out=ws.get("altitude.kcas", np.shape(cas), dtype))
+    mach = np.asarray(mach, dtype=dtype)
+    _check_positive(kcas, _CAS_MACH)
+    _check_positive(mach, _CAS_MACH)
+    ratio = ws.get("altitude.delta", _buffers.result_shape(kcas, mach), dtype)
+    return _solve(_speed_conv._crossover_delta(kcas, mach, ratio, ws), alt_unit, out, ws)
+
+
+def _solve_scalar(delta, alt_unit, what="Pressure ratio", invert=_scalar.hp_from_delta):
+    """Pressure altitude in ``alt_unit`` for a scalar pressure ratio.
+
+    ``invert`` maps the ratio to feet (density altitude takes ``hd_from_sigma``).
+    """
+    if not delta > 0 and not math.isnan(delta):
+        raise ValueError(f"{what} must be positive")
+    hp_ft = _scalar.altitude_ft(invert(delta))
+    if alt_unit == LengthUnit.FT:
+        return hp_ft
+    return length_convert(hp_ft, LengthUnit.FT, alt_unit)
+
+
+def _solve(delta, alt_unit, out, ws, what="Pressure ratio", invert=_atmos.hp_from_delta):
+    """Pressure altitude in ``alt_unit`` for a float array of pressure ratios."""
+    _check_positive(delta, what)
+    result = _buffers.target(out, delta.shape, ws, delta.dtype)
+    hp_ft = invert(delta, result, ws)
+    _atmos.validate_altitude(hp_ft)
+    if alt_unit != LengthUnit.FT:
+        length_convert(hp_ft, LengthUnit.FT, alt_unit, out=hp_ft)
+    if out is None:
+        return hp_ft.item() if hp_ft.ndim == 0 else hp_ft
+    return _buffers.finish(out, hp_ft)
+
+
+def _check_positive(values, what):
+    # fmin.reduce skips NaNs, which come back as NaN altitudes
+    if values.size and np.fmin.reduce(values, axis=None) <= 0:
+        raise ValueError(f"{what} must be positive")
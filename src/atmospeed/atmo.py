@@ -1,57 +1,105 @@
 """Atmo class — defines an atmospheric point at a pressure altitude and temperature condition."""
 
+import math
+from typing import NamedTuple
+
 import numpy as np
 
+from . import _atmos, _buffers, _scalar
+from .precision import as_float
+from . import cache as _cache
+from ._atmos import validate_altitude as _validate_altitude
+from .altitude import density_altitude as _density_altitude
 from .constants import A0_FPS, A0_KMH, A0_KTS, A0_MPH, A0_MPS
-from .convert import length_to_feet
-from .ratio import delta as calc_delta
-from .ratio import sigma as calc_sigma
-from .ratio import theta as calc_theta
+from .convert import _TO_FEET, _scale, length_to_feet
 from .temperature import calc_delta_isa as _calc_delta_isa
-from .temperature import isa as calc_isa
-from .temperature import oat as calc_oat
-from .units import LengthUnit, SpeedUnit, TemperatureUnit
+from .units import DensityUnit, LengthUnit, PressureUnit, SpeedUnit, TemperatureUnit
+
+_A0 = {
+    SpeedUnit.KTS: A0_KTS,
+    SpeedUnit.FPS: A0_FPS,
+    SpeedUnit.MPH: A0_MPH,
+    SpeedUnit.MPS: A0_MPS,
+    SpeedUnit.KMH: A0_KMH,
+}
+
+
+class AtmoState(NamedTuple):
+    """Immutable snapshot of every derived value of an ``Atmo``.
+
+    Temperatures are in the point's temperature unit. Fields are floats for
+    a single point and read-only arrays for an array ``Atmo``.
+    """
+
+    hp_ft: float
+    delta_isa: float
+    isa_temp: float
+    oat: float
+    theta: float
+    delta: float
+    sigma: float
+    speed_of_sound_kts: float
 
 
 class Atmo:
     """Atmospheric point defined by pressure altitude and temperature condition.
 
+    ``hp`` and ``temperature`` may be scalars or arrays. Arrays are broadcast
+    against each other, and every derived property is then an array of the
+    broadcast shape, so a whole flight trace is one ``Atmo``. Arrays take
+    the dtype of the precision policy in force at construction (see
+    ``set_precision``), and all derived arrays keep it.
+
     Args:
-        hp: Pressure altitude.
-        temperature: Temperature value. Interpreted as delta ISA by default,
-            or as OAT if ``temp_is_delta_isa=False``.
+        hp: Pressure altitude (scalar or array).
+        temperature: Temperature value (scalar or array). Interpreted as
+            delta ISA by default, or as OAT if ``temp_is_delta_isa=False``.
         temp_is_delta_isa: If True (default), temperature is a delta ISA value.
             If False, temperature is OAT.
         alt_unit: Altitude unit (default "ft").
         temp_unit: Temperature unit (default "C").
+        table: Optional ``RatioTable`` to interpolate delta (and so sigma and
+            speed conversions) from instead of the exact formulas.
+
+    Derived values are computed together on first access and cached, so
+    repeated property reads and speed conversions against one instance
+    never recompute the atmosphere.
 
     Raises:
-        ValueError: If altitude is above the stratopause.
+        ValueError: If any altitude is above 86 km.
     """
 
     __slots__ = ("_hp", "_temperature", "_temp_is_delta_isa", "_alt_unit",
-                 "_temp_unit", "_hp_ft", "_disa")
+                 "_temp_unit", "_hp_ft", "_disa", "_table", "_state")
 
     def __init__(self, hp, temperature, temp_is_delta_isa=True,
-                 alt_unit="ft", temp_unit="C"):
+                 alt_unit="ft", temp_unit="C", table=None):
+        scalar = _scalar.is_scalar(hp, temperature)
+        if not scalar and (np.ndim(hp) or np.ndim(temperature)):
+            hp, temperature = np.broadcast_arrays(as_float(hp), as_float(temperature))
         self._hp = hp
         self._temperature = temperature
         self._temp_is_delta_isa = temp_is_delta_isa
         self._alt_unit = LengthUnit(alt_unit)
         self._temp_unit = TemperatureUnit(temp_unit)
 
-        self._hp_ft = length_to_feet(hp, self._alt_unit)
-
-        from .constants import HEIGHT_STRATOPAUSE_FT
-        if self._hp_ft > HEIGHT_STRATOPAUSE_FT:
-            raise ValueError("Altitude is above stratopause (20 km / 65617 ft)")
+        if scalar:
+            # Units are resolved above, so the point path is plain arithmetic
+            self._hp_ft = _scalar.altitude_ft(_scale(hp, None, *_TO_FEET[self._alt_unit]))
+        else:
+            self._hp_ft = length_to_feet(hp, self._alt_unit)
+            _validate_altitude(self._hp_ft)
 
         if temp_is_delta_isa:
             self._disa = temperature
+        elif scalar:
+            self._disa = temperature - _scalar.isa(self._hp_ft, self._temp_unit)
         else:
             self._disa = _calc_delta_isa(
                 hp, temperature, alt_unit=self._alt_unit, temp_unit=self._temp_unit
             )
+        self._table = table
+        self._state = None
 
     def __repr__(self):
         return (f"Atmo(hp={self._hp} {self._alt_unit}, "
@@ -63,6 +111,11 @@ class Atmo:
         """Pressure altitude in feet."""
         return self._hp_ft
 
+    @property
+    def shape(self):
+        """Shape of the atmospheric state, ``()`` for a single point."""
+        return np.shape(self._hp_ft)
+
     @property
     def alt_unit(self):
         return self._alt_unit
@@ -74,31 +127,22 @@ class Atmo:
     @property
     def theta(self):
         """Temperature ratio."""
-        return calc_theta(
-            self._hp, delta_isa=self._disa,
-            alt_unit=self._alt_unit, temp_unit=self._temp_unit
-        )
+        return self.snapshot().theta
 
     @property
     def delta(self):
         """Pressure ratio."""
-        return calc_delta(self._hp, alt_unit=self._alt_unit)
+        return self.snapshot().delta
 
     @property
     def sigma(self):
         """Density ratio."""
-        return calc_sigma(
-            self._hp, delta_isa=self._disa,
-            alt_unit=self._alt_unit, temp_unit=self._temp_unit
-        )
+        return self.snapshot().sigma
 
     @property
     def oat(self):
         """Outside air temperature in the Atmo point's temperature unit."""
-        return calc_oat(
-            self._hp, self._disa,
-            alt_unit=self._alt_unit, temp_unit=self._temp_unit
-        )
+        return self.snapshot().oat
 
     @property
     def delta_isa(self):
@@ -108,30 +152,163 @@ class Atmo:
     @property
     def isa_temp(self):
         """ISA temperature in the Atmo point's temperature unit."""
-        return calc_isa(self._hp, alt_unit=self._alt_unit, temp_unit=self._temp_unit)
+        return self.snapshot().isa_temp
 
-    def speed_of_sound(self, speed_unit="kts"):
+    def speed_of_sound(self, speed_unit="kts", out=None):
         """Speed of sound at this atmospheric point.
 
         Args:
             speed_unit: Output speed unit (default "kts").
+            out: Optional array to write the result into, with NumPy ufunc
+                shape and dtype rules.
 
         Returns:
-            Speed of sound in the requested unit.
+            Speed of sound in the requested unit (``out`` if given).
         """
         speed_unit = SpeedUnit(speed_unit)
-        a0 = {
-            SpeedUnit.KTS: A0_KTS,
-            SpeedUnit.FPS: A0_FPS,
-            SpeedUnit.MPH: A0_MPH,
-            SpeedUnit.MPS: A0_MPS,
-            SpeedUnit.KMH: A0_KMH,
-        }[speed_unit]
-        return a0 * np.sqrt(self.theta)
-
-    def _disa_in_celsius(self):
-        """Get delta ISA in Celsius regardless of the point's temperature unit."""
-        if self._temp_unit in (TemperatureUnit.C, TemperatureUnit.K):
-            return self._disa
-        else:
-            return self._disa / 1.8
+        state = self.snapshot()
+        if out is None:
+            if speed_unit == SpeedUnit.KTS:
+                return state.speed_of_sound_kts
+            return _A0[speed_unit] * np.sqrt(state.theta)
+        out = _buffers.output(out, self.shape)
+        if speed_unit == SpeedUnit.KTS:
+            np.copyto(out, state.speed_of_sound_kts, casting="same_kind")
+            return out
+        np.sqrt(state.theta, out=out)
+        return np.multiply(_A0[speed_unit], out, out=out)
+
+    def pressure(self, pressure_unit="hPa", out=None):
+        """Static pressure at this atmospheric point.
+
+        Args:
+            pressure_unit: Output pressure unit (default "hPa").
+            out: Optional array to write the result into, with NumPy ufunc
+                shape and dtype rules.
+
+        Returns:
+            Static pressure in the requested unit (``out`` if given).
+        """
+        p_sl = _atmos._PRESSURE_SL[PressureUnit(pressure_unit)]
+        delta = self.snapshot().delta
+        if out is None:
+            return p_sl * delta
+        return np.multiply(p_sl, delta, out=_buffers.output(out, self.shape))
+
+    def density(self, density_unit="kg/m3", out=None):
+        """Air density at this atmospheric point.
+
+        Args:
+            density_unit: Output density unit (default "kg/m3").
+            out: Optional array to write the result into, with NumPy ufunc
+                shape and dtype rules.
+
+        Returns:
+            Air density in the requested unit (``out`` if given).
+        """
+        rho_sl = _atmos._DENSITY_SL[DensityUnit(density_unit)]
+        sigma = self.snapshot().sigma
+        if out is None:
+            return rho_sl * sigma
+        return np.multiply(rho_sl, sigma, out=_buffers.output(out, self.shape))
+
+    def density_altitude(self, alt_unit="ft", out=None):
+        """Density altitude: the standard-day altitude with this point's density.
+
+        Args:
+            alt_unit: Output altitude unit (default "ft").
+            out: Optional array to write the result into, with NumPy ufunc
+                shape and dtype rules.
+
+        Returns:
+            Density altitude in the requested unit (``out`` if given).
+
+        Raises:
+            ValueError: If a density altitude is above 86 km.
+        """
+        return _density_altitude(self.snapshot().sigma, alt_unit, out)
+
+    def impact_pressure(self, speed, pressure_unit="hPa", out=None):
+        """Impact pressure (pitot minus static pressure) of a speed at this point.
+
+        Uses the subsonic compressible relation
+        qc = P * ((1 + 0.2 * M^2) ** 3.5 - 1), as the CAS conversions do.
+
+        Args:
+            speed: ``Speed`` or ``SpeedArray`` of any type.
+            pressure_unit: Output pressure unit (default "hPa").
+            out: Optional array to write the result into, with NumPy ufunc
+                shape and dtype rules.
+
+        Returns:
+            Impact pressure in the requested unit (``out`` if given).
+        """
+        p_sl = _atmos._PRESSURE_SL[PressureUnit(pressure_unit)]
+        mach = speed.to_mach(self)
+        delta = self.snapshot().delta
+        if out is None and not np.ndim(mach) and not np.ndim(delta):
+            mach = float(mach)
+            return p_sl * float(delta) * (math.pow(0.2 * mach * mach + 1.0, 3.5) - 1.0)
+        # A fresh array or out: never the Mach array itself
+        qc = _buffers.output(out, _buffers.result_shape(mach, delta), np.result_type(mach, delta))
+        np.multiply(mach, mach, out=qc)
+        np.multiply(qc, 0.2, out=qc)
+        np.add(qc, 1.0, out=qc)
+        np.power(qc, 3.5, out=qc)
+        np.subtract(qc, 1.0, out=qc)
+        np.multiply(qc, delta, out=qc)
+        return np.multiply(qc, p_sl, out=qc)
+
+    def snapshot(self) -> AtmoState:
+        """All derived values at this point, computed once and then cached.
+
+        Returns:
+            AtmoState snapshot. Array fields are read-only, since the same
+            snapshot is shared by every later access.
+        """
+        if self._state is None:
+            cache = _cache.active()
+            if cache is None or self.shape:
+                self._state = self._compute_state()
+            else:
+                key = self._cache_key(cache, self._temp_unit)
+                self._state = cache.get(key, self._compute_state)
+        return self._state
+
+    def _cache_key(self, cache, *extra, speed_kts=None):
+        """Result cache key for this single point plus ``extra`` parts."""
+        disa_k = self._disa
+        if self._temp_unit in (TemperatureUnit.F, TemperatureUnit.R):
+            disa_k = disa_k / 1.8
+        return cache.key(self._hp_ft, disa_k, self._table, *extra, speed_kts=speed_kts)
+
+    def _compute_state(self):
+        if self._table is None and _scalar.is_scalar(self._hp_ft, self._disa):
+            try:
+                isa_t, theta, delta, sigma = _scalar.state(self._hp_ft, self._disa,
+                                                           self._temp_unit)
+                return AtmoState(self._hp_ft, float(self._disa), isa_t,
+                                 float(isa_t + self._disa), theta, delta, sigma,
+                                 A0_KTS * math.sqrt(theta))
+            except (ValueError, ArithmeticError):
+                # math raises for an OAT at or below absolute zero, where
+                # the array path gives inf or NaN
+                pass
+
+        # Arrays keep the precision they were created in
+        dtype = np.result_type(self._hp_ft, 1.0)
+        hp_ft = np.asarray(self._hp_ft, dtype=dtype)
+        state = _atmos.state(hp_ft, self._disa, self._temp_unit, self._table)
+        fields = (
+            hp_ft,
+            np.asarray(self._disa, dtype=dtype),
+            state.isa,
+            state.isa + self._disa,
+            state.theta,
+            state.delta,
+            state.sigma,
+            A0_KTS * np.sqrt(state.theta),
+        )
+        if not self.shape:
+            return AtmoState(*(float(value) for value in fields))
+        return AtmoState(*(np.broadcast_to(value, self.shape) for value in fields))
@@ -0,0 +1,65 @@
+"""Kernel backend selection for array computations.
+
+The default "numpy" backend evaluates every formula with NumPy ufuncs. When
+numba is installed, "numba" compiles the atmosphere and speed kernels into
+single-loop ufuncs that allocate nothing but their output, and
+"numba-parallel" additionally spreads each loop over all CPU cores. Scalar
+inputs always take the pure-Python path, whichever backend is selected.
+"""
+
+import warnings
+
+BACKENDS = ("numpy", "numba", "numba-parallel")
+
+_NUMBA_TARGETS = {"numba": "cpu", "numba-parallel": "parallel"}
+
+_name = "numpy"
+_kernels = None
+_compiled = {}
+
+
+def set_backend(name):
+    """Select the kernel backend for array computations.
+
+    Compiling the numba kernels takes a few seconds the first time each
+    numba backend is selected in a process.
+
+    Args:
+        name: One of "numpy", "numba", "numba-parallel".
+
+    Returns:
+        The name of the backend now in use. A numba backend falls back to
+        "numpy", with a warning, when numba is not installed.
+
+    Raises:
+        ValueError: If ``name`` is not a known backend.
+    """
+    global _name, _kernels
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend: {name!r} (expected one of {', '.join(BACKENDS)})")
+    if name == "numpy":
+        _name, _kernels = name, None
+        return _name
+
+    target = _NUMBA_TARGETS[name]
+    if target not in _compiled:
+        try:
+            from . import _numba
+        except ImportError:
+            warnings.warn(f"numba is not installed; the {name!r} backend falls back to NumPy",
+                          RuntimeWarning, stacklevel=2)
+            _name, _kernels = "numpy", None
+            return _name
+        _compiled[target] = _numba.Kernels(target)
+    _name, _kernels = name, _compiled[target]
+    return _name
+
+
+def get_backend():
+    """Name of the backend in use."""
+    return _name
+
+
+def kernels():
+    """Compiled numba kernels of the active backend, or None for NumPy."""
+    return _kernels
@@ -0,0 +1,155 @@
+"""Opt-in LRU result cache for scalar atmosphere lookups and speed conversions.
+
+Disabled by default. Once enabled, every single-point ``Atmo`` computes its
+derived values and every scalar ``Speed`` conversion computes its result at
+most once per distinct input, and repeated queries cost a dictionary lookup.
+
+Keys are normalized to SI before lookup (altitude in m, temperature
+deviation in K, speed in m/s), so the same point given in different units
+shares an entry. Optional quantization steps round these SI values onto a
+grid; all inputs that fall in one grid cell then share the result computed
+for the first of them. Non-finite inputs bypass the cache: NaN never equals
+itself, so a NaN key could never be hit again.
+"""
+
+import math
+import numbers
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+
+from .convert import _KTS_TO_MPS, _METERS_PER_FOOT
+
+
+class CacheInfo(NamedTuple):
+    """Cache statistics returned by ``cache_info``."""
+
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class _LRUCache:
+    """Thread-safe bounded mapping with least-recently-used eviction."""
+
+    __slots__ = ("_maxsize", "_steps", "_data", "_lock", "_hits", "_misses",
+                 "_evictions")
+
+    def __init__(self, maxsize, steps):
+        self._maxsize = maxsize
+        self._steps = steps
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def key(self, hp_ft, disa_k, *extra, speed_kts=None):
+        """Build a quantized SI key for a point, plus any exact ``extra`` parts.
+
+        Returns None if an input is NaN or infinite, so the point is not cached.
+        """
+        altitude_step, temperature_step, speed_step = self._steps
+        values = [hp_ft * _METERS_PER_FOOT, disa_k]
+        steps = [altitude_step, temperature_step]
+        if speed_kts is not None:
+            values.append(speed_kts * _KTS_TO_MPS)
+            steps.append(speed_step)
+        values.extend(part for part in extra if isinstance(part, numbers.Real))
+        if not all(map(math.isfinite, values)):
+            return None
+        return (*map(_quantize, values[:len(steps)], steps), *extra)
+
+    def get(self, key, compute):
+        """Return the cached value for ``key``, calling ``compute()`` on a miss.
+
+        A None key (see ``key``) always calls ``compute()`` and is not counted.
+        """
+        if key is None:
+            return compute()
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self._misses += 1
+            else:
+                self._data.move_to_end(key)
+                self._hits += 1
+                return value
+
+        value = compute()
+        with self._lock:
+            self._data[key] = value
+            if len(self._data) > self._maxsize:
+                self._data.popitem(last=False)
+                self._evictions += 1
+        return value
+
+    def info(self):
+        with self._lock:
+            return CacheInfo(self._hits, self._misses, self._evictions,
+                             self._maxsize, len(self._data))
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._hits = self._misses = self._evictions = 0
+
+
+_active = None
+
+
+def active():
+    """The enabled cache, or None."""
+    return _active
+
+
+def enable_cache(maxsize=4096, altitude_step=None, temperature_step=None,
+                 speed_step=None):
+    """Enable the result cache, replacing any cache already enabled.
+
+    Args:
+        maxsize: Maximum number of cached results (default 4096).
+        altitude_step: Optional altitude quantization step in meters.
+        temperature_step: Optional temperature deviation quantization step in K.
+        speed_step: Optional speed quantization step in m/s. Mach inputs are
+            never quantized.
+
+    Raises:
+        ValueError: If ``maxsize`` or a step is not positive.
+    """
+    global _active
+    if maxsize < 1:
+        raise ValueError("Cache maxsize must be at least 1")
+    steps = (altitude_step, temperature_step, speed_step)
+    if any(step is not None and not step > 0 for step in steps):
+        raise ValueError("Quantization steps must be positive")
+    _active = _LRUCache(maxsize, steps)
+
+
+def disable_cache():
+    """Disable the result cache and drop its contents."""
+    global _active
+    _active = None
+
+
+def clear_cache():
+    """Drop all cached results and reset the statistics."""
+    if _active is not None:
+        _active.clear()
+
+
+def cache_info():
+    """Statistics of the enabled cache.
+
+    Returns:
+        CacheInfo with hits, misses, evictions, maxsize and currsize, or
+        None if the cache is disabled.
+    """
+    return None if _active is None else _active.info()
+
+
+def _quantize(value, step):
+    return value if step is None else round(value / step)
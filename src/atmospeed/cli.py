@@ -1,13 +1,14 @@
-"""CLI entry point for atmospeed — point calculations and CSV batch processing."""
+"""CLI entry point for atmospeed — point calculations, CSV batch processing,
+table generation and the conversion server.
+
+Each subcommand imports the modules it needs when it runs, so ``--help``
+and argument errors never load NumPy, and point calculations skip the
+batch engine and its multiprocessing machinery.
+"""
 
 import argparse
-import csv
 import sys
 
-from .altitude import pressure_altitude
-from .atmo import Atmo
-from .speed import Speed
-
 
 def main(argv=None):
     parser = argparse.ArgumentParser(
@@ -16,9 +17,16 @@ def main(argv=None):
     )
     subparsers = parser.add_subparsers(dest="command", required=True)
 
+    # Options shared by all subcommands
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--profile", action="store_true",
+                        help="Print phase times and function call statistics "
+                             "to stderr")
+
     # --- convert subcommand ---
     p_conv = subparsers.add_parser(
         "convert",
+        parents=[common],
         help="Single-point speed conversion or atmosphere lookup",
     )
     p_conv.add_argument("--hp", type=float, required=True, help="Pressure altitude")
@@ -48,6 +56,7 @@ def main(argv=None):
     # --- pressure-alt subcommand ---
     p_palt = subparsers.add_parser(
         "pressure-alt",
+        parents=[common],
         help="Calculate pressure altitude from elevation and altimeter",
     )
     p_palt.add_argument("--elevation", type=float, required=True,
@@ -58,40 +67,128 @@ def main(argv=None):
                         choices=["ft", "m", "km", "sm", "nm"],
                         help="Elevation unit (default: ft)")
     p_palt.add_argument("--altimeter-unit", default="inHg",
-                        choices=["inHg", "hPa"],
+                        choices=["inHg", "hPa", "Pa", "psf"],
                         help="Altimeter pressure unit (default: inHg)")
 
     # --- batch subcommand ---
     p_batch = subparsers.add_parser(
         "batch",
-        help="Batch speed conversion from CSV",
+        parents=[common],
+        help="Batch speed conversion from CSV or NumPy files",
     )
-    p_batch.add_argument("input", help="Input CSV file path")
-    p_batch.add_argument("output", help="Output CSV file path")
+    p_batch.add_argument("input", help="Input file path (.csv, .npy, .npz, or raw "
+                                       "records with --dtype)")
+    p_batch.add_argument("output", help="Output file path (.csv, .npy or .npz)")
     p_batch.add_argument("--to", dest="to_type", required=True,
                          choices=["cas", "eas", "tas", "mach"],
                          help="Target speed type")
+    p_batch.add_argument("--chunk-size", type=_positive_int, default=None,
+                         help="Stream the file in blocks of this many rows, "
+                              "with progress on stderr (default: whole file). "
+                              "Not with --workers")
+    p_batch.add_argument("--workers", type=_positive_int, default=1,
+                         help="Convert in N worker processes (default: 1). "
+                              "Output is identical to a serial run. CSV only")
+    p_batch.add_argument("--precision", type=_non_negative_int, default=4,
+                         help="Decimal places of CSV output values (default: 4)")
+    p_batch.add_argument("--dtype", dest="record_dtype", default=None,
+                         help="Read the input as raw records of this layout, "
+                              "e.g. hp:f8,temperature:f8,speed_value:f8,speed_type:S4")
+
+    # --- table subcommand ---
+    p_table = subparsers.add_parser(
+        "table",
+        parents=[common],
+        help="Generate a speed and atmosphere table over a grid",
+    )
+    p_table.add_argument("output", help="Output file path (.csv, .npy or .npz)")
+    p_table.add_argument("--hp", type=_axis, required=True,
+                         help="Pressure altitudes: START:STOP:STEP, a comma "
+                              "separated list, or a single value")
+    p_table.add_argument("--disa", type=_axis, default=[0.0],
+                         help="Temperature deviations from ISA, as for --hp "
+                              "(default: 0; write negative values as --disa=-20:20:5)")
+    p_table.add_argument("--speed", type=_axis,
+                         help="Speeds, as for --hp (default: atmosphere columns only)")
+    p_table.add_argument("--from", dest="from_type", default="cas",
+                         choices=["cas", "eas", "tas", "mach"],
+                         help="Type of the --speed values (default: cas)")
+    p_table.add_argument("--columns", type=lambda text: text.split(","),
+                         help="Comma separated columns to compute (default: "
+                              "cas,eas,tas,mach with --speed, then "
+                              "isa_temp,oat,theta,delta,sigma,speed_of_sound,"
+                              "pressure,density)")
+    p_table.add_argument("--alt-unit", default="ft",
+                         choices=["ft", "m", "km", "sm", "nm"],
+                         help="Altitude unit (default: ft)")
+    p_table.add_argument("--temp-unit", default="C",
+                         choices=["C", "F", "K", "R"],
+                         help="Temperature unit (default: C)")
+    p_table.add_argument("--speed-unit", default="kts",
+                         choices=["kts", "fps", "mph", "mps", "kmh"],
+                         help="Speed unit (default: kts)")
+    p_table.add_argument("--format", choices=["csv", "npy", "npz"],
+                         help="Output format (default: from the file extension)")
+    p_table.add_argument("--precision", type=_non_negative_int, default=4,
+                         help="Decimal places of CSV values (default: 4)")
+
+    # --- serve subcommand ---
+    p_serve = subparsers.add_parser(
+        "serve",
+        parents=[common],
+        help="Answer JSON requests over a socket from a persistent process",
+    )
+    p_listen = p_serve.add_mutually_exclusive_group(required=True)
+    p_listen.add_argument("--socket", help="Unix domain socket path to listen on")
+    p_listen.add_argument("--port", type=int, help="TCP port to listen on")
+    p_serve.add_argument("--host", default="127.0.0.1",
+                         help="TCP host to bind (default: 127.0.0.1)")
+    p_serve.add_argument("--batch-window", type=float, default=0.0,
+                         help="Milliseconds to wait for more requests before "
+                              "computing a batch (default: 0)")
+    p_serve.add_argument("--max-batch", type=_positive_int, default=4096,
+                         help="Requests that trigger a batch immediately "
+                              "(default: 4096)")
 
     args = parser.parse_args(argv)
 
+    if not args.profile:
+        _run(args)
+        return
+    from . import profiling
+
+    with profiling.profile() as prof:
+        try:
+            with profiling.phase(f"cli.{args.command}"):
+                _run(args)
+        finally:
+            print(prof.report(), file=sys.stderr)
+
+
+def _run(args):
     if args.command == "convert":
         _cmd_convert(args)
     elif args.command == "pressure-alt":
         _cmd_pressure_alt(args)
     elif args.command == "batch":
         _cmd_batch(args)
+    elif args.command == "table":
+        _cmd_table(args)
+    elif args.command == "serve":
+        _cmd_serve(args)
 
 
 def _cmd_convert(args):
-    atmo = Atmo(
-        hp=args.hp,
-        temperature=args.temp,
-        temp_is_delta_isa=not args.oat,
-        alt_unit=args.alt_unit,
-        temp_unit=args.temp_unit,
-    )
-
     if args.atmo:
+        from .atmo import Atmo
+
+        atmo = Atmo(
+            hp=args.hp,
+            temperature=args.temp,
+            temp_is_delta_isa=not args.oat,
+            alt_unit=args.alt_unit,
+            temp_unit=args.temp_unit,
+        )
         print(f"theta  = {atmo.theta:.4f}")
         print(f"delta  = {atmo.delta:.4f}")
         print(f"sigma  = {atmo.sigma:.4f}")
@@ -106,16 +203,17 @@ def _cmd_convert(args):
               file=sys.stderr)
         sys.exit(1)
 
-    spd = Speed(args.speed, args.from_type, speed_unit=args.speed_unit)
-    converters = {"cas": spd.to_cas, "eas": spd.to_eas,
-                  "tas": spd.to_tas, "mach": spd.to_mach}
+    from .converter import make_converter
 
+    types = ["cas", "eas", "tas", "mach"]
     targets = [args.to_type] if args.to_type else [
-        t for t in converters if t != args.from_type
+        t for t in types if t != args.from_type
     ]
 
     for target in targets:
-        result = converters[target](atmo)
+        convert = make_converter(args.from_type, target, args.speed_unit,
+                                 args.alt_unit, args.temp_unit, not args.oat)
+        result = convert(args.speed, args.hp, args.temp)
         label = f" {target.upper()}" if len(targets) > 1 else ""
         if target == "mach":
             print(f"{result:.4f} Mach")
@@ -124,6 +222,8 @@ def _cmd_convert(args):
 
 
 def _cmd_pressure_alt(args):
+    from .altitude import pressure_altitude
+
     hp = pressure_altitude(
         args.elevation, args.altimeter,
         elev_unit=args.elev_unit, altimeter_unit=args.altimeter_unit,
@@ -132,44 +232,94 @@ def _cmd_pressure_alt(args):
 
 
 def _cmd_batch(args):
-    with open(args.input, newline="") as f_in:
-        reader = csv.DictReader(f_in)
-        fieldnames = list(reader.fieldnames or [])
-        result_col = f"{args.to_type}_result"
-        out_fields = fieldnames + [result_col]
-
-        rows = []
-        for row in reader:
-            hp = float(row["hp"])
-            temperature = float(row["temperature"])
-            speed_value = float(row["speed_value"])
-            speed_type = row["speed_type"].strip().lower()
-
-            alt_unit = row.get("alt_unit", "ft").strip() or "ft"
-            temp_unit = row.get("temp_unit", "C").strip() or "C"
-            speed_unit = row.get("speed_unit", "kts").strip() or "kts"
-            temp_is_disa = row.get("temp_is_delta_isa", "true").strip().lower()
-            temp_is_disa = temp_is_disa in ("true", "1", "yes", "")
-
-            atmo = Atmo(
-                hp=hp, temperature=temperature,
-                temp_is_delta_isa=temp_is_disa,
-                alt_unit=alt_unit, temp_unit=temp_unit,
-            )
-            spd = Speed(speed_value, speed_type, speed_unit=speed_unit)
-            converters = {"cas": spd.to_cas, "eas": spd.to_eas,
-                          "tas": spd.to_tas, "mach": spd.to_mach}
-            result = converters[args.to_type](atmo)
-
-            row[result_col] = f"{result:.4f}"
-            rows.append(row)
-
-    with open(args.output, "w", newline="") as f_out:
-        writer = csv.DictWriter(f_out, fieldnames=out_fields)
-        writer.writeheader()
-        writer.writerows(rows)
-
-    print(f"Processed {len(rows)} rows -> {args.output}")
+    from . import _batch
+
+    csv_only = (_batch.file_format(args.input, args.record_dtype) == "csv"
+                and _batch.file_format(args.output) == "csv")
+    if args.workers > 1 and not csv_only:
+        print("Error: --workers needs CSV input and output", file=sys.stderr)
+        sys.exit(1)
+    if args.workers > 1 and args.chunk_size is not None:
+        # Workers convert blocks of about 4 MB, which already bounds memory
+        print("Error: --chunk-size cannot be combined with --workers", file=sys.stderr)
+        sys.exit(1)
+    record_dtype = None
+    if args.record_dtype is not None:
+        try:
+            record_dtype = _batch.parse_record_dtype(args.record_dtype)
+        except ValueError as exc:
+            print(f"Error: {exc}", file=sys.stderr)
+            sys.exit(1)
+
+    progress = None
+    if args.chunk_size is not None or args.workers > 1:
+        progress = _batch.Progress.for_file(args.input)
+
+    if args.workers > 1:
+        n_rows = _batch.run_parallel(args.input, args.output, args.to_type,
+                                     workers=args.workers, progress=progress,
+                                     decimals=args.precision)
+    elif csv_only:
+        n_rows = _batch.run(args.input, args.output, args.to_type,
+                            chunk_size=args.chunk_size, progress=progress,
+                            decimals=args.precision)
+    else:
+        n_rows = _batch.run_columns(args.input, args.output, args.to_type,
+                                    chunk_size=args.chunk_size, progress=progress,
+                                    decimals=args.precision, record_dtype=record_dtype)
+
+    print(f"Processed {n_rows} rows -> {args.output}")
+
+
+def _cmd_table(args):
+    from .table import make_table
+
+    try:
+        table = make_table(args.hp, args.disa, args.speed, args.from_type,
+                           columns=args.columns, alt_unit=args.alt_unit,
+                           temp_unit=args.temp_unit, speed_unit=args.speed_unit)
+        table.save(args.output, fmt=args.format, decimals=args.precision)
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        sys.exit(1)
+    shape = " x ".join(str(n) for n in table.shape)
+    print(f"Wrote {table.size} rows ({shape}) -> {args.output}")
+
+
+def _cmd_serve(args):
+    from . import server
+
+    server.run(path=args.socket, host=args.host, port=args.port,
+               batch_window=args.batch_window / 1000.0, max_batch=args.max_batch)
+
+
+def _positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer: {text}")
+    return value
+
+
+def _non_negative_int(text):
+    value = int(text)
+    if value < 0:
+        raise argparse.ArgumentTypeError(f"must be a non-negative integer: {text}")
+    return value
+
+
+def _axis(text):
+    """Axis values from START:STOP:STEP (STOP included), a list or a value."""
+    try:
+        if ":" not in text:
+            return [float(value) for value in text.split(",")]
+        start, stop, step = (float(value) for value in text.split(":"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid axis: {text}") from None
+    if step <= 0 or stop < start:
+        raise argparse.ArgumentTypeError(f"axis needs START <= STOP and STEP > 0: {text}")
+    # Tolerate rounding, so 0:1:0.1 ends at 1
+    n = int((stop - start) / step + 1e-9) + 1
+    return [start + i * step for i in range(n)]
 
 
 if __name__ == "__main__":
@@ -3,6 +3,13 @@
 # Altitude limits
 HEIGHT_TROPOPAUSE_FT = 11_000 / 0.3048  # 11000 m by definition, ~36089.24 ft
 HEIGHT_STRATOPAUSE_FT = 20_000 / 0.3048  # 20000 m by definition, ~65617 ft
+HEIGHT_TOP_FT = 84_852 / 0.3048  # 86 km geometric = 84852 m geopotential, ~278386 ft
+
+# The seven layers of the 1976 atmosphere: base geopotential altitude (m)
+# and temperature gradient (K/m). Temperature is linear in altitude within
+# each layer and continuous across layer bases.
+LAYER_BASES_M = (0.0, 11_000.0, 20_000.0, 32_000.0, 47_000.0, 51_000.0, 71_000.0)
+LAYER_GRADIENTS_K_PER_M = (-0.0065, 0.0, 0.001, 0.0028, 0.0, -0.0028, -0.002)
 
 # Troposphere lapse rates
 LAPSE_RATE_C_PER_FT = 0.0019812  # °C/ft
@@ -27,9 +34,19 @@ TROPOPAUSE_CONST_US = 20805.7  # R * Ttrop / g0
 TROPOSPHERE_DELTA_EXP = 5.25588
 DELTA_AT_TROPOPAUSE = 0.22336
 
+# Gas constant of air and standard gravity, for the layers above 20 km
+GAS_CONSTANT_AIR = 287.05287  # J/(kg·K)
+GRAVITY_STD = 9.80665  # m/s²
+
 # Sea level standard pressures
 PRESSURE_SL_STD_INHG = 29.92  # inHg
 PRESSURE_SL_STD_HPA = 1013.25  # hPa
+PRESSURE_SL_STD_PA = 101325.0  # Pa
+PRESSURE_SL_STD_PSF = 2116.22  # lbf/ft²
+
+# Sea level standard densities
+DENSITY_SL_STD_KG_M3 = 1.225  # kg/m³
+DENSITY_SL_STD_SLUG_FT3 = 0.0023769  # slug/ft³
 
 # Pressure altitude calculation
 PRESSURE_CALC_CONST = 145442.15  # ft
@@ -1,7 +1,13 @@
-"""Unit conversion functions for length and speed. All functions accept scalars or numpy arrays."""
+"""Unit conversion functions for length and speed. All functions accept scalars or numpy arrays.
+
+Each function takes an optional ``out`` array that receives the result in
+place, with the same shape and dtype rules as a NumPy ufunc.
+"""
 
 import numpy as np
 
+from . import _buffers
+from .profiling import instrument
 from .units import LengthUnit, SpeedUnit
 
 # Length conversion constants
@@ -15,68 +21,101 @@ _KTS_TO_MPS = 0.51444
 _KTS_TO_KMH = 1.8520
 _KTS_TO_MPH = 1.1508
 
+# Unit -> (multiply, divide) factors, applied in that order. The tables are
+# keyed by enum members, which also match the plain unit strings.
+_TO_FEET = {
+    LengthUnit.FT: (None, None),
+    LengthUnit.M: (None, _METERS_PER_FOOT),
+    LengthUnit.KM: (1000.0, _METERS_PER_FOOT),
+    LengthUnit.SM: (_FEET_PER_STATUTE_MILE, None),
+    LengthUnit.NM: (_FEET_PER_NAUTICAL_MILE, None),
+}
+_FROM_FEET = {
+    LengthUnit.FT: (None, None),
+    LengthUnit.M: (_METERS_PER_FOOT, None),
+    LengthUnit.KM: (_METERS_PER_FOOT, 1000.0),
+    LengthUnit.SM: (None, _FEET_PER_STATUTE_MILE),
+    LengthUnit.NM: (None, _FEET_PER_NAUTICAL_MILE),
+}
+_TO_KNOTS = {
+    SpeedUnit.KTS: (None, None),
+    SpeedUnit.FPS: (None, _KTS_TO_FPS),
+    SpeedUnit.MPH: (None, _KTS_TO_MPH),
+    SpeedUnit.MPS: (None, _KTS_TO_MPS),
+    SpeedUnit.KMH: (None, _KTS_TO_KMH),
+}
+_FROM_KNOTS = {
+    SpeedUnit.KTS: (None, None),
+    SpeedUnit.FPS: (_KTS_TO_FPS, None),
+    SpeedUnit.MPH: (_KTS_TO_MPH, None),
+    SpeedUnit.MPS: (_KTS_TO_MPS, None),
+    SpeedUnit.KMH: (_KTS_TO_KMH, None),
+}
+
 
-def length_to_feet(value, from_unit):
+@instrument
+def length_to_feet(value, from_unit, out=None):
     """Convert a length value to feet."""
-    from_unit = LengthUnit(from_unit)
-    if from_unit == LengthUnit.FT:
-        return value
-    if from_unit == LengthUnit.M:
-        return value / _METERS_PER_FOOT
-    if from_unit == LengthUnit.KM:
-        return value * 1000.0 / _METERS_PER_FOOT
-    if from_unit == LengthUnit.SM:
-        return value * _FEET_PER_STATUTE_MILE
-    if from_unit == LengthUnit.NM:
-        return value * _FEET_PER_NAUTICAL_MILE
+    return _scale(value, out, *_factors(_TO_FEET, from_unit, LengthUnit))
 
 
-def length_convert(value, from_unit, to_unit):
+@instrument
+def length_convert(value, from_unit, to_unit, out=None):
     """Convert a length value between any two units."""
-    to_unit = LengthUnit(to_unit)
-    feet = length_to_feet(value, from_unit)
-    if to_unit == LengthUnit.FT:
-        return feet
-    if to_unit == LengthUnit.M:
-        return feet * _METERS_PER_FOOT
-    if to_unit == LengthUnit.KM:
-        return feet * _METERS_PER_FOOT / 1000.0
-    if to_unit == LengthUnit.SM:
-        return feet / _FEET_PER_STATUTE_MILE
-    if to_unit == LengthUnit.NM:
-        return feet / _FEET_PER_NAUTICAL_MILE
-
-
-def speed_to_knots(value, from_unit):
+    scale = _factors(_FROM_FEET, to_unit, LengthUnit)
+    return _scale(length_to_feet(value, from_unit, out), out, *scale)
+
+
+@instrument
+def speed_to_knots(value, from_unit, out=None):
     """Convert a speed value to knots."""
-    from_unit = SpeedUnit(from_unit)
-    if from_unit == SpeedUnit.KTS:
-        return value
-    if from_unit == SpeedUnit.FPS:
-        return value / _KTS_TO_FPS
-    if from_unit == SpeedUnit.MPH:
-        return value / _KTS_TO_MPH
-    if from_unit == SpeedUnit.MPS:
-        return value / _KTS_TO_MPS
-    if from_unit == SpeedUnit.KMH:
-        return value / _KTS_TO_KMH
+    return _scale(value, out, *_factors(_TO_KNOTS, from_unit, SpeedUnit))
 
 
-def speed_from_knots(value_kts, to_unit):
+@instrument
+def speed_from_knots(value_kts, to_unit, out=None):
     """Convert a speed value from knots to another unit."""
-    to_unit = SpeedUnit(to_unit)
-    if to_unit == SpeedUnit.KTS:
-        return value_kts
-    if to_unit == SpeedUnit.FPS:
-        return value_kts * _KTS_TO_FPS
-    if to_unit == SpeedUnit.MPH:
-        return value_kts * _KTS_TO_MPH
-    if to_unit == SpeedUnit.MPS:
-        return value_kts * _KTS_TO_MPS
-    if to_unit == SpeedUnit.KMH:
-        return value_kts * _KTS_TO_KMH
-
-
-def speed_convert(value, from_unit, to_unit):
+    return _scale(value_kts, out, *_factors(_FROM_KNOTS, to_unit, SpeedUnit))
+
+
+@instrument
+def speed_convert(value, from_unit, to_unit, out=None):
     """Convert a speed value between any two units."""
-    return speed_from_knots(speed_to_knots(value, from_unit), to_unit)
+    return speed_from_knots(speed_to_knots(value, from_unit, out), to_unit, out)
+
+
+def _factors(table, unit, enum):
+    """``(multiply, divide)`` entry of a factor table for a unit, for ``_scale``.
+
+    Raises:
+        ValueError: If ``unit`` is not a member of ``enum``.
+    """
+    try:
+        return table[unit]
+    except (KeyError, TypeError):
+        # Not a valid unit: let the enum raise its ValueError
+        return table[enum(unit)]
+
+
+def _scale(value, out, multiply=None, divide=None):
+    """``value * multiply / divide``, written into ``out`` if given.
+
+    Without ``out``, a unit that needs no scaling returns ``value`` itself.
+    """
+    if out is None:
+        if multiply is not None:
+            value = value * multiply
+        if divide is not None:
+            value = value / divide
+        return value
+    out = _buffers.output(out, np.shape(value))
+    if multiply is None and divide is None:
+        if value is not out:
+            np.copyto(out, value, casting="same_kind")
+        return out
+    if multiply is not None:
+        np.multiply(value, multiply, out=out)
+        value = out
+    if divide is not None:
+        np.divide(value, divide, out=out)
+    return out
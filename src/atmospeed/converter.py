@@ -0,0 +1,267 @@
+"""Prepared speed converters — types, units and kernels resolved once.
+
+``make_converter`` coerces the speed types and units, looks up their
+conversion factors and picks the conversion kernel up front. The returned
+``Converter`` then runs only the arithmetic on every call, so converting
+single points in a loop skips the enum coercion and unit dispatch that a
+fresh ``Atmo`` and ``Speed`` repeat for each point. ``Speed`` converts
+through the same objects.
+"""
+
+import functools
+
+import numpy as np
+
+from . import _buffers, _scalar
+from . import _speed_conv as sc
+from . import backend as _backend
+from . import cache as _cache
+from .atmo import Atmo
+from .convert import _FROM_KNOTS, _TO_FEET, _TO_KNOTS, _scale
+from .precision import as_float
+from .units import LengthUnit, SpeedType, SpeedUnit, TemperatureUnit
+
+# (input type, output type) -> (array kernel, pure-Python kernel for Python
+# floats, names of the AtmoState ratios they take after the value). Mach
+# inputs take the Mach number, all other inputs take knots. The numba
+# backend compiles each pure-Python kernel under its own name.
+_KERNELS = {
+    (SpeedType.CAS, SpeedType.EAS): (sc._kcas_to_keas, _scalar.kcas_to_keas, ("delta",)),
+    (SpeedType.CAS, SpeedType.TAS): (sc._kcas_to_ktas, _scalar.kcas_to_ktas, ("theta", "delta")),
+    (SpeedType.CAS, SpeedType.MACH): (sc._kcas_to_mach, _scalar.kcas_to_mach, ("delta",)),
+    (SpeedType.EAS, SpeedType.CAS): (sc._keas_to_kcas, _scalar.keas_to_kcas, ("delta",)),
+    (SpeedType.EAS, SpeedType.TAS): (sc._keas_to_ktas, _scalar.keas_to_ktas, ("sigma",)),
+    (SpeedType.EAS, SpeedType.MACH): (sc._keas_to_mach, _scalar.keas_to_mach, ("delta",)),
+    (SpeedType.TAS, SpeedType.CAS): (sc._ktas_to_kcas, _scalar.ktas_to_kcas, ("theta", "delta")),
+    (SpeedType.TAS, SpeedType.EAS): (sc._ktas_to_keas, _scalar.ktas_to_keas, ("sigma",)),
+    (SpeedType.TAS, SpeedType.MACH): (sc._ktas_to_mach, _scalar.ktas_to_mach, ("theta",)),
+    (SpeedType.MACH, SpeedType.CAS): (sc._mach_to_kcas, _scalar.mach_to_kcas, ("delta",)),
+    (SpeedType.MACH, SpeedType.EAS): (sc._mach_to_keas, _scalar.mach_to_keas, ("delta",)),
+    (SpeedType.MACH, SpeedType.TAS): (sc._mach_to_ktas, _scalar.mach_to_ktas, ("theta",)),
+}
+
+# Position of each ratio in the (isa, theta, delta, sigma) tuple of _scalar.state
+_RATIO_INDEX = {"theta": 1, "delta": 2, "sigma": 3}
+
+
+@functools.lru_cache(maxsize=256)
+def make_converter(from_type, to_type, speed_unit="kts", alt_unit="ft", temp_unit="C",
+                   temp_is_delta_isa=True):
+    """Create a converter from one speed type to another with fixed units.
+
+    Converters are cached, so calling ``make_converter`` again with the same
+    arguments returns the same object.
+
+    Args:
+        from_type: Input speed type: "cas", "eas", "tas" or "mach".
+        to_type: Output speed type.
+        speed_unit: Unit of the input and output speeds (default "kts").
+            Ignored for Mach.
+        alt_unit: Pressure altitude unit (default "ft").
+        temp_unit: Temperature unit (default "C").
+        temp_is_delta_isa: If True (default), temperatures are delta ISA
+            values. If False, they are OAT.
+
+    Returns:
+        Converter, called as ``converter(value, hp, temperature)``.
+
+    Raises:
+        ValueError: If a speed type or unit is unknown.
+    """
+    return Converter(from_type, to_type, speed_unit, alt_unit, temp_unit, temp_is_delta_isa)
+
+
+class Converter:
+    """Speed conversion between two speed types with every unit resolved.
+
+    Create converters with ``make_converter``. A call gives the same result
+    as ``Speed(value, from_type, speed_unit).to_<to_type>(Atmo(hp,
+    temperature, ...))`` with the converter's units. Single points take a
+    pure-Python path; arrays go through ``Atmo`` and the array kernels.
+    """
+
+    __slots__ = ("_from_type", "_to_type", "_speed_unit", "_alt_unit", "_temp_unit",
+                 "_temp_is_delta_isa", "_to_knots", "_from_knots", "_to_feet",
+                 "_temp_scales", "_scalar_kernel", "_point_kernel")
+
+    def __init__(self, from_type, to_type, speed_unit="kts", alt_unit="ft", temp_unit="C",
+                 temp_is_delta_isa=True):
+        self._from_type = SpeedType(from_type)
+        self._to_type = SpeedType(to_type)
+        self._speed_unit = SpeedUnit(speed_unit)
+        self._alt_unit = LengthUnit(alt_unit)
+        self._temp_unit = TemperatureUnit(temp_unit)
+        self._temp_is_delta_isa = temp_is_delta_isa
+
+        self._to_knots = _TO_KNOTS[self._speed_unit]
+        self._from_knots = _FROM_KNOTS[self._speed_unit]
+        self._to_feet = _TO_FEET[self._alt_unit]
+        self._temp_scales = _scalar.temp_scales(self._temp_unit)
+        if self._from_type == self._to_type:
+            self._scalar_kernel = self._point_kernel = None
+        else:
+            _, kernel, ratios = _KERNELS[self._from_type, self._to_type]
+            self._scalar_kernel = kernel
+            self._point_kernel = _bind(kernel, [_RATIO_INDEX[name] for name in ratios])
+
+    def __repr__(self):
+        return (f"Converter({self._from_type} -> {self._to_type}, "
+                f"speed_unit={self._speed_unit}, alt_unit={self._alt_unit}, "
+                f"temp_unit={self._temp_unit}, is_delta_isa={self._temp_is_delta_isa})")
+
+    @property
+    def from_type(self):
+        return self._from_type
+
+    @property
+    def to_type(self):
+        return self._to_type
+
+    @property
+    def speed_unit(self):
+        return self._speed_unit
+
+    @property
+    def alt_unit(self):
+        return self._alt_unit
+
+    @property
+    def temp_unit(self):
+        return self._temp_unit
+
+    @property
+    def temp_is_delta_isa(self):
+        return self._temp_is_delta_isa
+
+    def __call__(self, value, hp, temperature=0.0, out=None):
+        """Convert speeds at the given pressure altitudes and temperatures.
+
+        Args:
+            value: Speed value (scalar or array).
+            hp: Pressure altitude (scalar or array).
+            temperature: Delta ISA, or OAT for an OAT converter (default 0).
+            out: Optional array to write the result into, with NumPy ufunc
+                shape and dtype rules.
+
+        Returns:
+            Converted speed in the converter's speed unit (Mach is
+            unitless), ``out`` if given.
+
+        Raises:
+            ValueError: If any altitude is above 86 km.
+        """
+        if out is None and _scalar.is_scalar(value, hp, temperature):
+            try:
+                return self._point(value, hp, temperature)
+            except (ValueError, ArithmeticError):
+                # math raises where NumPy gives NaN or inf (such as OAT below
+                # absolute zero); the array path gives those, or the error
+                pass
+        atmo = Atmo(hp, temperature, self._temp_is_delta_isa, self._alt_unit, self._temp_unit)
+        return self.at(value, atmo, out)
+
+    def at(self, value, atmo, out=None):
+        """Convert speeds at an existing ``Atmo``.
+
+        The converter's altitude and temperature settings are not used; the
+        ``Atmo`` carries its own.
+
+        Args:
+            value: Speed value (scalar or array).
+            atmo: Atmospheric state, scalar or broadcastable to ``value``.
+            out: Optional array to write the result into.
+
+        Returns:
+            Converted speed, as ``Speed.to_<type>`` returns it.
+        """
+        if not _scalar.is_scalar(value):
+            value = as_float(value)
+        return self._convert(value, self._source(value), atmo, out)
+
+    def _source(self, value):
+        """Kernel input: the Mach number itself, or the speed in knots."""
+        if self._from_type == SpeedType.MACH:
+            return value
+        return _scale(value, None, *self._to_knots)
+
+    def _point(self, value, hp, temperature):
+        """Single-point conversion on Python floats."""
+        hp_ft = _scalar.altitude_ft(_scale(hp, None, *self._to_feet))
+        scales = self._temp_scales
+        if not self._temp_is_delta_isa:
+            temperature = temperature - _scalar.isa_at(hp_ft, *scales[:2])
+        if self._scalar_kernel is None:
+            return value
+        result = self._point_kernel(self._source(value),
+                                    _scalar.state_at(hp_ft, temperature, *scales))
+        if self._to_type == SpeedType.MACH:
+            return result
+        return _scale(result, None, *self._from_knots)
+
+    def _convert(self, value, source, atmo, out=None):
+        """Convert ``value`` (``source`` in knots or Mach) at ``atmo``."""
+        if out is not None:
+            return self._convert_into(value, source, atmo, out)
+        if self._scalar_kernel is None:
+            return value
+        cache = _cache.active()
+        if cache is None or atmo.shape or np.ndim(source):
+            result = self._kernel(source, atmo)
+        else:
+            if self._from_type == SpeedType.MACH:
+                key = atmo._cache_key(cache, self._from_type, self._to_type, source)
+            else:
+                key = atmo._cache_key(cache, self._from_type, self._to_type, speed_kts=source)
+            result = cache.get(key, lambda: self._kernel(source, atmo))
+        if self._to_type == SpeedType.MACH:
+            return result
+        return _scale(result, None, *self._from_knots)
+
+    def _convert_into(self, value, source, atmo, out):
+        shape = np.broadcast_shapes(np.shape(value), atmo.shape)
+        ws = _buffers.Workspace(persistent=True)
+        dtype = np.result_type(source, atmo.snapshot().theta, 1.0)
+        result = _buffers.target(out, shape, ws, dtype)
+        if self._scalar_kernel is None:
+            np.copyto(result, value)
+        else:
+            self._kernel(source, atmo, result, ws)
+            if self._to_type != SpeedType.MACH:
+                _scale(result, result, *self._from_knots)
+        return _buffers.finish(out, result)
+
+    def _kernel(self, source, atmo, out=None, ws=None):
+        state = atmo.snapshot()
+        if out is None and _scalar.is_scalar(source, state.hp_ft):
+            try:
+                # (oat, theta, delta, sigma) lines up with _RATIO_INDEX
+                return self._point_kernel(source, state[3:7])
+            except (ValueError, ArithmeticError):
+                pass  # Outside the domain of math: NumPy gives NaN or inf
+        kernel, ratios = _array_kernel(self._from_type, self._to_type)
+        args = [getattr(state, name) for name in ratios]
+        if _backend.kernels() is None:
+            result = kernel(source, *args, out=out, ws=ws)
+        else:
+            result = kernel(source, *args, out=out)
+        return result if out is not None else _buffers.finish(None, result)
+
+
+def _bind(kernel, index):
+    """``kernel`` as a function of the value and a ``_scalar.state`` tuple."""
+    if len(index) == 1:
+        i, = index
+        return lambda source, state: kernel(source, state[i])
+    i, j = index
+    return lambda source, state: kernel(source, state[i], state[j])
+
+
+def _array_kernel(from_type, to_type):
+    """``_KERNELS`` array kernel and ratios, compiled by the active backend if it
+    is not NumPy.
+    """
+    kernel, scalar_kernel, ratios = _KERNELS[from_type, to_type]
+    nb = _backend.kernels()
+    if nb is not None:
+        kernel = getattr(nb, scalar_kernel.__name__)
+    return kernel, ratios
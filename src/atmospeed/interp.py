@@ -0,0 +1,198 @@
+"""Precomputed interpolation tables for the pressure ratio delta.
+
+An opt-in alternative to the exact 1976 formulas for callers that evaluate
+delta (and sigma, through delta) over very large altitude arrays. Build a
+``RatioTable`` once and pass it as ``table=`` to ``delta``, ``sigma`` or
+``Atmo``. Theta is linear in altitude within each layer and always uses the
+exact formula.
+"""
+
+import numpy as np
+
+from . import _atmos
+from ._buffers import Workspace
+from .constants import HEIGHT_TOP_FT, HEIGHT_TROPOPAUSE_FT, ZERO_C_IN_K
+
+_KINDS = ("linear", "cubic")
+
+# Interior points per interval sampled to estimate the interpolation error
+_ERROR_SAMPLES = 16
+
+# Elements evaluated per block, so the scratch buffers stay in cache
+_BLOCK_SIZE = 16384
+
+# The layer bases (LAYER_BASES_M) are all whole multiples of 1000 m
+_LAYER_STEP_FT = 1000.0 / 0.3048
+
+
+class RatioTable:
+    """Interpolation table for delta over pressure altitude.
+
+    Nodes are spaced uniformly in feet and aligned so that every layer base
+    is a node, so no interval straddles two layers: the spacing is
+    ``resolution`` rounded down to a whole fraction of 1000 m. Cubic tables
+    use Hermite interpolation with the exact derivative at every node;
+    linear tables interpolate the node values. Altitudes below
+    ``min_hp_ft`` fall back to the exact formulas.
+
+    Args:
+        resolution: Largest node spacing in feet (default 10).
+        kind: "linear" (default) or "cubic".
+        min_hp_ft: Lowest tabulated altitude in feet (default -2000).
+
+    Raises:
+        ValueError: If ``kind`` is unknown or ``resolution`` is not positive.
+    """
+
+    __slots__ = ("_resolution", "_kind", "_lo", "_inv_step", "_last", "_offset", "_coef",
+                 "_max_rel_error")
+
+    def __init__(self, resolution=10.0, kind="linear", min_hp_ft=-2000.0):
+        if kind not in _KINDS:
+            raise ValueError(f"Unknown interpolation kind: {kind!r} "
+                             f"(expected one of {', '.join(_KINDS)})")
+        if not resolution > 0:
+            raise ValueError("Table resolution must be positive")
+        resolution = _LAYER_STEP_FT / np.ceil(_LAYER_STEP_FT / resolution)
+        self._resolution = float(resolution)
+        self._kind = kind
+
+        below = int(np.ceil((HEIGHT_TROPOPAUSE_FT - min_hp_ft) / resolution))
+        above = int(np.ceil((HEIGHT_TOP_FT - HEIGHT_TROPOPAUSE_FT) / resolution))
+        nodes = HEIGHT_TROPOPAUSE_FT + resolution * np.arange(-below, above + 1)
+        self._lo = nodes[0]
+        self._inv_step = 1.0 / resolution
+        self._last = len(nodes) - 2
+        self._offset = -self._lo * self._inv_step
+
+        # Each interval uses the formula of the layer it lies in, evaluated
+        # at both of its ends
+        a, b = nodes[:-1], nodes[1:]
+        layer = np.searchsorted(_atmos._LAYER_BOUNDS_FT, 0.5 * (a + b))
+        y0, m0 = _layer_delta(a, layer)
+        y1, m1 = _layer_delta(b, layer)
+        if kind == "cubic":
+            m0 = m0 * resolution
+            m1 = m1 * resolution
+            coef = (y0, m0, 3.0 * (y1 - y0) - 2.0 * m0 - m1, 2.0 * (y0 - y1) + m0 + m1)
+        else:
+            slope = (y1 - y0) / resolution
+            coef = (y0 - slope * a, slope)
+        # Repeat the last interval so the top node needs no clipping
+        self._coef = tuple(np.append(c, c[-1]) for c in coef)
+        self._max_rel_error = None
+
+    def __repr__(self):
+        return f"RatioTable(resolution={self._resolution}, kind={self._kind!r})"
+
+    @property
+    def resolution(self):
+        """Node spacing in feet: the requested spacing rounded down."""
+        return self._resolution
+
+    @property
+    def kind(self):
+        return self._kind
+
+    @property
+    def max_rel_error(self):
+        """Maximum relative error of delta against the exact formulas.
+
+        Estimated once, on first access, by sampling every interval of the
+        table densely.
+        """
+        if self._max_rel_error is None:
+            t = np.arange(1, _ERROR_SAMPLES) / _ERROR_SAMPLES
+            hp_ft = (self._lo + self._resolution
+                     * (np.arange(self._last + 1)[:, np.newaxis] + t).ravel())
+            hp_ft = hp_ft[hp_ft <= HEIGHT_TOP_FT]
+            exact = _atmos.delta(hp_ft)
+            self._max_rel_error = float(np.max(np.abs(self.delta(hp_ft) / exact - 1.0)))
+        return self._max_rel_error
+
+    def delta(self, hp_ft, out=None, ws=None):
+        """Interpolated pressure ratio for validated altitudes in feet.
+
+        Args:
+            hp_ft: Pressure altitude array in feet, already validated.
+            out: Optional array to write into, which may be ``hp_ft``. The
+                table always evaluates in float64; other dtypes receive a
+                cast copy.
+            ws: Workspace to take the block scratch buffers from.
+
+        Returns:
+            Pressure ratio array.
+        """
+        hp_ft = np.asarray(hp_ft)
+        if out is None:
+            out = np.empty(hp_ft.shape)
+        ws = ws or Workspace()
+        flat_hp = hp_ft.reshape(-1)
+        # The altitudes are read again after the result is written, so an
+        # out that is the input gets a separate result buffer
+        direct = (out.flags.c_contiguous and out.shape == hp_ft.shape
+                  and out.dtype == np.float64 and not np.may_share_memory(out, hp_ft))
+        result = out.reshape(-1) if direct else np.empty(hp_ft.size)
+        below = flat_hp.size and flat_hp.min() < self._lo
+
+        size = min(flat_hp.size, _BLOCK_SIZE)
+        x = ws.get("interp.x", (size,))
+        index = ws.get("interp.index", (size,), np.intp)
+        scratch = ws.get("interp.scratch", (size,))
+        for start in range(0, flat_hp.size, _BLOCK_SIZE):
+            hp_block = flat_hp[start:start + _BLOCK_SIZE]
+            n = len(hp_block)
+            self._evaluate(hp_block, result[start:start + n], x[:n], index[:n],
+                           scratch[:n], below)
+
+        if below:
+            mask = flat_hp < self._lo
+            result[mask] = _atmos.delta(flat_hp[mask])
+        if not direct:
+            out[...] = result.reshape(hp_ft.shape)
+        return out
+
+    def _evaluate(self, hp_ft, out, x, index, scratch, clip):
+        np.multiply(hp_ft, self._inv_step, out=x)
+        np.add(x, self._offset, out=x)
+        # A NaN altitude casts to an arbitrary index, which take clips; the
+        # NaN then carries through x (cubic) or hp_ft (linear) to the result
+        with np.errstate(invalid="ignore"):
+            np.copyto(index, x, casting="unsafe")
+        if clip:
+            np.maximum(index, 0, out=index)
+
+        # Indices are in range; mode="clip" just stops take from buffering out
+        if self._kind == "cubic":
+            np.subtract(x, index, out=x)
+            c0, c1, c2, c3 = self._coef
+            np.take(c3, index, out=out, mode="clip")
+            for coef in (c2, c1, c0):
+                np.multiply(out, x, out=out)
+                np.add(out, np.take(coef, index, out=scratch, mode="clip"), out=out)
+        else:
+            intercept, slope = self._coef
+            np.take(slope, index, out=out, mode="clip")
+            np.multiply(out, hp_ft, out=out)
+            np.add(out, np.take(intercept, index, out=scratch, mode="clip"), out=out)
+
+
+def _layer_delta(hp_ft, layer):
+    """Exact delta and d(delta)/dh per element, using the layer given by ``layer``."""
+    layer = np.broadcast_to(layer, np.shape(hp_ft))
+
+    def param(values):
+        return np.asarray(values)[layer]
+
+    temp_k = param(_atmos._TEMPS_C) - hp_ft * param(_atmos._LAPSES_PER_FT_C) + ZERO_C_IN_K
+    exponent = param(_atmos._DELTA_EXPONENTS)
+    gradient = (param(_atmos._DELTA_BASES)
+                * np.power(temp_k / param(_atmos._TEMPS_K), exponent))
+    gradient_slope = -exponent * param(_atmos._LAPSES_PER_FT_C) / temp_k * gradient
+    height = param(_atmos._SCALE_HEIGHTS_FT)
+    isothermal = (param(_atmos._DELTA_BASES)
+                  * np.exp((param(_atmos._LAYER_BASES_FT) - hp_ft) / height))
+    isothermal_slope = -isothermal / height
+    is_isothermal = param(_atmos._ISOTHERMAL)
+    return (np.where(is_isothermal, isothermal, gradient),
+            np.where(is_isothermal, isothermal_slope, gradient_slope))
@@ -0,0 +1,83 @@
+"""Floating-point precision policy for array computations.
+
+The default "float64" policy computes every array in double precision.
+Under "float32", array inputs are converted to (or kept as) float32 and
+every kernel step, scratch buffer and result stays in single precision,
+halving memory and bandwidth for large datasets at the cost of accuracy
+(about 7 significant digits; see the README for the bound of each speed
+conversion). Scalar inputs always take the float64 pure-Python path.
+
+``set_precision`` changes the policy for the whole process;
+``use_precision`` overrides it within a ``with`` block for the current
+thread or task only.
+"""
+
+import contextlib
+import contextvars
+
+import numpy as np
+
+PRECISIONS = ("float64", "float32")
+
+_DTYPES = {"float64": np.dtype(np.float64), "float32": np.dtype(np.float32)}
+
+_default = "float64"
+_override = contextvars.ContextVar("atmospeed_precision", default=None)
+
+
+def set_precision(name):
+    """Select the floating-point precision of array computations.
+
+    Args:
+        name: "float64" (default) or "float32".
+
+    Returns:
+        The name of the precision now in use.
+
+    Raises:
+        ValueError: If ``name`` is not a known precision.
+    """
+    global _default
+    _default = _check(name)
+    return _default
+
+
+def get_precision():
+    """Name of the precision in use in the current context."""
+    return _override.get() or _default
+
+
+@contextlib.contextmanager
+def use_precision(name):
+    """Compute in ``name`` precision inside a ``with`` block.
+
+    The override applies to the current thread (or asyncio task) only and
+    is undone on exit.
+
+    Args:
+        name: "float64" or "float32".
+
+    Raises:
+        ValueError: If ``name`` is not a known precision.
+    """
+    token = _override.set(_check(name))
+    try:
+        yield
+    finally:
+        _override.reset(token)
+
+
+def float_dtype():
+    """NumPy dtype that array inputs are computed in under the current policy."""
+    return _DTYPES[get_precision()]
+
+
+def as_float(value):
+    """``value`` as an array of the current precision, copying only if needed."""
+    return np.asarray(value, dtype=float_dtype())
+
+
+def _check(name):
+    if name not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {name!r} (expected one of {', '.join(PRECISIONS)})")
+    return name
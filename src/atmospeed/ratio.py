@@ -1,24 +1,12 @@
 """Atmospheric ratio calculations: theta, delta, sigma. All functions accept scalars or numpy arrays."""
 
-import numpy as np
-
-from .constants import (
-    DELTA_AT_TROPOPAUSE,
-    HEIGHT_STRATOPAUSE_FT,
-    HEIGHT_TROPOPAUSE_FT,
-    TEMP_SL_STD_K,
-    TEMP_SL_STD_R,
-    TROPOSPHERE_DELTA_EXP,
-    TROPOPAUSE_CONST_US,
-    ZERO_C_IN_K,
-    ZERO_C_IN_R,
-)
-from .convert import length_to_feet
-from .temperature import _validate_altitude, oat
+from . import _atmos, _buffers, _scalar
+from .profiling import instrument
 from .units import TemperatureUnit
 
 
-def theta(hp, delta_isa=0, alt_unit="ft", temp_unit="C"):
+@instrument
+def theta(hp, delta_isa=0, alt_unit="ft", temp_unit="C", out=None):
     """Calculate temperature ratio (theta = T / T_SL_std).
 
     Args:
@@ -26,55 +14,50 @@ def theta(hp, delta_isa=0, alt_unit="ft", temp_unit="C"):
         delta_isa: Temperature deviation from ISA (default 0).
         alt_unit: Altitude unit (default "ft").
         temp_unit: Temperature unit (default "C").
+        out: Optional array to write the result into, with NumPy ufunc
+            shape and dtype rules. Repeated calls with the same ``out``
+            reuse internal scratch and allocate nothing.
 
     Returns:
-        Temperature ratio theta.
+        Temperature ratio theta (``out`` if given).
     """
+    if out is None and _scalar.is_scalar(hp, delta_isa):
+        return _scalar.theta(_scalar.altitude_ft(hp, alt_unit), delta_isa, temp_unit)
     temp_unit = TemperatureUnit(temp_unit)
-    hp_ft = np.asarray(length_to_feet(hp, alt_unit), dtype=float)
-    _validate_altitude(hp_ft)
-
-    oat_val = oat(hp_ft, delta_isa, alt_unit="ft", temp_unit=temp_unit)
-
-    if temp_unit == TemperatureUnit.C:
-        return (oat_val + ZERO_C_IN_K) / TEMP_SL_STD_K
-    elif temp_unit == TemperatureUnit.F:
-        return (oat_val + ZERO_C_IN_R) / TEMP_SL_STD_R
-    elif temp_unit == TemperatureUnit.K:
-        return oat_val / TEMP_SL_STD_K
-    elif temp_unit == TemperatureUnit.R:
-        return oat_val / TEMP_SL_STD_R
+    ws = _buffers.Workspace(persistent=out is not None)
+    hp_ft = _atmos.altitude_ft(hp, alt_unit, ws)
+    result = _buffers.target(out, _buffers.result_shape(hp_ft, delta_isa), ws, hp_ft.dtype)
+    return _finish(out, _atmos.theta(hp_ft, delta_isa, temp_unit, result, ws))
 
 
-def delta(hp, alt_unit="ft"):
+@instrument
+def delta(hp, alt_unit="ft", table=None, out=None):
     """Calculate pressure ratio (delta = P / P_SL_std).
 
     Args:
         hp: Pressure altitude (scalar or array).
         alt_unit: Altitude unit (default "ft").
+        table: Optional ``RatioTable`` to interpolate from instead of
+            evaluating the exact formulas.
+        out: Optional array to write the result into, with NumPy ufunc
+            shape and dtype rules. Repeated calls with the same ``out``
+            reuse internal scratch and allocate nothing.
 
     Returns:
-        Pressure ratio delta.
+        Pressure ratio delta (``out`` if given).
     """
-    hp_ft = np.asarray(length_to_feet(hp, alt_unit), dtype=float)
-    _validate_altitude(hp_ft)
-
-    in_tropo = hp_ft <= HEIGHT_TROPOPAUSE_FT
-
-    # Troposphere: delta = theta^5.25588 (at ISA, delta_isa=0)
-    theta_isa = theta(hp_ft, delta_isa=0, alt_unit="ft", temp_unit="C")
-    tropo_delta = np.power(theta_isa, TROPOSPHERE_DELTA_EXP)
-
-    # Stratosphere: delta = delta_trop * exp((h_trop - h) / const)
-    strato_delta = DELTA_AT_TROPOPAUSE * np.exp(
-        (HEIGHT_TROPOPAUSE_FT - hp_ft) / TROPOPAUSE_CONST_US
-    )
-
-    result = np.where(in_tropo, tropo_delta, strato_delta)
-    return result.item() if np.ndim(result) == 0 else result
-
-
-def sigma(hp, delta_isa=0, alt_unit="ft", temp_unit="C"):
+    if out is None and table is None and _scalar.is_scalar(hp):
+        return _scalar.delta(_scalar.altitude_ft(hp, alt_unit))
+    ws = _buffers.Workspace(persistent=out is not None)
+    hp_ft = _atmos.altitude_ft(hp, alt_unit, ws)
+    result = _buffers.target(out, hp_ft.shape, ws, hp_ft.dtype)
+    if table is not None:
+        return _finish(out, table.delta(hp_ft, result, ws))
+    return _finish(out, _atmos.delta(hp_ft, result, ws))
+
+
+@instrument
+def sigma(hp, delta_isa=0, alt_unit="ft", temp_unit="C", table=None, out=None):
     """Calculate density ratio (sigma = rho / rho_SL_std = delta / theta).
 
     Args:
@@ -82,10 +65,24 @@ def sigma(hp, delta_isa=0, alt_unit="ft", temp_unit="C"):
         delta_isa: Temperature deviation from ISA (default 0).
         alt_unit: Altitude unit (default "ft").
         temp_unit: Temperature unit (default "C").
+        table: Optional ``RatioTable`` to interpolate delta from.
+        out: Optional array to write the result into, with NumPy ufunc
+            shape and dtype rules. Repeated calls with the same ``out``
+            reuse internal scratch and allocate nothing.
 
     Returns:
-        Density ratio sigma.
+        Density ratio sigma (``out`` if given).
     """
-    return delta(hp, alt_unit=alt_unit) / theta(
-        hp, delta_isa=delta_isa, alt_unit=alt_unit, temp_unit=temp_unit
-    )
+    if out is None and table is None and _scalar.is_scalar(hp, delta_isa):
+        return _scalar.state(_scalar.altitude_ft(hp, alt_unit), delta_isa, temp_unit)[3]
+    temp_unit = TemperatureUnit(temp_unit)
+    ws = _buffers.Workspace(persistent=out is not None)
+    hp_ft = _atmos.altitude_ft(hp, alt_unit, ws)
+    result = _buffers.target(out, _buffers.result_shape(hp_ft, delta_isa), ws, hp_ft.dtype)
+    return _finish(out, _atmos.state(hp_ft, delta_isa, temp_unit, table, result, ws).sigma)
+
+
+def _finish(out, result):
+    if out is None:
+        return result.item() if result.ndim == 0 else result
+    return _buffers.finish(out, result)
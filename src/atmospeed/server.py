@@ -0,0 +1,423 @@
+"""Conversion server behind ``atmospeed serve``, and a client for it.
+
+The server keeps one process warm and answers newline-delimited JSON
+requests over a Unix domain socket or a TCP port, so a query costs a round
+trip instead of an interpreter start. Each request is one JSON object per
+line and gets one JSON object back per line, in request order:
+
+    {"id": 1, "op": "convert", "hp": 31000, "temp": 0, "speed": 250,
+     "from": "cas", "to": "tas"}
+    {"id": 1, "result": 400.2...}
+
+``op`` is "convert", "atmo", "pressure-alt" or "stats". Field names and
+defaults follow the CLI options of the same subcommand. An "id", if given,
+is echoed back; a failed request gets an "error" message instead of a
+"result". Numeric fields must be finite, and results that are not a
+number (such as the speed of sound below absolute zero) come back as null.
+
+Requests that arrive together, from any number of connections, are
+grouped by operation and units and computed as one array call; a
+``batch_window`` makes the server wait that long for more requests. A
+request that fails does not affect the others in its batch.
+"""
+
+import asyncio
+import collections
+import contextlib
+import json
+import math
+import signal
+import socket
+import sys
+import time
+
+import numpy as np
+
+from .altitude import pressure_altitude
+from .atmo import Atmo
+from .speed import SpeedArray
+from .units import LengthUnit, PressureUnit, SpeedType, SpeedUnit, TemperatureUnit
+
+# Number of recent request latencies kept for the percentiles
+LATENCY_WINDOW = 100_000
+
+
+class Server:
+    """A running conversion server, created by ``start_server``.
+
+    Use it as an async context manager, or call ``close`` and
+    ``wait_closed`` when done.
+    """
+
+    def __init__(self, batch_window, max_batch):
+        self._batcher = _Batcher(batch_window, max_batch)
+        self._latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self._requests = 0
+        self._errors = 0
+        self._server = None
+        self._writers = set()
+        self._closed = asyncio.Event()
+        self.address = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+        await self.wait_closed()
+
+    def stats(self):
+        """Request counts, batch sizes and latency percentiles in ms."""
+        latencies = np.array(self._latencies) * 1e3
+        if latencies.size:
+            p50, p90, p99 = np.percentile(latencies, [50, 90, 99]).tolist()
+            latency = {"p50": p50, "p90": p90, "p99": p99, "max": float(latencies.max())}
+        else:
+            latency = {"p50": None, "p90": None, "p99": None, "max": None}
+        batches, items = self._batcher.batches, self._batcher.items
+        return {
+            "requests": self._requests,
+            "errors": self._errors,
+            "batches": batches,
+            "mean_batch": items / batches if batches else 0.0,
+            "latency_ms": latency,
+        }
+
+    async def serve_forever(self):
+        """Serve until ``close`` is called."""
+        await self._closed.wait()
+
+    def close(self):
+        """Stop accepting connections and close the open ones."""
+        if self._server is not None:
+            self._server.close()
+        for writer in self._writers:
+            writer.close()
+        self._closed.set()
+
+    async def wait_closed(self):
+        if self._server is not None:
+            await self._server.wait_closed()
+
+    async def _start(self, path, host, port):
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle, path)
+            self.address = path
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+            self.address = self._server.sockets[0].getsockname()[:2]
+
+    async def _handle(self, reader, writer):
+        self._writers.add(writer)
+        responses = asyncio.Queue()
+        sender = asyncio.create_task(self._send(responses, writer))
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    responses.put_nowait((self._submit(line), time.perf_counter()))
+        except (ConnectionError, ValueError):
+            pass  # client went away, or sent a line over the stream limit
+        finally:
+            responses.put_nowait(None)
+            await sender
+            self._writers.discard(writer)
+            writer.close()
+
+    def _submit(self, line):
+        """Start answering one request line; returns ``(id, future)``."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+        except ValueError as exc:
+            future.set_result({"error": f"Invalid request: {exc}"})
+            return None, future
+        if request.get("op") == "stats":
+            future.set_result({"result": self.stats()})
+        else:
+            self._batcher.submit(request, future)
+        return request.get("id"), future
+
+    async def _send(self, responses, writer):
+        while (item := await responses.get()) is not None:
+            (request_id, future), start = item
+            response = await future
+            self._requests += 1
+            self._errors += "error" in response
+            self._latencies.append(time.perf_counter() - start)
+            if request_id is not None:
+                response = {"id": request_id, **response}
+            try:
+                writer.write(json.dumps(response, allow_nan=False).encode() + b"\n")
+                if responses.empty():
+                    await writer.drain()
+            except ConnectionError:
+                pass  # keep consuming so the reader can finish
+
+
+async def start_server(path=None, host="127.0.0.1", port=None, batch_window=0.0,
+                       max_batch=4096):
+    """Start a conversion server.
+
+    Args:
+        path: Unix domain socket path. Give either this or ``port``.
+        host: TCP host to bind (default 127.0.0.1).
+        port: TCP port to listen on; 0 picks a free port (see ``address``).
+        batch_window: Seconds to wait for more requests before computing a
+            batch. The default 0 batches the requests read in the same
+            event-loop iteration, which adds no latency.
+        max_batch: Number of requests that triggers a batch immediately.
+
+    Returns:
+        The running ``Server``.
+
+    Raises:
+        ValueError: If neither or both of ``path`` and ``port`` are given,
+            or ``batch_window`` or ``max_batch`` is out of range.
+    """
+    if (path is None) == (port is None):
+        raise ValueError("Give either a socket path or a TCP port")
+    if batch_window < 0 or max_batch < 1:
+        raise ValueError("batch_window must be >= 0 and max_batch >= 1")
+    server = Server(batch_window, max_batch)
+    await server._start(path, host, port)
+    return server
+
+
+def run(path=None, host="127.0.0.1", port=None, batch_window=0.0, max_batch=4096,
+        stream=None):
+    """Serve until interrupted, then print the request statistics.
+
+    Blocks the calling thread. SIGINT and SIGTERM stop the server.
+
+    Args:
+        path, host, port, batch_window, max_batch: See ``start_server``.
+        stream: Stream for the status messages (default stderr).
+    """
+    stream = stream if stream is not None else sys.stderr
+
+    async def main():
+        server = await start_server(path, host, port, batch_window, max_batch)
+        loop = asyncio.get_running_loop()
+        with contextlib.suppress(NotImplementedError):
+            loop.add_signal_handler(signal.SIGTERM, server.close)
+        address = path if path is not None else "{}:{}".format(*server.address)
+        print(f"Listening on {address}", file=stream, flush=True)
+        try:
+            await server.serve_forever()
+        finally:
+            server.close()
+            await server.wait_closed()
+            print(format_stats(server.stats()), file=stream)
+
+    with contextlib.suppress(KeyboardInterrupt):
+        asyncio.run(main())
+
+
+def format_stats(stats):
+    """One-line summary of ``Server.stats()``."""
+    text = (f"{stats['requests']} requests, {stats['errors']} errors, "
+            f"{stats['batches']} batches (mean size {stats['mean_batch']:.1f})")
+    latency = stats["latency_ms"]
+    if latency["p50"] is not None:
+        text += (f", latency p50 {latency['p50']:.3f} ms, p90 {latency['p90']:.3f} ms, "
+                 f"p99 {latency['p99']:.3f} ms, max {latency['max']:.3f} ms")
+    return text
+
+
+def request(payload, path=None, host="127.0.0.1", port=None, timeout=10.0):
+    """Send requests to a running server and return its responses.
+
+    All requests go out over one connection before the responses are read,
+    so they can be computed as one batch.
+
+    Args:
+        payload: One request dict, or a list of them.
+        path: Unix domain socket path of the server. Give either this or
+            ``port``.
+        host: TCP host of the server (default 127.0.0.1).
+        port: TCP port of the server.
+        timeout: Socket timeout in seconds.
+
+    Returns:
+        The response dict, or a list of them in request order.
+
+    Raises:
+        ValueError: If neither or both of ``path`` and ``port`` are given.
+        ConnectionError: If the server closes the connection early.
+    """
+    if (path is None) == (port is None):
+        raise ValueError("Give either a socket path or a TCP port")
+    items = payload if isinstance(payload, list) else [payload]
+    if path is not None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        sock.connect(path)
+    else:
+        sock = socket.create_connection((host, port), timeout=timeout)
+
+    with sock, sock.makefile("rwb") as f:
+        f.write(b"".join(json.dumps(item).encode() + b"\n" for item in items))
+        f.flush()
+        responses = []
+        for _ in items:
+            line = f.readline()
+            if not line:
+                raise ConnectionError("Server closed the connection")
+            responses.append(json.loads(line))
+    return responses if isinstance(payload, list) else responses[0]
+
+
+class _Batcher:
+    """Collects requests for ``window`` seconds and computes them together."""
+
+    def __init__(self, window, max_batch):
+        self._window = window
+        self._max_batch = max_batch
+        self._pending = []
+        self._timer = None
+        self.batches = 0
+        self.items = 0
+
+    def submit(self, request, future):
+        self._pending.append((request, future))
+        if len(self._pending) >= self._max_batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self._window, self.flush)
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, []
+        try:
+            self._answer(pending)
+        finally:
+            # Whatever went wrong above, no client is left waiting
+            for _, future in pending:
+                _resolve(future, {"error": "Internal server error"})
+
+    def _answer(self, pending):
+        groups = {}
+        for request, future in pending:
+            try:
+                op, key, values = _parse(request)
+            except Exception as exc:
+                _resolve(future, {"error": _message(exc)})
+                continue
+            groups.setdefault((op, key), []).append((values, future))
+
+        for (op, key), items in groups.items():
+            self.batches += 1
+            self.items += len(items)
+            for future, response in zip((f for _, f in items),
+                                        _evaluate(op, key, [v for v, _ in items])):
+                _resolve(future, response)
+
+
+# Per operation: numeric fields, and (field, default, enum) for the fields
+# that select units. Requests are batched per distinct unit selection.
+_OPERATIONS = {
+    "convert": (("hp", "temp", "speed"),
+                (("oat", False, bool), ("alt_unit", "ft", LengthUnit),
+                 ("temp_unit", "C", TemperatureUnit), ("to", None, SpeedType))),
+    "atmo": (("hp", "temp"),
+             (("oat", False, bool), ("alt_unit", "ft", LengthUnit),
+              ("temp_unit", "C", TemperatureUnit))),
+    "pressure-alt": (("elevation", "altimeter"),
+                     (("elev_unit", "ft", LengthUnit),
+                      ("altimeter_unit", "inHg", PressureUnit))),
+}
+
+
+def _parse(request):
+    """Split a request into ``(op, unit selection, per-request values)``."""
+    op = request.get("op")
+    if op not in _OPERATIONS:
+        raise ValueError(f"Unknown op: {op!r} (expected one of "
+                         f"{', '.join([*_OPERATIONS, 'stats'])})")
+    numeric, selectors = _OPERATIONS[op]
+    values = [_number(request, name) for name in numeric]
+    key = []
+    for name, default, kind in selectors:
+        value = request.get(name, default)
+        if value is None:
+            raise KeyError(name)
+        if kind is bool and not isinstance(value, bool):
+            raise TypeError(f"Field {name!r} must be true or false")
+        key.append(value if kind is bool else kind(value))
+    if op == "convert":
+        values.append(SpeedType(request["from"]))
+        values.append(SpeedUnit(request.get("speed_unit", "kts")))
+    return op, tuple(key), values
+
+
+def _number(request, name):
+    value = request[name]
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise TypeError(f"Field {name!r} must be a number")
+    try:
+        value = float(value)
+    except OverflowError:
+        value = math.inf
+    if not math.isfinite(value):
+        raise ValueError(f"Field {name!r} must be a finite number")
+    return value
+
+
+def _evaluate(op, key, values):
+    """Responses for a group of requests sharing ``op`` and units.
+
+    If the vectorized call fails, each request is retried on its own, so
+    only the invalid ones get an error.
+    """
+    try:
+        return [{"result": _json_value(result)} for result in _compute(op, key, values)]
+    except Exception as exc:
+        if len(values) == 1:
+            return [{"error": _message(exc)}]
+    return [response for item in values for response in _evaluate(op, key, [item])]
+
+
+def _compute(op, key, values):
+    columns = list(zip(*values))
+    if op == "pressure-alt":
+        elev_unit, altimeter_unit = key
+        hp = pressure_altitude(np.array(columns[0]), np.array(columns[1]),
+                               elev_unit=elev_unit, altimeter_unit=altimeter_unit)
+        return hp.tolist()
+
+    oat, alt_unit, temp_unit = key[:3]
+    atmo = Atmo(hp=np.array(columns[0]), temperature=np.array(columns[1]),
+                temp_is_delta_isa=not oat, alt_unit=alt_unit, temp_unit=temp_unit)
+    if op == "convert":
+        speeds = SpeedArray(np.array(columns[2]), list(columns[3]), list(columns[4]))
+        return speeds.to(key[3], atmo).tolist()
+
+    # Every AtmoState field, with temperatures in the request's unit. Fields
+    # that are not a number (an OAT below absolute zero) become null
+    with np.errstate(invalid="ignore"):
+        state = atmo.snapshot()
+    columns = [value.tolist() for value in state]
+    return [dict(zip(state._fields, row)) for row in zip(*columns)]
+
+
+def _json_value(value):
+    """A result with NaN and infinite floats as None, which JSON has no numbers for."""
+    if isinstance(value, dict):
+        return {name: _json_value(item) for name, item in value.items()}
+    return value if math.isfinite(value) else None
+
+
+def _resolve(future, response):
+    # The future is cancelled if its connection closed while it waited
+    if not future.done():
+        future.set_result(response)
+
+
+def _message(exc):
+    if isinstance(exc, KeyError):
+        return f"Missing field: {exc.args[0]!r}"
+    return str(exc)
@@ -1,9 +1,13 @@
-"""Speed class — defines a speed value with type and unit, and converts between speed types."""
+"""Speed and SpeedArray — speed values with type and unit, and conversions between speed types."""
 
+import numpy as np
+
+from . import _buffers, _scalar
+from .precision import as_float
 from .atmo import Atmo
 from .convert import speed_convert, speed_from_knots, speed_to_knots
+from .converter import _array_kernel, make_converter
 from .units import SpeedType, SpeedUnit
-from . import _speed_conv as sc
 
 
 class Speed:
@@ -16,16 +20,25 @@ class Speed:
 
     Note:
         When converting to another speed type, the output unit matches
-        the input unit. Mach output is always unitless.
+        the input unit. Mach output is always unitless. Every ``to_*``
+        method takes an optional ``out`` array, with NumPy ufunc shape and
+        dtype rules; repeated conversions into the same ``out`` allocate
+        nothing once the atmosphere snapshot is cached.
     """
 
-    __slots__ = ("_value", "_type", "_unit", "_kts")
+    __slots__ = ("_value", "_type", "_unit", "_source")
 
     def __init__(self, value, speed_type, speed_unit="kts"):
         self._value = value
         self._type = SpeedType(speed_type)
         self._unit = SpeedUnit(speed_unit)
-        self._kts = speed_to_knots(value, self._unit)
+        if not _scalar.is_scalar(value):
+            value = as_float(value)
+        # Kernel input: the Mach number itself, or the speed in knots
+        if self._type == SpeedType.MACH:
+            self._source = value
+        else:
+            self._source = speed_to_knots(value, self._unit)
 
     def __repr__(self):
         return f"Speed({self._value} {self._type} {self._unit})"
@@ -42,61 +55,187 @@ class Speed:
     def speed_unit(self):
         return self._unit
 
-    def to_cas(self, atmo: Atmo) -> float:
+    def to_cas(self, atmo: Atmo, out=None) -> float:
         """Convert to Calibrated Airspeed at the given atmospheric point."""
-        if self._type == SpeedType.CAS:
-            return self._value
-        hp_ft = atmo.hp_ft
-        disa_c = atmo._disa_in_celsius()
-        if self._type == SpeedType.EAS:
-            result_kts = sc.keas_to_kcas(self._kts, hp_ft)
-        elif self._type == SpeedType.TAS:
-            result_kts = sc.ktas_to_kcas(self._kts, hp_ft, disa_c)
-        elif self._type == SpeedType.MACH:
-            result_kts = sc.mach_to_kcas(self._value, hp_ft)
-        return speed_from_knots(result_kts, self._unit)
-
-    def to_eas(self, atmo: Atmo) -> float:
+        return self._convert(SpeedType.CAS, atmo, out)
+
+    def to_eas(self, atmo: Atmo, out=None) -> float:
         """Convert to Equivalent Airspeed at the given atmospheric point."""
-        if self._type == SpeedType.EAS:
-            return self._value
-        hp_ft = atmo.hp_ft
-        disa_c = atmo._disa_in_celsius()
-        if self._type == SpeedType.CAS:
-            result_kts = sc.kcas_to_keas(self._kts, hp_ft)
-        elif self._type == SpeedType.TAS:
-            result_kts = sc.ktas_to_keas(self._kts, hp_ft, disa_c)
-        elif self._type == SpeedType.MACH:
-            result_kts = sc.mach_to_keas(self._value, hp_ft)
-        return speed_from_knots(result_kts, self._unit)
-
-    def to_tas(self, atmo: Atmo) -> float:
+        return self._convert(SpeedType.EAS, atmo, out)
+
+    def to_tas(self, atmo: Atmo, out=None) -> float:
         """Convert to True Airspeed at the given atmospheric point."""
-        if self._type == SpeedType.TAS:
-            return self._value
-        hp_ft = atmo.hp_ft
-        disa_c = atmo._disa_in_celsius()
-        if self._type == SpeedType.CAS:
-            result_kts = sc.kcas_to_ktas(self._kts, hp_ft, disa_c)
-        elif self._type == SpeedType.EAS:
-            result_kts = sc.keas_to_ktas(self._kts, hp_ft, disa_c)
-        elif self._type == SpeedType.MACH:
-            result_kts = sc.mach_to_ktas(self._value, hp_ft, disa_c)
-        return speed_from_knots(result_kts, self._unit)
-
-    def to_mach(self, atmo: Atmo) -> float:
+        return self._convert(SpeedType.TAS, atmo, out)
+
+    def to_mach(self, atmo: Atmo, out=None) -> float:
         """Convert to Mach number at the given atmospheric point."""
-        if self._type == SpeedType.MACH:
-            return self._value
-        hp_ft = atmo.hp_ft
-        disa_c = atmo._disa_in_celsius()
-        if self._type == SpeedType.CAS:
-            return sc.kcas_to_mach(self._kts, hp_ft)
-        elif self._type == SpeedType.EAS:
-            return sc.keas_to_mach(self._kts, hp_ft)
-        elif self._type == SpeedType.TAS:
-            return sc.ktas_to_mach(self._kts, hp_ft, disa_c)
+        return self._convert(SpeedType.MACH, atmo, out)
 
     def convert_unit(self, from_unit, to_unit) -> float:
         """Convert the speed value between units (e.g., knots to ft/s)."""
         return speed_convert(self._value, from_unit, to_unit)
+
+    def _convert(self, to_type, atmo, out=None):
+        converter = make_converter(self._type, to_type, self._unit)
+        return converter._convert(self._value, self._source, atmo, out)
+
+
+class SpeedArray:
+    """An array of speeds where every element has its own type and unit.
+
+    Conversions partition the elements by speed type, run each conversion
+    kernel once over its partition, and scatter the results back, so
+    heterogeneous data (CAS, EAS, TAS and Mach mixed in any units) converts
+    at vector speed.
+
+    Args:
+        values: Speed values (array-like).
+        speed_types: Speed type of each element: a single type, or an array
+            of "cas", "eas", "tas", "mach" broadcastable to ``values``.
+        speed_units: Speed unit of each element (default "kts"): a single
+            unit or an array broadcastable to ``values``. Ignored for Mach
+            elements.
+
+    Note:
+        As with ``Speed``, converted elements are returned in their own
+        input unit, Mach output is unitless, and elements already of the
+        target type are returned unchanged.
+    """
+
+    __slots__ = ("_values", "_type_codes", "_unit_codes", "_kts")
+
+    # Element codes index into these tuples
+    TYPES = tuple(SpeedType)
+    UNITS = tuple(SpeedUnit)
+
+    def __init__(self, values, speed_types, speed_units="kts"):
+        values = as_float(values)
+        self._init(values, _encode(speed_types, SpeedType, self.TYPES),
+                   _encode(speed_units, SpeedUnit, self.UNITS))
+
+    @classmethod
+    def from_codes(cls, values, type_codes, unit_codes):
+        """Create from integer codes indexing ``TYPES`` and ``UNITS``."""
+        type_codes = np.asarray(type_codes, dtype=np.intp)
+        unit_codes = np.asarray(unit_codes, dtype=np.intp)
+        for codes, members in ((type_codes, cls.TYPES), (unit_codes, cls.UNITS)):
+            if codes.size and (codes.min() < 0 or codes.max() >= len(members)):
+                raise ValueError(f"Codes must be in the range 0..{len(members) - 1}")
+        obj = cls.__new__(cls)
+        obj._init(as_float(values), type_codes, unit_codes)
+        return obj
+
+    def _init(self, values, type_codes, unit_codes):
+        values, type_codes, unit_codes = np.broadcast_arrays(
+            values, type_codes, unit_codes
+        )
+        self._values = values
+        self._type_codes = type_codes
+        self._unit_codes = unit_codes
+
+        self._kts = np.empty_like(values)
+        for unit, mask in _groups(unit_codes, self.UNITS):
+            self._kts[mask] = speed_to_knots(values[mask], unit)
+
+    def __repr__(self):
+        return f"SpeedArray(shape={self.shape})"
+
+    def __len__(self):
+        return len(self._values)
+
+    @property
+    def shape(self):
+        return self._values.shape
+
+    @property
+    def values(self):
+        return self._values
+
+    @property
+    def type_codes(self):
+        return self._type_codes
+
+    @property
+    def unit_codes(self):
+        return self._unit_codes
+
+    def to_cas(self, atmo: Atmo, out=None) -> np.ndarray:
+        """Convert every element to Calibrated Airspeed."""
+        return self.to(SpeedType.CAS, atmo, out)
+
+    def to_eas(self, atmo: Atmo, out=None) -> np.ndarray:
+        """Convert every element to Equivalent Airspeed."""
+        return self.to(SpeedType.EAS, atmo, out)
+
+    def to_tas(self, atmo: Atmo, out=None) -> np.ndarray:
+        """Convert every element to True Airspeed."""
+        return self.to(SpeedType.TAS, atmo, out)
+
+    def to_mach(self, atmo: Atmo, out=None) -> np.ndarray:
+        """Convert every element to Mach number."""
+        return self.to(SpeedType.MACH, atmo, out)
+
+    def to(self, speed_type, atmo: Atmo, out=None) -> np.ndarray:
+        """Convert every element to ``speed_type`` at the given atmospheric state.
+
+        Args:
+            speed_type: Target speed type.
+            atmo: Atmospheric state, scalar or broadcastable to this array.
+            out: Optional array to write the result into, with NumPy ufunc
+                shape and dtype rules. The per-type partitions still use
+                temporaries, so this saves the result allocation only.
+
+        Returns:
+            Array of converted values (``out`` if given).
+        """
+        to_type = SpeedType(speed_type)
+        shape = np.broadcast_shapes(self.shape, atmo.shape)
+        state = atmo.snapshot()
+        values = np.broadcast_to(self._values, shape)
+        kts = np.broadcast_to(self._kts, shape)
+        type_codes = np.broadcast_to(self._type_codes, shape)
+
+        dtype = np.result_type(kts, state.theta, 1.0)
+        if out is not None:
+            out = _buffers.output(out, shape, dtype)
+        direct = out is not None and out.shape == shape and out.dtype == dtype
+        result = out if direct else np.empty(shape, dtype)
+        converted = np.zeros(shape, dtype=bool)
+        for from_type, mask in _groups(type_codes, self.TYPES):
+            if from_type == to_type:
+                result[mask] = values[mask]
+                continue
+            source = values if from_type == SpeedType.MACH else kts
+            kernel, ratios = _array_kernel(from_type, to_type)
+            result[mask] = kernel(source[mask], *(
+                np.broadcast_to(getattr(state, name), shape)[mask] for name in ratios
+            ))
+            converted |= mask
+
+        if to_type != SpeedType.MACH:
+            unit_codes = np.broadcast_to(self._unit_codes, shape)
+            for unit, mask in _groups(unit_codes, self.UNITS):
+                mask &= converted
+                result[mask] = speed_from_knots(result[mask], unit)
+
+        return result if out is None else _buffers.finish(out, result)
+
+
+def _encode(labels, enum, members):
+    """Map a label or array of labels to integer codes indexing ``members``.
+
+    Enum coercion runs once per distinct label.
+    """
+    if np.ndim(labels) == 0:
+        return np.intp(members.index(enum(labels)))
+    uniques, inverse = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+    lookup = np.array([members.index(enum(label)) for label in uniques.tolist()],
+                      dtype=np.intp)
+    return lookup[inverse].reshape(np.shape(labels))
+
+
+def _groups(codes, members):
+    """Yield ``(member, mask)`` for every member present in ``codes``."""
+    counts = np.bincount(codes.reshape(-1), minlength=len(members))
+    for code in np.flatnonzero(counts):
+        yield members[code], codes == code
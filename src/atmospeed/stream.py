@@ -0,0 +1,324 @@
+"""Micro-batched enrichment of flight-data streams.
+
+``enrich_stream`` consumes an iterable of records (mappings of field name
+to value) or record batches (mappings of field name to 1-D array, or
+structured arrays), collects them into micro-batches, converts each batch
+with one vectorized ``Atmo`` and ``Speed``, and yields the records with
+speeds and atmosphere values added.
+
+A batch is converted once it holds ``max_batch`` records. With
+``max_latency`` set, the source is read in a background thread, and a batch
+is also converted once its oldest record has waited ``max_latency``
+seconds, even if the source stalls. A live stream then gets batch
+throughput when records arrive quickly, and a bounded delay when they
+trickle in.
+
+A record with an invalid value (such as an altitude above 86 km) does not
+fail its batch: if the vectorized conversion fails, the batch is split in
+halves until the failing records are isolated, and those get NaN outputs
+and an ``error`` message.
+"""
+
+import queue
+import threading
+import time
+from collections.abc import Mapping
+
+import numpy as np
+
+from .atmo import Atmo
+from .precision import as_float, float_dtype
+from .profiling import phase
+from .speed import Speed
+from .units import LengthUnit, SpeedType, SpeedUnit, TemperatureUnit
+
+REQUIRED_FIELDS = ("hp", "temperature", "speed_value")
+OUTPUT_FIELDS = ("cas", "eas", "tas", "mach", "delta_isa", "density_altitude",
+                 "speed_of_sound")
+
+DEFAULT_MAX_BATCH = 1024
+
+# Markers passed from the reader thread
+_END = object()
+_TIMEOUT = object()
+
+
+def enrich_stream(records, speed_type="cas", speed_unit="kts", alt_unit="ft", temp_unit="C",
+                  temp_is_delta_isa=False, max_batch=DEFAULT_MAX_BATCH, max_latency=None,
+                  batches=False):
+    """Add speeds and atmosphere values to a stream of flight-data records.
+
+    Every record needs the fields ``hp``, ``temperature`` and
+    ``speed_value``. Other fields, such as a timestamp, are passed through.
+    Each output record has the input fields followed by ``OUTPUT_FIELDS``:
+    the speed as CAS, EAS, TAS and Mach, the ISA deviation, the density
+    altitude and the speed of sound. A record that cannot be converted gets
+    NaN in those fields and an ``error`` field with the reason; the rest of
+    its batch is converted as usual.
+
+    Args:
+        records: Iterable of records (mappings of field to value) and/or
+            batches (mappings of field to 1-D array, or structured arrays).
+            A mapping whose ``hp`` is 1-D is a batch.
+        speed_type: Type of ``speed_value`` (default "cas").
+        speed_unit: Unit of ``speed_value``, of the output speeds and of
+            the speed of sound (default "kts").
+        alt_unit: Unit of ``hp`` and of the density altitude (default "ft").
+        temp_unit: Unit of ``temperature`` and ``delta_isa`` (default "C").
+        temp_is_delta_isa: If False (default), ``temperature`` is OAT. If
+            True, it is delta ISA.
+        max_batch: Maximum number of records converted together (default
+            ``DEFAULT_MAX_BATCH``).
+        max_latency: Maximum number of seconds a record waits for its batch
+            to fill. None (default) waits for ``max_batch`` records or the
+            end of the stream.
+        batches: If True, yield each converted batch as a dict of field to
+            1-D array instead of one dict per record. A batch with failed
+            records also has an ``error`` array, None for the others.
+
+    Returns:
+        Generator of enriched records (or batches), in input order. If
+        ``records`` raises, the records read before are yielded first and
+        the exception is then raised again.
+
+    Raises:
+        ValueError: If ``max_batch``, ``max_latency`` or a unit is invalid,
+            or (while iterating) a record lacks a required field, records
+            have different fields, or a batch has columns of different
+            lengths.
+    """
+    if max_batch < 1:
+        raise ValueError("max_batch must be at least 1")
+    if max_latency is not None and max_latency < 0:
+        raise ValueError("max_latency must not be negative")
+    speed_type = SpeedType(speed_type)
+    # Invalid units would otherwise fail every record of every batch
+    speed_unit, alt_unit, temp_unit = (SpeedUnit(speed_unit), LengthUnit(alt_unit),
+                                       TemperatureUnit(temp_unit))
+    atmo_args = dict(temp_is_delta_isa=temp_is_delta_isa, alt_unit=alt_unit, temp_unit=temp_unit)
+
+    def convert(columns):
+        return _convert(columns, speed_type, speed_unit, atmo_args, batches)
+
+    if max_latency is None:
+        return _sized(records, convert, max_batch)
+    return _timed(records, convert, max_batch, max_latency)
+
+
+def _sized(records, convert, max_batch):
+    """Batches of ``max_batch`` records, then the rest at the end."""
+    pending = _Pending()
+    items = iter(records)
+    while True:
+        try:
+            item = next(items)
+        except StopIteration:
+            break
+        except Exception:
+            # Records read before the failure are still delivered
+            yield from _drain(pending, convert)
+            raise
+        pending.add(item)
+        while len(pending) >= max_batch:
+            yield from convert(pending.take(max_batch))
+    yield from _drain(pending, convert)
+
+
+def _timed(records, convert, max_batch, max_latency):
+    """Batches of ``max_batch`` records, or fewer once the oldest is ``max_latency`` old."""
+    pending = _Pending()
+    reader = _Reader(records, max_batch)
+    deadline = None
+    try:
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0.0)
+            try:
+                item = reader.get(timeout)
+            except Exception:
+                yield from _drain(pending, convert)
+                raise
+            if item is _END:
+                break
+            if item is not _TIMEOUT:
+                pending.add(item)
+                if deadline is None:
+                    deadline = time.monotonic() + max_latency
+                while len(pending) >= max_batch:
+                    yield from convert(pending.take(max_batch))
+                    # What is left arrived with the last item
+                    deadline = time.monotonic() + max_latency if len(pending) else None
+            if deadline is not None and time.monotonic() >= deadline:
+                yield from _drain(pending, convert)
+                deadline = None
+        yield from _drain(pending, convert)
+    finally:
+        reader.close()
+
+
+def _drain(pending, convert):
+    """Convert whatever is pending."""
+    if len(pending):
+        yield from convert(pending.take(len(pending)))
+
+
+def _convert(columns, speed_type, speed_unit, atmo_args, batches):
+    """Yield the enriched records (or the batch) of one set of columns."""
+    missing = [name for name in REQUIRED_FIELDS if name not in columns]
+    if missing:
+        raise ValueError(f"Missing required field(s): {', '.join(missing)}")
+    with phase("stream.convert"):
+        result, errors = _enrich(columns, len(columns["hp"]), speed_type, speed_unit, atmo_args)
+    if batches:
+        if errors is not None:
+            result["error"] = np.array(errors, dtype=object)
+        yield result
+        return
+    names = list(result)
+    rows = zip(*(column.tolist() for column in result.values()))
+    if errors is None:
+        for values in rows:
+            yield dict(zip(names, values))
+        return
+    for values, error in zip(rows, errors):
+        record = dict(zip(names, values))
+        if error is not None:
+            record["error"] = error
+        yield record
+
+
+def _enrich(columns, size, speed_type, speed_unit, atmo_args):
+    """The columns with ``OUTPUT_FIELDS`` added, and the error of each record
+    (None if every record converted).
+
+    If the vectorized conversion fails, each half is converted on its own,
+    so only the invalid records get NaN outputs and an error.
+    """
+    try:
+        atmo = Atmo(as_float(columns["hp"]), as_float(columns["temperature"]), **atmo_args)
+        speed = Speed(as_float(columns["speed_value"]), speed_type, speed_unit)
+        result = dict(columns)
+        for to_type in SpeedType:
+            result[to_type.value] = np.asarray(getattr(speed, f"to_{to_type}")(atmo))
+        result["delta_isa"] = np.asarray(atmo.delta_isa)
+        result["density_altitude"] = atmo.density_altitude(atmo_args["alt_unit"])
+        result["speed_of_sound"] = atmo.speed_of_sound(speed_unit)
+        return result, None
+    except (TypeError, ValueError) as exc:
+        if size == 1:
+            result = dict(columns)
+            result.update((name, np.full(1, np.nan, float_dtype())) for name in OUTPUT_FIELDS)
+            return result, [str(exc)]
+    half = size // 2
+    parts = [_enrich({name: column[part] for name, column in columns.items()}, n,
+                     speed_type, speed_unit, atmo_args)
+             for part, n in ((slice(None, half), half), (slice(half, None), size - half))]
+    result = {name: np.concatenate([part[name] for part, _ in parts]) for name in parts[0][0]}
+    errors = [error for (_, part_errors), n in zip(parts, (half, size - half))
+              for error in (part_errors or [None] * n)]
+    return result, errors
+
+
+class _Pending:
+    """Records and batches waiting to be converted, taken as columns."""
+
+    def __init__(self):
+        self._rows = []
+        self._pieces = []
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, item):
+        if isinstance(item, np.ndarray):
+            if item.dtype.names is None or item.ndim != 1:
+                raise ValueError("Record batches must be 1-D structured arrays")
+            piece = {name: item[name] for name in item.dtype.names}
+        elif not isinstance(item, Mapping):
+            raise ValueError(f"Records must be mappings, not {type(item).__name__}")
+        elif np.ndim(item.get("hp")) == 1:
+            piece = {name: np.asarray(value) for name, value in item.items()}
+            if any(column.ndim != 1 or len(column) != len(piece["hp"])
+                   for column in piece.values()):
+                raise ValueError("Every field of a record batch must be a 1-D array "
+                                 "of the same length")
+        else:
+            # A single record, whatever its other fields hold
+            self._rows.append(item)
+            self._size += 1
+            return
+        self._flush_rows()
+        self._pieces.append(piece)
+        self._size += len(item) if isinstance(item, np.ndarray) else len(piece["hp"])
+
+    def take(self, n):
+        """The first ``n`` records as a dict of field to 1-D array."""
+        self._flush_rows()
+        names = list(self._pieces[0])
+        for piece in self._pieces[1:]:
+            if list(piece) != names:
+                raise ValueError("All records of a stream must have the same fields")
+        if len(self._pieces) == 1:
+            columns = self._pieces[0]
+        else:
+            columns = {name: np.concatenate([piece[name] for piece in self._pieces])
+                       for name in names}
+        self._pieces = [{name: column[n:] for name, column in columns.items()}]
+        self._size -= n
+        if not self._size:
+            self._pieces = []
+        return {name: column[:n] for name, column in columns.items()}
+
+    def _flush_rows(self):
+        if self._rows:
+            names = list(self._rows[0])
+            try:
+                self._pieces.append({name: np.array([row[name] for row in self._rows])
+                                     for name in names})
+            except KeyError as exc:
+                raise ValueError(f"Record is missing field {exc}") from None
+            self._rows = []
+
+
+class _Reader:
+    """Reads an iterable in a daemon thread, so waits can time out."""
+
+    def __init__(self, records, max_batch):
+        # Bounded, so a fast source cannot run far ahead of the conversions
+        self._queue = queue.Queue(maxsize=4 * max_batch)
+        self._closed = threading.Event()
+        thread = threading.Thread(target=self._run, args=(records,),
+                                  name="atmospeed-stream", daemon=True)
+        thread.start()
+
+    def get(self, timeout):
+        """Next item, ``_END`` at the end, or ``_TIMEOUT`` after ``timeout`` seconds."""
+        try:
+            item = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return _TIMEOUT
+        if isinstance(item, BaseException):
+            raise item
+        return item
+
+    def close(self):
+        self._closed.set()
+
+    def _run(self, records):
+        try:
+            for item in records:
+                if not self._put(item):
+                    return
+        except BaseException as exc:
+            self._put(exc)
+            return
+        self._put(_END)
+
+    def _put(self, item):
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
@@ -0,0 +1,187 @@
+"""Speed schedule and atmosphere table generator.
+
+Axes of pressure altitude, ISA deviation and (optionally) speed are
+broadcast into a grid, and every requested column is computed over the
+whole grid in one vectorized pass: the atmosphere once per (altitude,
+deviation) point, and each speed type in one conversion against it.
+"""
+
+import os
+
+import numpy as np
+
+from ._format import csv_bytes, fixed_field
+from .atmo import Atmo
+from .precision import float_dtype
+from .speed import Speed
+from .units import SpeedType
+
+SPEED_COLUMNS = ("cas", "eas", "tas", "mach")
+ATMO_COLUMNS = ("isa_temp", "oat", "theta", "delta", "sigma",
+                "speed_of_sound", "pressure", "density")
+FORMATS = ("csv", "npy", "npz")
+
+
+class Table:
+    """Columns computed over a grid of axes.
+
+    Every column has the grid shape: one dimension per axis, in axis order
+    (``hp``, ``delta_isa``, then ``speed`` if given).
+
+    Args:
+        axes: Dict of axis name to 1-D array of axis values.
+        columns: Dict of column name to array of the grid shape.
+    """
+
+    __slots__ = ("_axes", "_columns")
+
+    def __init__(self, axes, columns):
+        self._axes = dict(axes)
+        self._columns = dict(columns)
+
+    def __repr__(self):
+        return f"Table(shape={self.shape}, columns={list(self._columns)})"
+
+    def __getitem__(self, name):
+        return self._columns[name]
+
+    @property
+    def axes(self):
+        """Dict of axis name to 1-D array of axis values."""
+        return dict(self._axes)
+
+    @property
+    def columns(self):
+        """Dict of column name to array of the grid shape."""
+        return dict(self._columns)
+
+    @property
+    def shape(self):
+        """Grid shape: the length of each axis."""
+        return tuple(axis.size for axis in self._axes.values())
+
+    @property
+    def size(self):
+        """Number of grid points (rows of the CSV form)."""
+        return int(np.prod(self.shape))
+
+    def save(self, path, fmt=None, decimals=4):
+        """Write the table to a file.
+
+        CSV has one row per grid point: the axis values, then the columns.
+        ``.npy`` holds a structured array of the grid shape with one field
+        per axis and column. ``.npz`` holds each axis as a 1-D array and
+        each column as an array of the grid shape.
+
+        Args:
+            path: Output file path.
+            fmt: "csv", "npy" or "npz" (default: from the file extension).
+            decimals: Decimal places of CSV values (default 4).
+
+        Raises:
+            ValueError: If the format is unknown.
+        """
+        if fmt is None:
+            fmt = os.path.splitext(path)[1].lstrip(".").lower()
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown table format: {fmt!r} "
+                             f"(expected one of {', '.join(FORMATS)})")
+        if fmt == "npz":
+            with open(path, "wb") as f:
+                np.savez(f, **self._axes, **self._columns)
+            return
+        fields = self._grid_fields()
+        if fmt == "npy":
+            records = np.empty(self.shape, [(name, value.dtype) for name, value in fields.items()])
+            for name, value in fields.items():
+                records[name] = value
+            with open(path, "wb") as f:
+                np.save(f, records)
+            return
+        text = csv_bytes([fixed_field(value, decimals) for value in fields.values()],
+                         lineterminator=b"\n")
+        with open(path, "wb") as f:
+            f.write(",".join(fields).encode() + b"\n")
+            f.write(text)
+
+    def _grid_fields(self):
+        """Axis values broadcast to the grid, followed by the columns."""
+        shape = self.shape
+        fields = {}
+        for i, (name, axis) in enumerate(self._axes.items()):
+            index = [np.newaxis] * len(shape)
+            index[i] = slice(None)
+            fields[name] = np.broadcast_to(axis[tuple(index)], shape)
+        fields.update(self._columns)
+        return fields
+
+
+def make_table(hp, delta_isa=0.0, speed=None, speed_type="cas", columns=None,
+               alt_unit="ft", temp_unit="C", speed_unit="kts",
+               pressure_unit="hPa", density_unit="kg/m3"):
+    """Compute speed conversions and atmosphere properties over a grid.
+
+    Args:
+        hp: Pressure altitude axis: a value, list, range or 1-D array.
+        delta_isa: Temperature deviation from ISA axis (default 0).
+        speed: Optional speed axis, of type ``speed_type``.
+        speed_type: Type of the speed axis (default "cas").
+        columns: Names of the columns to compute, from ``SPEED_COLUMNS``
+            and ``ATMO_COLUMNS`` (default: all speed columns if ``speed``
+            is given, then all atmosphere columns).
+        alt_unit: Altitude unit (default "ft").
+        temp_unit: Temperature unit of ``delta_isa`` and of the
+            temperature columns (default "C").
+        speed_unit: Unit of ``speed`` and of the speed columns, including
+            the speed of sound (default "kts").
+        pressure_unit: Unit of the pressure column (default "hPa").
+        density_unit: Unit of the density column (default "kg/m3").
+
+    Returns:
+        Table with axes ``hp``, ``delta_isa`` and, if given, ``speed``.
+
+    Raises:
+        ValueError: If an axis is empty or not 1-D, a column is unknown or
+            needs a speed axis that is missing, or an altitude is above 86 km.
+    """
+    axes = {"hp": _axis(hp, "hp"), "delta_isa": _axis(delta_isa, "delta_isa")}
+    if speed is not None:
+        axes["speed"] = _axis(speed, "speed")
+    if columns is None:
+        columns = (SPEED_COLUMNS if speed is not None else ()) + ATMO_COLUMNS
+    for name in columns:
+        if name not in SPEED_COLUMNS + ATMO_COLUMNS:
+            raise ValueError(f"Unknown table column: {name!r}")
+        if name in SPEED_COLUMNS and speed is None:
+            raise ValueError(f"Column {name!r} needs a speed axis")
+
+    # The atmosphere varies along the first two axes only
+    tail = (1,) if speed is not None else ()
+    atmo = Atmo(hp=axes["hp"].reshape((-1, 1) + tail),
+                temperature=axes["delta_isa"].reshape((1, -1) + tail),
+                alt_unit=alt_unit, temp_unit=temp_unit)
+    if speed is not None:
+        spd = Speed(axes["speed"].reshape(1, 1, -1), speed_type, speed_unit)
+
+    shape = tuple(axis.size for axis in axes.values())
+    result = {}
+    for name in columns:
+        if name in SPEED_COLUMNS:
+            value = getattr(spd, f"to_{SpeedType(name)}")(atmo)
+        elif name == "speed_of_sound":
+            value = atmo.speed_of_sound(speed_unit)
+        elif name == "pressure":
+            value = atmo.pressure(pressure_unit)
+        elif name == "density":
+            value = atmo.density(density_unit)
+        else:
+            value = getattr(atmo, name)
+        result[name] = np.broadcast_to(value, shape)
+    return Table(axes, result)
+
+
+def _axis(values, name):
+    axis = np.atleast_1d(np.asarray(values, dtype=float_dtype()))
+    if axis.ndim != 1 or axis.size == 0:
+        raise ValueError(f"Axis {name!r} must be a value or a non-empty 1-D sequence")
+    return axis
@@ -2,63 +2,41 @@
 
 import numpy as np
 
-from .constants import (
-    HEIGHT_STRATOPAUSE_FT,
-    HEIGHT_TROPOPAUSE_FT,
-    LAPSE_RATE_C_PER_FT,
-    LAPSE_RATE_F_PER_FT,
-    TEMP_SL_STD_C,
-    TEMP_SL_STD_F,
-    TEMP_SL_STD_K,
-    TEMP_SL_STD_R,
-    TEMP_STRATOSPHERE_C,
-    TEMP_STRATOSPHERE_F,
-    ZERO_C_IN_K,
-    ZERO_C_IN_R,
-)
-from .convert import length_to_feet
-from .units import LengthUnit, TemperatureUnit
-
-
-def isa(hp, alt_unit="ft", temp_unit="C"):
+from . import _atmos, _buffers, _scalar
+from .profiling import instrument
+from .units import TemperatureUnit
+
+
+@instrument
+def isa(hp, alt_unit="ft", temp_unit="C", out=None):
     """Calculate ISA (International Standard Atmosphere) temperature at a pressure altitude.
 
     Args:
         hp: Pressure altitude (scalar or array).
         alt_unit: Altitude unit (default "ft").
         temp_unit: Output temperature unit (default "C").
+        out: Optional array to write the result into, with NumPy ufunc
+            shape and dtype rules.
 
     Returns:
-        ISA temperature in the requested unit.
+        ISA temperature in the requested unit (``out`` if given).
 
     Raises:
-        ValueError: If altitude is above the stratopause (20 km / 65617 ft).
+        ValueError: If altitude is above 86 km (278386 ft).
     """
+    if out is None and _scalar.is_scalar(hp):
+        return _scalar.isa(_scalar.altitude_ft(hp, alt_unit), temp_unit)
     temp_unit = TemperatureUnit(temp_unit)
-    hp_ft = np.asarray(length_to_feet(hp, alt_unit), dtype=float)
-
-    _validate_altitude(hp_ft)
-
-    in_tropo = hp_ft <= HEIGHT_TROPOPAUSE_FT
+    ws = _buffers.Workspace(persistent=out is not None)
+    hp_ft = _atmos.altitude_ft(hp, alt_unit, ws)
+    result = _atmos.isa(hp_ft, temp_unit, _buffers.target(out, hp_ft.shape, ws, hp_ft.dtype), ws)
+    if out is None:
+        return result.item() if result.ndim == 0 else result
+    return _buffers.finish(out, result)
 
-    if temp_unit == TemperatureUnit.C:
-        tropo = TEMP_SL_STD_C - LAPSE_RATE_C_PER_FT * hp_ft
-        strato = np.full_like(hp_ft, TEMP_STRATOSPHERE_C)
-    elif temp_unit == TemperatureUnit.F:
-        tropo = TEMP_SL_STD_F - LAPSE_RATE_F_PER_FT * hp_ft
-        strato = np.full_like(hp_ft, TEMP_STRATOSPHERE_F)
-    elif temp_unit == TemperatureUnit.K:
-        tropo = TEMP_SL_STD_K - LAPSE_RATE_C_PER_FT * hp_ft
-        strato = np.full_like(hp_ft, TEMP_STRATOSPHERE_C + ZERO_C_IN_K)
-    elif temp_unit == TemperatureUnit.R:
-        tropo = TEMP_SL_STD_R - LAPSE_RATE_F_PER_FT * hp_ft
-        strato = np.full_like(hp_ft, TEMP_STRATOSPHERE_F + ZERO_C_IN_R)
 
-    result = np.where(in_tropo, tropo, strato)
-    return result.item() if result.ndim == 0 else result
-
-
-def oat(hp, delta_isa, alt_unit="ft", temp_unit="C"):
+@instrument
+def oat(hp, delta_isa, alt_unit="ft", temp_unit="C", out=None):
     """Calculate Outside Air Temperature from pressure altitude and delta ISA.
 
     Args:
@@ -66,14 +44,20 @@ def oat(hp, delta_isa, alt_unit="ft", temp_unit="C"):
         delta_isa: Temperature deviation from ISA (scalar or array).
         alt_unit: Altitude unit (default "ft").
         temp_unit: Temperature unit (default "C").
+        out: Optional array to write the result into, with NumPy ufunc
+            shape and dtype rules.
 
     Returns:
-        OAT in the requested unit.
+        OAT in the requested unit (``out`` if given).
     """
-    return isa(hp, alt_unit=alt_unit, temp_unit=temp_unit) + delta_isa
+    if out is None:
+        return isa(hp, alt_unit=alt_unit, temp_unit=temp_unit) + delta_isa
+    out = _buffers.output(out, _buffers.result_shape(hp, delta_isa))
+    return np.add(_isa_scratch(hp, alt_unit, temp_unit), delta_isa, out=out)
 
 
-def calc_delta_isa(hp, oat_value, alt_unit="ft", temp_unit="C"):
+@instrument
+def calc_delta_isa(hp, oat_value, alt_unit="ft", temp_unit="C", out=None):
     """Calculate temperature deviation from ISA for a given pressure altitude and OAT.
 
     Args:
@@ -81,15 +65,21 @@ def calc_delta_isa(hp, oat_value, alt_unit="ft", temp_unit="C"):
         oat_value: Outside air temperature (scalar or array).
         alt_unit: Altitude unit (default "ft").
         temp_unit: Temperature unit (default "C").
+        out: Optional array to write the result into, with NumPy ufunc
+            shape and dtype rules.
 
     Returns:
-        Delta ISA in the requested unit.
+        Delta ISA in the requested unit (``out`` if given).
     """
-    return oat_value - isa(hp, alt_unit=alt_unit, temp_unit=temp_unit)
-
-
-def _validate_altitude(hp_ft):
-    """Raise ValueError if any altitude exceeds the stratopause."""
-    hp_arr = np.asarray(hp_ft)
-    if np.any(hp_arr > HEIGHT_STRATOPAUSE_FT):
-        raise ValueError("Altitude is above stratopause (20 km / 65617 ft)")
+    if out is None:
+        return oat_value - isa(hp, alt_unit=alt_unit, temp_unit=temp_unit)
+    out = _buffers.output(out, _buffers.result_shape(hp, oat_value))
+    return np.subtract(oat_value, _isa_scratch(hp, alt_unit, temp_unit), out=out)
+
+
+def _isa_scratch(hp, alt_unit, temp_unit):
+    """ISA temperature array in this thread's persistent scratch."""
+    ws = _buffers.Workspace(persistent=True)
+    hp_ft = _atmos.altitude_ft(hp, alt_unit, ws)
+    return _atmos.isa(hp_ft, TemperatureUnit(temp_unit),
+                      ws.get("temperature.isa", hp_ft.shape, hp_ft.dtype), ws)
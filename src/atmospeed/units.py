@@ -14,6 +14,13 @@ class LengthUnit(StrEnum):
 class PressureUnit(StrEnum):
     HPA = "hPa"
     INHG = "inHg"
+    PA = "Pa"
+    PSF = "psf"  # pounds per square foot
+
+
+class DensityUnit(StrEnum):
+    KG_M3 = "kg/m3"
+    SLUG_FT3 = "slug/ft3"
 
 
 class SpeedUnit(StrEnum):
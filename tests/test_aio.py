@@ -0,0 +1,161 @@
+"""Tests for the asyncio conversion helpers."""
+
+import asyncio
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from atmospeed import Atmo, Speed, SpeedArray, aio, sigma, theta, use_precision
+from atmospeed import _speed_conv as sc
+
+RNG = np.random.default_rng(11)
+N = 50_000
+HP = RNG.uniform(-1000.0, 65000.0, N)
+DISA = RNG.uniform(-30.0, 30.0, N)
+KTS = RNG.uniform(80.0, 600.0, N)
+
+
+@pytest.fixture
+def restore_workers():
+    workers = aio.get_max_workers()
+    yield
+    aio.set_max_workers(workers)
+
+
+class TestConvert:
+    @pytest.mark.parametrize("to_type", ["cas", "eas", "tas", "mach"])
+    def test_matches_direct_call(self, to_type):
+        atmo = Atmo(hp=HP, temperature=DISA)
+        result = asyncio.run(aio.convert(Speed(KTS, "eas", "mph"), to_type, atmo, chunk_size=4096))
+        expected = getattr(Speed(KTS, "eas", "mph"), f"to_{to_type}")(atmo)
+        assert np.array_equal(result, expected)
+
+    def test_speed_array_and_oat(self):
+        atmo = Atmo(hp=HP / 3.28084, temperature=DISA + 240.0, temp_is_delta_isa=False,
+                    alt_unit="m", temp_unit="K")
+        speeds = SpeedArray(KTS, np.tile(["cas", "eas", "tas", "mach"], N // 4), "kmh")
+        result = asyncio.run(aio.convert(speeds, "tas", atmo, chunk_size=1000))
+        assert np.array_equal(result, speeds.to("tas", atmo))
+
+    def test_broadcast_and_out(self):
+        hp = HP[:1200].reshape(40, 30)
+        out = np.empty((40, 30), dtype=np.float32)
+        atmo = Atmo(hp=hp, temperature=5.0)
+        result = asyncio.run(aio.convert(Speed(250.0, "cas"), "mach", atmo, out=out, chunk_size=100))
+        assert result is out
+        assert np.array_equal(out, Speed(250.0, "cas").to_mach(atmo).astype(np.float32))
+
+    def test_scalar(self):
+        atmo = Atmo(hp=31000, temperature=0)
+        result = asyncio.run(aio.convert(Speed(250, "cas"), "tas", atmo))
+        assert result == Speed(250, "cas").to_tas(atmo)
+
+    def test_errors(self):
+        with pytest.raises(ValueError):
+            asyncio.run(aio.convert(Speed(KTS, "cas"), "ias", Atmo(hp=HP, temperature=0)))
+        hp = np.append(HP, 300000.0)
+        with pytest.raises(ValueError, match="86 km"):
+            asyncio.run(aio.apply(sc.kcas_to_keas, np.append(KTS, 250.0), hp, chunk_size=1000))
+
+
+class TestApply:
+    def test_matches_direct_call(self):
+        result = asyncio.run(aio.apply(sc.kcas_to_ktas, KTS, HP, DISA, chunk_size=3000))
+        assert np.array_equal(result, sc.kcas_to_ktas(KTS, HP, DISA))
+
+    def test_keyword_arguments(self):
+        result = asyncio.run(aio.apply(sigma, HP, DISA, temp_unit="F", chunk_size=3000))
+        assert np.array_equal(result, sigma(HP, DISA, temp_unit="F"))
+
+    def test_precision_follows_the_task(self):
+        async def compute():
+            with use_precision("float32"):
+                return await aio.apply(theta, HP, DISA)
+
+        assert asyncio.run(compute()).dtype == np.float32
+
+    def test_empty(self):
+        assert asyncio.run(aio.apply(theta, np.array([]))).shape == (0,)
+
+    def test_chunk_size(self):
+        with pytest.raises(ValueError):
+            asyncio.run(aio.apply(theta, HP, chunk_size=0))
+
+
+class TestScheduling:
+    def test_event_loop_stays_responsive(self):
+        hp, disa, kts = (np.tile(a, 20) for a in (HP, DISA, KTS))
+
+        async def main():
+            ticks = 0
+            task = asyncio.ensure_future(aio.apply(sc.kcas_to_ktas, kts, hp, disa, chunk_size=4096))
+            while not task.done():
+                await asyncio.sleep(0)
+                ticks += 1
+            await task
+            return ticks
+
+        assert asyncio.run(main()) > 10
+
+    def test_cancellation_stops_writing(self):
+        out = np.full(N * 20, np.nan)
+        kts, hp = np.tile(KTS, 20), np.tile(HP, 20)
+
+        async def main():
+            task = asyncio.ensure_future(aio.apply(sc.kcas_to_keas, kts, hp, out=out,
+                                                   chunk_size=256))
+            await asyncio.sleep(0.005)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return np.isnan(out).sum()
+
+        remaining = asyncio.run(main())
+        time.sleep(0.05)
+        assert 0 < remaining == np.isnan(out).sum()
+
+    def test_worker_limit(self, restore_workers):
+        aio.set_max_workers(2)
+        lock = threading.Lock()
+        active, peak = 0, 0
+
+        def slow(x, out=None):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.002)
+            with lock:
+                active -= 1
+            return np.multiply(x, 2.0, out=out)
+
+        async def main():
+            x = np.arange(64.0)
+            return await asyncio.gather(*(aio.apply(slow, x, chunk_size=4) for _ in range(3)))
+
+        for result in asyncio.run(main()):
+            assert np.array_equal(result, np.arange(64.0) * 2.0)
+        assert peak <= 2
+
+    def test_worker_limit_changed_during_conversion(self, restore_workers):
+        started = threading.Event()
+
+        def slow(x, out=None):
+            started.set()
+            time.sleep(0.001)
+            return np.multiply(x, 2.0, out=out)
+
+        async def main():
+            task = asyncio.ensure_future(aio.apply(slow, np.arange(256.0), chunk_size=4))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait)
+            aio.set_max_workers(3)
+            return await task
+
+        assert np.array_equal(asyncio.run(main()), np.arange(256.0) * 2.0)
+        assert aio.get_max_workers() == 3
+
+    def test_invalid_worker_limit(self):
+        with pytest.raises(ValueError):
+            aio.set_max_workers(0)
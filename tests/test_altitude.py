@@ -1,8 +1,13 @@
 """Tests for pressure altitude calculation.
 Ported from Dart atmospeed_test.dart with identical expected values."""
 
+import numpy as np
 import pytest
-from atmospeed import pressure_altitude
+from atmospeed import (
+    Atmo, Speed, crossover_altitude, delta, density_altitude, hp_from_delta, hp_from_pressure, hp_from_sigma, pressure_altitude,
+    use_precision,
+)
+from atmospeed import _speed_conv
 
 
 class TestPressureAltitude:
@@ -26,3 +31,193 @@ class TestPressureAltitude:
 
     def test_sm_hpa(self):
         assert pressure_altitude(2.358, 1044.0, elev_unit="sm", altimeter_unit="hPa") == pytest.approx(2.201, abs=0.001)
+
+    def test_ft_pa(self):
+        assert pressure_altitude(5555.0, 98100.0, altimeter_unit="Pa") == pytest.approx(6447.0, abs=0.5)
+
+
+class TestPressureAltitudeOut:
+    def test_matches_allocating_call(self):
+        elevation = np.array([0.0, 1708.0, 3795.0])
+        out = np.empty(3)
+        result = pressure_altitude(elevation, 1013.0, elev_unit="m", altimeter_unit="hPa", out=out)
+        assert result is out
+        np.testing.assert_array_equal(
+            out, pressure_altitude(elevation, 1013.0, elev_unit="m", altimeter_unit="hPa"))
+
+
+class TestHpFromDelta:
+    HP = np.linspace(-2000.0, 65616.0, 5001)
+
+    def test_round_trip_both_layers(self):
+        np.testing.assert_allclose(hp_from_delta(delta(self.HP)), self.HP, rtol=0, atol=1e-6)
+
+    def test_round_trip_scalar(self):
+        for hp in (0.0, 12345.0, 36089.0, 36090.0, 50000.0, 65616.0):
+            assert hp_from_delta(delta(hp)) == pytest.approx(hp, abs=1e-6)
+
+    def test_scalar_matches_array(self):
+        d = delta(self.HP[::50])
+        np.testing.assert_allclose([hp_from_delta(float(v)) for v in d], hp_from_delta(d),
+                                   rtol=1e-15, atol=1e-9)
+
+    def test_reference_values(self):
+        assert hp_from_delta(1.0) == pytest.approx(0.0, abs=1e-6)
+        assert hp_from_delta(0.5643) == pytest.approx(15000.0, abs=5.0)
+        assert hp_from_delta(0.1577) == pytest.approx(43333.0, abs=10.0)
+
+    def test_alt_unit(self):
+        assert hp_from_delta(delta(11000.0, alt_unit="m"), alt_unit="m") == pytest.approx(11000.0)
+
+    def test_nan_passes_through(self):
+        result = hp_from_delta(np.array([np.nan, 1.0]))
+        assert np.isnan(result[0]) and result[1] == pytest.approx(0.0, abs=1e-6)
+
+    def test_out(self):
+        d = delta(self.HP)
+        out = np.empty_like(d)
+        assert hp_from_delta(d, out=out) is out
+        np.testing.assert_array_equal(out, hp_from_delta(d))
+
+    def test_in_place(self):
+        d = delta(self.HP)
+        expected = hp_from_delta(d)
+        hp_from_delta(d, out=d)
+        np.testing.assert_array_equal(d, expected)
+
+    def test_float32(self):
+        with use_precision("float32"):
+            result = hp_from_delta(delta(self.HP))
+        assert result.dtype == np.float32
+
+    @pytest.mark.parametrize("value", [0.0, -0.5, np.array([0.5, 0.0])])
+    def test_non_positive_raises(self, value):
+        with pytest.raises(ValueError, match="positive"):
+            hp_from_delta(value)
+
+    @pytest.mark.parametrize("value", [1e-6, np.array([0.5, 1e-6])])
+    def test_above_top_raises(self, value):
+        with pytest.raises(ValueError, match="86 km"):
+            hp_from_delta(value)
+
+
+class TestHpFromPressure:
+    @pytest.mark.parametrize("unit, p_sl", [("hPa", 1013.25), ("inHg", 29.92),
+                                            ("Pa", 101325.0), ("psf", 2116.22)])
+    def test_units_round_trip(self, unit, p_sl):
+        hp = np.array([0.0, 18000.0, 45000.0])
+        np.testing.assert_allclose(hp_from_pressure(p_sl * delta(hp), unit), hp, atol=1e-6)
+        assert hp_from_pressure(p_sl, unit) == pytest.approx(0.0, abs=1e-6)
+
+    def test_atmo_pressure_round_trip(self):
+        atmo = Atmo(hp=np.array([1000.0, 40000.0]), temperature=15)
+        np.testing.assert_allclose(hp_from_pressure(atmo.pressure("Pa"), "Pa"), atmo.hp_ft, atol=1e-6)
+
+    def test_reference_value(self):
+        assert hp_from_pressure(500.0, alt_unit="m") == pytest.approx(5574.0, abs=1.0)
+
+    def test_non_positive_raises(self):
+        with pytest.raises(ValueError, match="Pressure must be positive"):
+            hp_from_pressure(np.array([0.0]))
+
+
+class TestHpFromSigma:
+    def test_isa_round_trip(self):
+        hp = np.linspace(0.0, 65000.0, 101)
+        atmo = Atmo(hp=hp, temperature=0)
+        np.testing.assert_allclose(hp_from_sigma(atmo.sigma, atmo.oat), hp, atol=1e-6)
+
+    @pytest.mark.parametrize("temp_unit", ["C", "F", "K", "R"])
+    def test_off_standard_day(self, temp_unit):
+        atmo = Atmo(hp=24000.0, temperature=12, temp_unit=temp_unit)
+        assert hp_from_sigma(atmo.sigma, atmo.oat, temp_unit) == pytest.approx(24000.0, abs=1e-6)
+
+    def test_broadcast_and_out(self):
+        out = np.empty((2, 3))
+        atmo = Atmo(hp=np.array([[5000.0], [30000.0]]), temperature=np.array([-10.0, 0.0, 10.0]))
+        assert hp_from_sigma(atmo.sigma, atmo.oat, out=out) is out
+        np.testing.assert_allclose(out, np.broadcast_to(atmo.hp_ft, (2, 3)), atol=1e-6)
+
+    def test_below_absolute_zero_raises(self):
+        with pytest.raises(ValueError, match="absolute temperature"):
+            hp_from_sigma(0.5, -300.0)
+
+
+class TestDensityAltitude:
+    def test_isa_round_trip(self):
+        hp = np.linspace(-1000.0, 65000.0, 101)
+        atmo = Atmo(hp=hp, temperature=0)
+        np.testing.assert_allclose(density_altitude(atmo.sigma), hp, atol=1e-6)
+
+    def test_hot_day(self):
+        atmo = Atmo(hp=5000.0, temperature=20.0)
+        assert atmo.density_altitude() == pytest.approx(7272.0, abs=0.5)
+        assert atmo.density_altitude("m") == pytest.approx(7272.0 * 0.3048, abs=0.2)
+
+    def test_scalar_matches_array(self):
+        sigma = np.array([1.1, 0.8, 0.3, 0.1])
+        expected = [density_altitude(float(s)) for s in sigma]
+        np.testing.assert_allclose(density_altitude(sigma), expected, rtol=1e-12)
+
+    def test_out(self):
+        out = np.empty(3)
+        assert density_altitude(np.array([1.0, 0.5, 0.2]), out=out) is out
+        assert out[0] == pytest.approx(0.0, abs=1e-9)
+
+    @pytest.mark.parametrize("value", [0.0, -0.5])
+    def test_non_positive_raises(self, value):
+        with pytest.raises(ValueError, match="Density ratio"):
+            density_altitude(value)
+
+    def test_above_top_raises(self):
+        with pytest.raises(ValueError, match="86 km"):
+            density_altitude(np.array([0.5, 1e-6]))
+
+
+class TestCrossoverAltitude:
+    KCAS = np.random.default_rng(6).uniform(250.0, 340.0, 5000)
+    MACH = np.random.default_rng(7).uniform(0.70, 0.86, 5000)
+
+    def test_reference_value(self):
+        assert crossover_altitude(280.0, 0.78) == pytest.approx(32464.0, abs=1.0)
+
+    def test_round_trip_through_mach_to_kcas(self):
+        hp = crossover_altitude(self.KCAS, self.MACH)
+        np.testing.assert_allclose(_speed_conv.mach_to_kcas(self.MACH, hp), self.KCAS, rtol=1e-12)
+
+    @pytest.mark.parametrize("disa", [-20.0, 0.0, 25.0])
+    def test_independent_of_temperature(self, disa):
+        hp = crossover_altitude(300.0, 0.8)
+        atmo = Atmo(hp=hp, temperature=disa)
+        assert Speed(300.0, "cas").to_mach(atmo) == pytest.approx(0.8, abs=1e-4)
+
+    def test_scalar_matches_array(self):
+        result = crossover_altitude(self.KCAS[:20], self.MACH[:20])
+        expected = [crossover_altitude(float(k), float(m)) for k, m in zip(self.KCAS[:20], self.MACH[:20])]
+        np.testing.assert_allclose(result, expected, rtol=1e-14)
+
+    def test_broadcast_schedule_grid(self):
+        result = crossover_altitude(self.KCAS[:40, None], self.MACH[None, :30])
+        assert result.shape == (40, 30)
+        assert result[3, 5] == pytest.approx(crossover_altitude(self.KCAS[3], self.MACH[5]))
+
+    def test_units(self):
+        hp_ft = crossover_altitude(280.0, 0.78)
+        kmh = Speed(280.0, "cas").convert_unit("kts", "kmh")
+        assert crossover_altitude(kmh, 0.78, speed_unit="kmh", alt_unit="m") == pytest.approx(
+            hp_ft * 0.3048)
+
+    def test_out(self):
+        out = np.empty(5000)
+        assert crossover_altitude(self.KCAS, self.MACH, out=out) is out
+        np.testing.assert_array_equal(out, crossover_altitude(self.KCAS, self.MACH))
+
+    @pytest.mark.parametrize("cas, mach", [(0.0, 0.8), (280.0, -0.8),
+                                           (np.array([280.0, -1.0]), 0.8)])
+    def test_non_positive_raises(self, cas, mach):
+        with pytest.raises(ValueError, match="CAS and Mach must be positive"):
+            crossover_altitude(cas, mach)
+
+    def test_above_top_raises(self):
+        with pytest.raises(ValueError, match="86 km"):
+            crossover_altitude(np.array([280.0, 1.0]), np.array([0.9, 3.0]))
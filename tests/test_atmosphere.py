@@ -1,9 +1,14 @@
 """Tests for atmospheric properties: ISA, OAT, delta ISA, theta, delta, sigma, speed of sound.
 Ported from Dart atmospeed_test.dart with identical expected values."""
 
+import tracemalloc
+
 import pytest
 import numpy as np
-from atmospeed import Atmo, theta, delta, sigma, isa, oat, calc_delta_isa
+from atmospeed import (
+    Atmo, RatioTable, Speed, SpeedArray, theta, delta, sigma, isa, oat, calc_delta_isa,
+    clear_buffers, pressure_altitude,
+)
 
 
 class TestISA:
@@ -158,10 +163,58 @@ class TestSigma:
         assert Atmo(hp=11782.0, temperature=-32.0, temp_unit="F", alt_unit="m").sigma == pytest.approx(0.2861, abs=0.0001)
 
 
-class TestStratopauseError:
-    def test_raises_above_stratopause(self):
-        with pytest.raises(ValueError):
-            Atmo(hp=65618.0, temperature=0)
+class TestTopError:
+    def test_raises_above_top(self):
+        with pytest.raises(ValueError, match="86 km"):
+            Atmo(hp=278400.0, temperature=0)
+
+
+class TestUpperLayers:
+    """The 1976 layers above the lower stratosphere, up to 84852 m geopotential."""
+
+    FT = 1 / 0.3048
+    BASES = [20000.0 * FT, 32000.0 * FT, 47000.0 * FT, 51000.0 * FT, 71000.0 * FT]
+
+    @pytest.mark.parametrize("hp_m, temp_k, pressure_pa", [
+        (32000.0, 228.65, 868.02),
+        (47000.0, 270.65, 110.91),
+        (51000.0, 270.65, 66.939),
+        (71000.0, 214.65, 3.9564),
+        (84852.0, 186.946, 0.37338),
+    ])
+    def test_reference_values(self, hp_m, temp_k, pressure_pa):
+        atmo = Atmo(hp=hp_m, temperature=0, alt_unit="m", temp_unit="K")
+        assert atmo.isa_temp == pytest.approx(temp_k, abs=1e-9)
+        assert atmo.delta == pytest.approx(pressure_pa / 101325.0, rel=1e-4)
+
+    def test_continuous_at_layer_bases(self):
+        below = np.array(self.BASES) - 1e-6
+        above = np.array(self.BASES) + 1e-6
+        np.testing.assert_allclose(isa(below), isa(above), atol=1e-8)
+        np.testing.assert_allclose(delta(below), delta(above), rtol=1e-10)
+
+    def test_scalar_matches_array_path(self):
+        hp = np.linspace(60000.0, 278385.0, 301)
+        disa = np.linspace(-20.0, 20.0, 301)
+        np.testing.assert_array_max_ulp(isa(hp, temp_unit="F"),
+                                        [isa(h, temp_unit="F") for h in hp.tolist()], 1)
+        np.testing.assert_array_max_ulp(delta(hp), [delta(h) for h in hp.tolist()], 3)
+        np.testing.assert_array_max_ulp(
+            sigma(hp, disa), [sigma(h, d) for h, d in zip(hp.tolist(), disa.tolist())], 4)
+
+    def test_inverse_round_trip(self):
+        from atmospeed import density_altitude, hp_from_delta
+
+        hp = np.linspace(-2000.0, 278385.0, 2001)
+        np.testing.assert_allclose(hp_from_delta(delta(hp)), hp, rtol=0, atol=1e-6)
+        np.testing.assert_allclose(density_altitude(sigma(hp)), hp, rtol=0, atol=1e-6)
+
+    def test_atmo(self):
+        # 54864 m and 76200 m: 3864 m into the -2.8 K/km layer, 5200 m into the -2 K/km one
+        atmo = Atmo(hp=[180000.0, 250000.0], temperature=[-10.0, 5.0], temp_is_delta_isa=True)
+        assert atmo.isa_temp == pytest.approx([-13.3192, -68.9])
+        assert atmo.oat == pytest.approx([-23.3192, -63.9])
+        assert atmo.sigma == pytest.approx(atmo.delta / atmo.theta)
 
 
 class TestSpeedOfSound:
@@ -190,6 +243,50 @@ class TestSpeedOfSound:
         assert Atmo(hp=13456.0, temperature=28.6).speed_of_sound("kmh") == pytest.approx(1229.2, abs=0.1)
 
 
+class TestPressureAndDensity:
+    def test_sea_level(self):
+        atmo = Atmo(hp=0.0, temperature=0)
+        assert atmo.pressure() == pytest.approx(1013.25)
+        assert atmo.pressure("inHg") == pytest.approx(29.92)
+        assert atmo.pressure("Pa") == pytest.approx(101325.0)
+        assert atmo.pressure("psf") == pytest.approx(2116.22)
+        assert atmo.density() == pytest.approx(1.225)
+        assert atmo.density("slug/ft3") == pytest.approx(0.0023769)
+
+    def test_troposphere(self):
+        atmo = Atmo(hp=10000.0, temperature=0)
+        assert atmo.pressure() == pytest.approx(696.8, abs=0.1)
+        assert atmo.density() == pytest.approx(0.9046, abs=0.0001)
+
+    def test_density_follows_temperature(self):
+        assert Atmo(hp=31000, temperature=20).density() == pytest.approx(1.225 * 0.3313, abs=0.0001)
+
+    def test_arrays_and_out(self):
+        atmo = Atmo(hp=np.array([0.0, 20000.0, 50000.0]), temperature=0)
+        np.testing.assert_allclose(atmo.pressure("Pa"), 101325.0 * atmo.delta)
+        out = np.empty(3)
+        assert atmo.density(out=out) is out
+        np.testing.assert_allclose(out, 1.225 * atmo.sigma)
+
+    def test_impact_pressure_depends_only_on_cas(self):
+        for hp in (0.0, 15000.0, 40000.0):
+            qc = Atmo(hp=hp, temperature=10).impact_pressure(Speed(250.0, "cas"))
+            assert qc == pytest.approx(104.98, abs=0.01)
+
+    def test_impact_pressure_from_mach(self):
+        atmo = Atmo(hp=35000.0, temperature=0)
+        expected = atmo.pressure() * ((1 + 0.2 * 0.8 ** 2) ** 3.5 - 1)
+        assert atmo.impact_pressure(Speed(0.8, "mach")) == pytest.approx(expected)
+
+    def test_impact_pressure_arrays(self):
+        atmo = Atmo(hp=np.array([0.0, 30000.0]), temperature=0)
+        speeds = SpeedArray(np.array([250.0, 0.8]), ["cas", "mach"])
+        out = np.empty(2)
+        assert atmo.impact_pressure(speeds, "Pa", out=out) is out
+        assert out[0] == pytest.approx(10498.0, abs=1.0)
+        assert out[1] == pytest.approx(atmo.impact_pressure(Speed(0.8, "mach"), "Pa")[1])
+
+
 class TestAtmoClass:
     def test_troposphere_disa20_celsius(self):
         atmo = Atmo(hp=31000, temperature=20, temp_is_delta_isa=True)
@@ -239,3 +336,330 @@ class TestVectorized:
         result = isa(np.array([0, 24555]))
         assert result[0] == pytest.approx(15.0, abs=0.01)
         assert result[1] == pytest.approx(-33.65, abs=0.02)
+
+
+class TestAtmoArray:
+    HP = np.array([0.0, 13456.0, 31000.0, 43333.0, 65000.0])
+    TEMP = np.array([0.0, 28.6, -17.0, -13.7, 5.0])
+
+    @pytest.mark.parametrize("temp_unit", ["C", "F", "K", "R"])
+    def test_matches_scalar_points(self, temp_unit):
+        atmo = Atmo(hp=self.HP, temperature=self.TEMP, temp_unit=temp_unit)
+        assert atmo.shape == (5,)
+        for i, (hp, temp) in enumerate(zip(self.HP, self.TEMP)):
+            point = Atmo(hp=float(hp), temperature=float(temp), temp_unit=temp_unit)
+            assert atmo.theta[i] == pytest.approx(point.theta, rel=1e-12)
+            assert atmo.delta[i] == pytest.approx(point.delta, rel=1e-12)
+            assert atmo.sigma[i] == pytest.approx(point.sigma, rel=1e-12)
+            assert atmo.oat[i] == pytest.approx(point.oat, rel=1e-12)
+            assert atmo.isa_temp[i] == pytest.approx(point.isa_temp, rel=1e-12)
+            assert atmo.speed_of_sound("mps")[i] == pytest.approx(
+                point.speed_of_sound("mps"), rel=1e-12)
+
+    def test_oat_input(self):
+        oat_c = np.array([-20.0, -50.5])
+        atmo = Atmo(hp=[31000.0, 41000.0], temperature=oat_c, temp_is_delta_isa=False)
+        assert atmo.oat == pytest.approx(oat_c)
+        assert atmo.delta_isa[1] == pytest.approx(6.0)
+
+    def test_broadcasts_scalar_temperature(self):
+        atmo = Atmo(hp=self.HP, temperature=10.0)
+        assert atmo.shape == (5,)
+        assert atmo.delta_isa.shape == (5,)
+        assert atmo.theta.shape == (5,)
+
+    def test_broadcasts_scalar_altitude(self):
+        atmo = Atmo(hp=31000.0, temperature=self.TEMP)
+        assert atmo.shape == (5,)
+        assert atmo.delta.shape == (5,)
+        assert np.all(atmo.delta == atmo.delta[0])
+
+    def test_broadcasts_grid(self):
+        atmo = Atmo(hp=self.HP[:, np.newaxis], temperature=np.array([-10.0, 0.0, 10.0]))
+        assert atmo.shape == (5, 3)
+        assert atmo.sigma.shape == (5, 3)
+
+    def test_scalar_point_has_empty_shape(self):
+        assert Atmo(hp=31000.0, temperature=0).shape == ()
+
+    def test_raises_if_any_above_top(self):
+        with pytest.raises(ValueError):
+            Atmo(hp=[31000.0, 278400.0], temperature=0)
+
+
+class TestAtmoSnapshot:
+    def test_matches_functional_api(self):
+        atmo = Atmo(hp=31000, temperature=-5, temp_unit="F")
+        state = atmo.snapshot()
+        assert state.theta == theta(31000, delta_isa=-5, temp_unit="F")
+        assert state.delta == delta(31000)
+        assert state.sigma == sigma(31000, delta_isa=-5, temp_unit="F")
+        assert state.oat == oat(31000, -5, temp_unit="F")
+        assert state.isa_temp == isa(31000, temp_unit="F")
+        assert state.delta_isa == -5
+        assert state.speed_of_sound_kts == atmo.speed_of_sound()
+
+    def test_computed_once(self):
+        atmo = Atmo(hp=10000, temperature=5)
+        state = atmo.snapshot()
+        assert atmo.snapshot() is state
+        assert atmo.theta == state.theta
+        assert atmo.snapshot() is state
+
+    def test_immutable(self):
+        atmo = Atmo(hp=[0.0, 40000.0], temperature=[0.0, 10.0])
+        state = atmo.snapshot()
+        with pytest.raises(AttributeError):
+            state.theta = 1.0
+        with pytest.raises(ValueError):
+            atmo.sigma[0] = 1.0
+        assert state.sigma[0] == pytest.approx(1.0)
+        assert state.hp_ft.shape == (2,)
+
+
+class TestFusedKernel:
+    """The fused kernel picks single-branch, masked or two-branch evaluation
+    depending on how troposphere and stratosphere points are laid out; every
+    strategy must agree with point-by-point evaluation."""
+
+    LAYOUTS = {
+        "troposphere": np.linspace(0.0, 36000.0, 300),
+        "stratosphere": np.linspace(37000.0, 65000.0, 300),
+        "sorted": np.linspace(0.0, 65000.0, 300),
+        "interleaved": np.tile([10000.0, 45000.0], 150),
+        "upper": np.linspace(70000.0, 150000.0, 300),
+        "upper interleaved": np.tile([120000.0, 160000.0], 150),
+        "all layers": np.linspace(0.0, 278000.0, 300),
+        "all layers interleaved": np.tile([10000.0, 45000.0, 120000.0, 160000.0, 200000.0,
+                                           260000.0], 50),
+    }
+
+    @pytest.mark.parametrize("layout", sorted(LAYOUTS))
+    def test_delta_matches_points(self, layout):
+        hp = self.LAYOUTS[layout]
+        result = delta(hp)
+        assert np.array_equal(result, [delta(np.array([h]))[0] for h in hp])
+
+    @pytest.mark.parametrize("layout", sorted(LAYOUTS))
+    def test_state_matches_public_functions(self, layout):
+        from atmospeed import _atmos
+
+        hp = self.LAYOUTS[layout]
+        disa = np.linspace(-20.0, 20.0, hp.size)
+        state = _atmos.state(_atmos.altitude_ft(hp), disa)
+        assert np.array_equal(state.isa, isa(hp))
+        assert np.array_equal(state.theta, theta(hp, disa))
+        assert np.array_equal(state.delta, delta(hp))
+        assert np.array_equal(state.sigma, sigma(hp, disa))
+
+    def test_scalar_altitude_with_array_delta_isa(self):
+        result = sigma(31000.0, delta_isa=np.array([-10.0, 0.0, 10.0]))
+        assert result.shape == (3,)
+        assert result[1] == pytest.approx(sigma(31000.0))
+
+    def test_scalar_inputs_return_floats(self):
+        assert isinstance(theta(31000.0), float)
+        assert isinstance(delta(31000.0), float)
+        assert isinstance(sigma(31000.0, 5.0), float)
+        assert isinstance(isa(31000.0), float)
+
+
+class TestScalarFastPath:
+    """Python float inputs skip NumPy; results agree with the array path to
+    within a couple of ulps (libm vs. NumPy's vectorized pow/exp)."""
+
+    HP = np.concatenate([np.linspace(-2000.0, 65616.0, 501), [36089.24]])
+    DISA = np.linspace(-40.0, 40.0, 502)
+
+    @pytest.mark.parametrize("temp_unit", ["C", "F", "K", "R"])
+    def test_matches_array_path(self, temp_unit):
+        points = list(zip(self.HP.tolist(), self.DISA.tolist()))
+        np.testing.assert_array_max_ulp(
+            isa(self.HP, temp_unit=temp_unit), [isa(h, temp_unit=temp_unit) for h, _ in points], 0)
+        np.testing.assert_array_max_ulp(
+            theta(self.HP, self.DISA, temp_unit=temp_unit),
+            [theta(h, d, temp_unit=temp_unit) for h, d in points], 1)
+        np.testing.assert_array_max_ulp(delta(self.HP), [delta(h) for h, _ in points], 2)
+        np.testing.assert_array_max_ulp(
+            sigma(self.HP, self.DISA, temp_unit=temp_unit),
+            [sigma(h, d, temp_unit=temp_unit) for h, d in points], 3)
+
+    def test_atmo_snapshot_matches_array_path(self):
+        point = Atmo(hp=9449.0, temperature=-22.0, temp_is_delta_isa=False,
+                     alt_unit="m", temp_unit="F").snapshot()
+        array = Atmo(hp=[9449.0], temperature=[-22.0], temp_is_delta_isa=False,
+                     alt_unit="m", temp_unit="F").snapshot()
+        for name in point._fields:
+            assert type(getattr(point, name)) is float
+            np.testing.assert_array_max_ulp(getattr(array, name)[0], getattr(point, name), 3)
+
+    def test_units_and_errors(self):
+        assert isa(1000.0, alt_unit="m", temp_unit="K") == isa(np.array(1000.0), "m", "K")
+        with pytest.raises(ValueError):
+            isa(300000.0)
+        with pytest.raises(ValueError):
+            theta(1000.0, temp_unit="X")
+
+
+class TestRatioTable:
+    HP = np.random.default_rng(7).uniform(-2000, 278385, 100_000)
+
+    @pytest.mark.parametrize("kind, resolution, bound", [
+        ("linear", 10, 5e-8),
+        ("linear", 100, 5e-6),
+        ("cubic", 100, 5e-12),
+    ])
+    def test_max_rel_error(self, kind, resolution, bound):
+        table = RatioTable(resolution, kind)
+        assert table.max_rel_error < bound
+        err = np.abs(delta(self.HP, table=table) / delta(self.HP) - 1)
+        assert err.max() < bound
+
+    def test_layer_boundaries(self):
+        table = RatioTable(kind="cubic")
+        for hp in (0.0, 36089.24, 65616.0, 154199.48, 278385.0):
+            assert delta(hp, table=table) == pytest.approx(delta(hp), rel=1e-12)
+
+    def test_below_table_uses_exact_formula(self):
+        table = RatioTable(min_hp_ft=0.0)
+        hp = np.array([-1500.0, 1000.0])
+        assert delta(hp, table=table)[0] == delta(-1500.0)
+
+    def test_functional_api(self):
+        table = RatioTable()
+        assert isinstance(delta(31000, table=table), float)
+        assert delta(9449, alt_unit="m", table=table) == pytest.approx(
+            delta(9449, alt_unit="m"), rel=1e-7)
+        assert sigma(self.HP, 12.0, table=table) == pytest.approx(
+            sigma(self.HP, 12.0), rel=1e-7)
+
+    def test_atmo(self):
+        table = RatioTable()
+        exact = Atmo(hp=self.HP, temperature=-8.0)
+        atmo = Atmo(hp=self.HP, temperature=-8.0, table=table)
+        assert atmo.delta == pytest.approx(exact.delta, rel=1e-7)
+        assert atmo.sigma == pytest.approx(exact.sigma, rel=1e-7)
+        assert np.array_equal(atmo.theta, exact.theta)
+
+    @pytest.mark.filterwarnings("error")
+    @pytest.mark.parametrize("kind", ["linear", "cubic"])
+    def test_nan_altitudes(self, kind):
+        hp = np.array([1000.0, np.nan, 50000.0, np.nan])
+        result = delta(hp, table=RatioTable(kind=kind))
+        assert np.array_equal(np.isnan(result), np.isnan(hp))
+        assert result[[0, 2]] == pytest.approx(delta(hp[[0, 2]]), rel=1e-7)
+
+    def test_invalid_kind(self):
+        with pytest.raises(ValueError):
+            RatioTable(kind="spline")
+
+    def test_invalid_resolution(self):
+        with pytest.raises(ValueError):
+            RatioTable(resolution=0)
+
+
+class TestOutArgument:
+    HP = np.linspace(-1000.0, 65000.0, 500)
+    DISA = np.linspace(-30.0, 30.0, 500)
+
+    @pytest.mark.parametrize("func, args", [
+        (theta, (DISA,)), (delta, ()), (sigma, (DISA,)),
+        (isa, ()), (oat, (DISA,)), (calc_delta_isa, (DISA,)),
+    ])
+    def test_matches_allocating_call(self, func, args):
+        out = np.empty(500)
+        assert func(self.HP, *args, out=out) is out
+        np.testing.assert_array_equal(out, func(self.HP, *args))
+
+    # Interleaved and sorted altitudes across several layers
+    MIXED = np.concatenate([np.tile([10000.0, 45000.0, 120000.0, 160000.0], 50),
+                            np.linspace(-1000.0, 278000.0, 300)])
+
+    @pytest.mark.parametrize("table", [None, RatioTable(), RatioTable(100, "cubic")])
+    def test_delta_into_input(self, table):
+        hp = self.MIXED.copy()
+        assert delta(hp, table=table, out=hp) is hp
+        np.testing.assert_array_equal(hp, delta(self.MIXED, table=table))
+
+    @pytest.mark.parametrize("func", [theta, sigma, isa, oat])
+    def test_into_input(self, func):
+        hp, disa = self.MIXED.copy(), np.linspace(-30.0, 30.0, 500)
+        args = () if func is isa else (disa.copy(),)
+        expected = func(self.MIXED, *args)
+        np.testing.assert_array_equal(func(hp, *args, out=hp), expected)
+        if args:
+            np.testing.assert_array_equal(func(self.MIXED, args[0], out=args[0]), expected)
+
+    def test_float32_out(self):
+        out = np.empty(500, dtype=np.float32)
+        sigma(self.HP, self.DISA, out=out)
+        np.testing.assert_array_equal(out, sigma(self.HP, self.DISA).astype(np.float32))
+
+    def test_broadcasts_into_out(self):
+        out = np.empty((2, 500))
+        theta(self.HP, 10.0, out=out)
+        np.testing.assert_array_equal(out, np.broadcast_to(theta(self.HP, 10.0), (2, 500)))
+
+    def test_scalar_input_into_0d_out(self):
+        out = np.empty(())
+        assert delta(30000.0, out=out) is out
+        assert out == pytest.approx(delta(30000.0), rel=1e-15)
+
+    def test_table_and_alt_unit(self):
+        out = np.empty(500)
+        delta(self.HP * 0.3048, alt_unit="m", table=RatioTable(), out=out)
+        np.testing.assert_array_equal(out, delta(self.HP * 0.3048, alt_unit="m", table=RatioTable()))
+
+    def test_speed_of_sound(self):
+        atmo = Atmo(hp=self.HP, temperature=self.DISA)
+        for unit in ("kts", "mps"):
+            out = np.empty(500)
+            assert atmo.speed_of_sound(unit, out=out) is out
+            np.testing.assert_array_equal(out, atmo.speed_of_sound(unit))
+
+    @staticmethod
+    def _traced_after_out_calls(size):
+        """Traced bytes after ``out=`` calls of ``size`` elements, and the inputs."""
+        hp, disa, out = np.linspace(-1000.0, 65000.0, size), np.zeros(size), np.empty(size)
+        for func, args in [(theta, (disa,)), (delta, ()), (sigma, (disa,)),
+                           (oat, (disa,)), (calc_delta_isa, (disa,))]:
+            func(hp, *args, out=out)
+        pressure_altitude(hp, 1013.25, out=out)
+        return tracemalloc.get_traced_memory()[0], (hp, disa, out)
+
+    @pytest.fixture
+    def traced(self):
+        clear_buffers()
+        tracemalloc.start()
+        yield
+        tracemalloc.stop()
+
+    def test_large_call_keeps_bounded_scratch(self, traced):
+        kept, arrays = self._traced_after_out_calls(1_000_000)
+        kept -= sum(array.nbytes for array in arrays)
+        assert kept < arrays[2].nbytes  # less than one float64 array of the input size
+
+    def test_clear_buffers(self, traced):
+        kept, arrays = self._traced_after_out_calls(50_000)
+        clear_buffers()
+        assert tracemalloc.get_traced_memory()[0] < kept - 1_000_000
+
+    def test_wrong_shape(self):
+        with pytest.raises(ValueError, match="shape"):
+            delta(self.HP, out=np.empty(499))
+        with pytest.raises(ValueError, match="shape"):
+            sigma(self.HP, self.DISA, out=np.empty(()))
+
+    def test_wrong_dtype(self):
+        with pytest.raises(TypeError, match="same_kind"):
+            theta(self.HP, out=np.empty(500, dtype=np.int64))
+
+    def test_not_an_array(self):
+        with pytest.raises(TypeError, match="numpy array"):
+            delta(self.HP, out=[0.0] * 500)
+
+    def test_read_only(self):
+        out = np.empty(500)
+        out.flags.writeable = False
+        with pytest.raises(ValueError, match="read-only"):
+            isa(self.HP, out=out)
@@ -0,0 +1,109 @@
+"""Tests for kernel backend selection and the optional numba backend."""
+
+import sys
+
+import numpy as np
+import pytest
+
+from atmospeed import (
+    Atmo, Speed, SpeedArray, backend, delta, get_backend, isa, set_backend, sigma, theta,
+    use_precision,
+)
+from atmospeed import _speed_conv as sc
+
+# (kernel, arguments after the speed, speed, expected, tolerance) — the
+# reference values of test_speed.py, evaluated as arrays
+REFERENCE = [
+    (sc.kcas_to_keas, (26788,), 287.3, 276.2, 0.1),
+    (sc.kcas_to_ktas, (26788, 0), 287.3, 426.0, 0.1),
+    (sc.kcas_to_mach, (26788,), 287.3, 0.7130, 0.001),
+    (sc.keas_to_kcas, (38405,), 519.4, 656.0, 0.1),
+    (sc.keas_to_ktas, (13678, 0), 133.7, 165.0, 0.1),
+    (sc.keas_to_mach, (30538,), 333.3, 0.9361, 0.001),
+    (sc.ktas_to_keas, (17408, 0), 389.4, 296.9, 0.1),
+    (sc.ktas_to_kcas, (43777, 0), 507.5, 248.6, 0.1),
+    (sc.ktas_to_mach, (7564, 0), 287.3, 0.4461, 0.001),
+    (sc.mach_to_keas, (4862,), 0.4706, 284.7, 0.1),
+    (sc.mach_to_ktas, (39422, 0), 0.9127, 523.5, 0.1),
+    (sc.mach_to_kcas, (21755,), 0.74, 331.6, 0.1),
+]
+
+
+@pytest.fixture
+def restore_backend():
+    yield
+    set_backend("numpy")
+
+
+class TestBackendSelection:
+    def test_default_is_numpy(self):
+        assert get_backend() == "numpy"
+
+    def test_unknown_backend(self):
+        with pytest.raises(ValueError):
+            set_backend("cuda")
+
+    def test_falls_back_without_numba(self, monkeypatch, restore_backend):
+        monkeypatch.setitem(sys.modules, "numba", None)
+        monkeypatch.delitem(sys.modules, "atmospeed._numba", raising=False)
+        monkeypatch.setattr(backend, "_compiled", {})
+        with pytest.warns(RuntimeWarning, match="numba is not installed"):
+            assert set_backend("numba") == "numpy"
+        assert get_backend() == "numpy"
+        assert delta(np.array([0.0, 40000.0]))[0] == 1.0
+
+
+class TestNumbaBackend:
+    HP = np.random.default_rng(3).uniform(-1000.0, 65616.0, 2000)
+    DISA = np.random.default_rng(4).uniform(-30.0, 30.0, 2000)
+    KTS = np.random.default_rng(5).uniform(80.0, 600.0, 2000)
+
+    @pytest.fixture(autouse=True, params=["numba", "numba-parallel"])
+    def numba_backend(self, request, restore_backend):
+        pytest.importorskip("numba")
+        assert set_backend(request.param) == request.param
+
+    @pytest.mark.parametrize("func, args, speed, expected, tol", REFERENCE)
+    def test_reference_values(self, func, args, speed, expected, tol):
+        result = func(np.full(3, speed), *(np.full(3, float(a)) for a in args))
+        assert result == pytest.approx(expected, abs=tol)
+
+    @pytest.mark.parametrize("temp_unit", ["C", "F", "K", "R"])
+    def test_ratios_match_numpy(self, temp_unit):
+        result = (isa(self.HP, temp_unit=temp_unit), theta(self.HP, self.DISA, temp_unit=temp_unit),
+                  delta(self.HP), sigma(self.HP, self.DISA, temp_unit=temp_unit))
+        set_backend("numpy")
+        expected = (isa(self.HP, temp_unit=temp_unit), theta(self.HP, self.DISA, temp_unit=temp_unit),
+                    delta(self.HP), sigma(self.HP, self.DISA, temp_unit=temp_unit))
+        for r, e in zip(result, expected):
+            np.testing.assert_array_max_ulp(r, e, 3)
+
+    @pytest.mark.parametrize("func, n_args", [(entry[0], len(entry[1])) for entry in REFERENCE])
+    def test_kernels_match_numpy(self, func, n_args):
+        speed = self.KTS / 650.0 if func.__name__.startswith("mach") else self.KTS
+        args = (self.HP, self.DISA)[:n_args]
+        result = func(speed, *args)
+        set_backend("numpy")
+        assert result == pytest.approx(func(speed, *args), rel=1e-11)
+
+    def test_speed_classes_match_numpy(self):
+        atmo = Atmo(hp=self.HP, temperature=self.DISA)
+        speeds = SpeedArray(self.KTS, np.tile(["cas", "eas", "tas", "mach"], 500), "kmh")
+        result = (speeds.to_tas(atmo), Speed(self.KTS, "cas").to_mach(atmo))
+        set_backend("numpy")
+        atmo = Atmo(hp=self.HP, temperature=self.DISA)
+        assert result[0] == pytest.approx(speeds.to_tas(atmo), rel=1e-11)
+        assert result[1] == pytest.approx(Speed(self.KTS, "cas").to_mach(atmo), rel=1e-11)
+
+    def test_top_validation(self):
+        with pytest.raises(ValueError):
+            sc.mach_to_kcas(np.array([0.8]), np.array([300000.0]))
+
+    def test_float32_precision(self):
+        hp, disa, kts = (a.astype(np.float32) for a in (self.HP, self.DISA, self.KTS))
+        with use_precision("float32"):
+            result = sc.kcas_to_ktas(kts, hp, disa)
+            ratio = sigma(hp, disa)
+        assert result.dtype == ratio.dtype == np.float32
+        expected = sc.kcas_to_ktas(kts.astype(float), hp.astype(float), disa.astype(float))
+        assert result == pytest.approx(expected, rel=1e-6)
@@ -0,0 +1,61 @@
+"""Smoke tests for the benchmark suite in benchmarks/."""
+
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+BENCHMARKS = Path(__file__).resolve().parent.parent / "benchmarks"
+
+
+def _load(name):
+    spec = importlib.util.spec_from_file_location(f"benchmarks_{name}", BENCHMARKS / f"{name}.py")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.fixture(scope="module")
+def run():
+    return _load("run")
+
+
+@pytest.fixture(scope="module")
+def compare():
+    return _load("compare")
+
+
+class TestBenchmarks:
+    def test_run_writes_results(self, run, tmp_path):
+        output = tmp_path / "results.json"
+        run.main(["--sizes", "scalar,1e3", "--csv-rows", "1e3", "--select", "delta",
+                  "--repeat", "1", "--min-time", "0", "-o", str(output)])
+        data = json.loads(output.read_text())
+        assert data["meta"]["backend"] == "numpy"
+        names = {(r["name"], r["size"]) for r in data["results"]}
+        assert {("delta", "scalar"), ("delta", "1e3"), ("batch --to tas", "1e3")} <= names
+        assert all(r["best"] > 0 for r in data["results"])
+
+    def test_every_conversion_is_timed(self, run):
+        names = {name for name, _ in run.function_cases()}
+        assert {"theta", "delta", "sigma", "isa", "pressure_altitude", "Atmo", "Speed"} <= names
+        assert sum("_to_" in name for name in names) == 12
+
+    def test_unknown_size(self, run):
+        with pytest.raises(SystemExit):
+            run.main(["--sizes", "1e9"])
+
+    def test_compare_flags_regressions(self, compare, tmp_path):
+        def write(path, best):
+            results = [{"name": name, "size": "1e3", "best": t, "median": t}
+                       for name, t in best.items()]
+            path.write_text(json.dumps({"meta": {}, "results": results}))
+            return str(path)
+
+        base = write(tmp_path / "base.json", {"delta": 1.0, "theta": 1.0})
+        same = write(tmp_path / "same.json", {"delta": 1.05, "theta": 0.5})
+        slow = write(tmp_path / "slow.json", {"delta": 1.2, "theta": 1.0})
+        assert compare.main([base, same, "--threshold", "0.1"]) == 0
+        assert compare.main([base, slow, "--threshold", "0.1"]) == 1
+        assert compare.main([base, slow, "--threshold", "0.25"]) == 0
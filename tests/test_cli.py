@@ -3,6 +3,7 @@
 import csv
 import tempfile
 import os
+import numpy as np
 import pytest
 from atmospeed.cli import main
 
@@ -48,6 +49,36 @@ class TestCLIPressureAlt:
         assert value == pytest.approx(1484.0, abs=1)
 
 
+class TestCLITable:
+    def test_csv_grid(self, capsys, tmp_path):
+        out_path = tmp_path / "table.csv"
+        main(["table", str(out_path), "--hp", "0:10000:5000", "--disa=-10,10",
+              "--speed", "250", "--columns", "tas,mach"])
+        assert "Wrote 6 rows (3 x 2 x 1)" in capsys.readouterr().out
+        with open(out_path, newline="") as f:
+            reader = list(csv.DictReader(f))
+        assert [float(row["hp"]) for row in reader] == [0, 0, 5000, 5000, 10000, 10000]
+        assert float(reader[0]["tas"]) == pytest.approx(245.7, abs=0.1)
+
+    def test_npz_format(self, capsys, tmp_path):
+        import numpy as np
+
+        out_path = tmp_path / "table.out"
+        main(["table", str(out_path), "--hp", "30000", "--format", "npz"])
+        with np.load(out_path) as data:
+            assert data["sigma"].shape == (1, 1)
+
+    @pytest.mark.parametrize("axis", ["0:100", "10:0:5", "0:100:0", "a,b"])
+    def test_invalid_axis(self, axis):
+        with pytest.raises(SystemExit):
+            main(["table", "out.csv", "--hp", axis])
+
+    def test_invalid_column(self, capsys, tmp_path):
+        with pytest.raises(SystemExit):
+            main(["table", str(tmp_path / "t.csv"), "--hp", "0", "--columns", "tas"])
+        assert "needs a speed axis" in capsys.readouterr().err
+
+
 class TestCLIBatch:
     def test_batch_csv(self, capsys):
         with tempfile.TemporaryDirectory() as tmpdir:
@@ -68,3 +99,359 @@ class TestCLIBatch:
             assert len(reader) == 2
             assert "tas_result" in reader[0]
             assert float(reader[0]["tas_result"]) == pytest.approx(426.1, abs=1)
+
+    def test_batch_mixed_rows_match_point_conversions(self):
+        from atmospeed import Atmo, Speed
+
+        header = ["hp", "temperature", "speed_value", "speed_type",
+                  "alt_unit", "temp_unit", "speed_unit", "temp_is_delta_isa"]
+        rows = [
+            ["31000", "20", "255.6", "cas", "ft", "C", "kts", "true"],
+            ["10000", "-15", "500", " CAS", "m", "F", "kmh", "false"],
+            ["41000", "0", "0.85", "mach", "", "", "", ""],
+            ["35000", "-10", "300", "eas", "ft", "K", "fps", "1"],
+            ["5.5", "437.67", "120", "tas", "sm", "R", "mps", "no"],
+            ["2.1", "-5", "0.62", "Mach", "nm", "C", "mph", "yes"],
+        ]
+        for to_type in ("cas", "eas", "tas", "mach"):
+            with tempfile.TemporaryDirectory() as tmpdir:
+                in_path = os.path.join(tmpdir, "input.csv")
+                out_path = os.path.join(tmpdir, "output.csv")
+                with open(in_path, "w", newline="") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(header)
+                    writer.writerows(rows)
+
+                main(["batch", in_path, out_path, "--to", to_type])
+
+                with open(out_path, newline="") as f:
+                    results = [r[f"{to_type}_result"] for r in csv.DictReader(f)]
+
+            for row, result in zip(rows, results):
+                atmo = Atmo(hp=float(row[0]), temperature=float(row[1]),
+                            temp_is_delta_isa=row[7].lower() in ("true", "1", "yes", ""),
+                            alt_unit=row[4] or "ft", temp_unit=row[5] or "C")
+                spd = Speed(float(row[2]), row[3].strip().lower(),
+                            speed_unit=row[6] or "kts")
+                expected = getattr(spd, f"to_{to_type}")(atmo)
+                assert result == f"{expected:.4f}"
+
+    def test_batch_rejects_altitude_above_top(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            in_path = os.path.join(tmpdir, "input.csv")
+            with open(in_path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["hp", "temperature", "speed_value", "speed_type"])
+                writer.writerow([31000, 0, 250, "cas"])
+                writer.writerow([300000, 0, 250, "cas"])
+
+            with pytest.raises(ValueError):
+                main(["batch", in_path, os.path.join(tmpdir, "out.csv"), "--to", "tas"])
+
+    def test_batch_chunked_matches_whole_file(self, capsys):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            in_path = os.path.join(tmpdir, "input.csv")
+            whole_path = os.path.join(tmpdir, "whole.csv")
+            chunked_path = os.path.join(tmpdir, "chunked.csv")
+
+            with open(in_path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["hp", "temperature", "speed_value", "speed_type"])
+                for i in range(7):
+                    writer.writerow([5000 * i, i - 3, 200 + 10 * i, "cas"])
+
+            main(["batch", in_path, whole_path, "--to", "mach"])
+            main(["batch", in_path, chunked_path, "--to", "mach", "--chunk-size", "3"])
+
+            with open(whole_path, "rb") as f_whole, open(chunked_path, "rb") as f_chunked:
+                assert f_whole.read() == f_chunked.read()
+            assert "Processed 7 rows" in capsys.readouterr().out
+
+    def test_batch_rejects_non_positive_chunk_size(self):
+        with pytest.raises(SystemExit):
+            main(["batch", "in.csv", "out.csv", "--to", "tas", "--chunk-size", "0"])
+
+    def test_batch_workers_match_serial(self, capsys):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            in_path = os.path.join(tmpdir, "input.csv")
+            serial_path = os.path.join(tmpdir, "serial.csv")
+            parallel_path = os.path.join(tmpdir, "parallel.csv")
+
+            with open(in_path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["hp", "temperature", "speed_value", "speed_type"])
+                for i in range(7):
+                    writer.writerow([5000 * i, i - 3, 200 + 10 * i, "cas"])
+
+            main(["batch", in_path, serial_path, "--to", "tas"])
+            main(["batch", in_path, parallel_path, "--to", "tas", "--workers", "2"])
+
+            with open(serial_path, "rb") as f_serial, open(parallel_path, "rb") as f_parallel:
+                assert f_serial.read() == f_parallel.read()
+            assert "Processed 7 rows" in capsys.readouterr().out.splitlines()[-1]
+
+    @pytest.mark.parametrize("options", [[], ["--chunk-size", "2"], ["--workers", "2"]])
+    def test_header_only_input_checks_columns(self, tmp_path, options):
+        in_path = tmp_path / "input.csv"
+        in_path.write_text("hp,temperature,speed\n")
+        with pytest.raises(ValueError, match="speed_value, speed_type"):
+            main(["batch", str(in_path), str(tmp_path / "out.csv"), "--to", "tas", *options])
+
+    def test_batch_rejects_chunk_size_with_workers(self, tmp_path, capsys):
+        with pytest.raises(SystemExit):
+            main(["batch", "in.csv", str(tmp_path / "out.csv"), "--to", "tas",
+                  "--workers", "2", "--chunk-size", "10"])
+        assert "--chunk-size" in capsys.readouterr().err
+
+    @pytest.mark.parametrize("options", [[], ["--chunk-size", "2"], ["--workers", "2"]])
+    def test_batch_output_over_input(self, tmp_path, options):
+        in_path, expected_path = str(tmp_path / "data.csv"), str(tmp_path / "expected.csv")
+        with open(in_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["hp", "temperature", "speed_value", "speed_type"])
+            for i in range(7):
+                writer.writerow([5000 * i, i - 3, 200 + 10 * i, "cas"])
+
+        main(["batch", in_path, expected_path, "--to", "tas"])
+        main(["batch", in_path, in_path, "--to", "tas", *options])
+        with open(in_path, "rb") as f_in, open(expected_path, "rb") as f_expected:
+            assert f_in.read() == f_expected.read()
+        assert sorted(os.listdir(tmp_path)) == ["data.csv", "expected.csv"]
+
+    def test_batch_failure_keeps_input(self, tmp_path):
+        in_path = str(tmp_path / "data.csv")
+        with open(in_path, "w", newline="") as f:
+            f.write("hp,temperature,speed_value,speed_type\n31000,0,250,cas\n31000,0,250,knots\n")
+        with open(in_path, "rb") as f:
+            original = f.read()
+
+        with pytest.raises(ValueError):
+            main(["batch", in_path, in_path, "--to", "tas", "--chunk-size", "1"])
+        with open(in_path, "rb") as f:
+            assert f.read() == original
+        assert os.listdir(tmp_path) == ["data.csv"]
+
+
+class TestCLIBatchBinary:
+    ROWS = [
+        (31000.0, 20.0, 255.6, "cas", "kts"),
+        (10000.0, -15.0, 500.0, "CAS", "kmh"),
+        (41000.0, 0.0, 0.85, "mach", "kts"),
+        (35000.0, -10.0, 300.0, "eas", "fps"),
+    ]
+
+    def _records(self):
+        dtype = [("hp", "f8"), ("temperature", "f8"), ("speed_value", "f8"),
+                 ("speed_type", "S4"), ("speed_unit", "S3")]
+        return np.array(self.ROWS, dtype=dtype)
+
+    def _expected(self, to_type):
+        from atmospeed import Atmo, Speed
+
+        return [getattr(Speed(v, t.lower(), speed_unit=u), f"to_{to_type}")(
+                    Atmo(hp=hp, temperature=disa))
+                for hp, disa, v, t, u in self.ROWS]
+
+    @pytest.mark.parametrize("suffix", [".npy", ".npz", ".csv"])
+    def test_npy_input(self, suffix, tmp_path, capsys):
+        in_path = tmp_path / "input.npy"
+        out_path = tmp_path / f"output{suffix}"
+        np.save(in_path, self._records())
+
+        main(["batch", str(in_path), str(out_path), "--to", "tas", "--chunk-size", "3"])
+
+        if suffix == ".csv":
+            with open(out_path, newline="") as f:
+                results = [float(r["tas_result"]) for r in csv.DictReader(f)]
+            assert results == pytest.approx(self._expected("tas"), abs=5e-5)
+        elif suffix == ".npy":
+            results = np.load(out_path)["tas_result"]
+            assert results.tolist() == pytest.approx(self._expected("tas"), rel=1e-12)
+        else:
+            with np.load(out_path) as data:
+                results = data["tas_result"]
+            assert results.tolist() == pytest.approx(self._expected("tas"), rel=1e-12)
+        assert "Processed 4 rows" in capsys.readouterr().out
+
+    @pytest.mark.parametrize("suffix", [".npy", ".npz"])
+    def test_output_over_input(self, suffix, tmp_path):
+        path = tmp_path / f"data{suffix}"
+        records = self._records()
+        if suffix == ".npy":
+            np.save(path, records)
+        else:
+            np.savez(path, **{name: records[name] for name in records.dtype.names})
+
+        main(["batch", str(path), str(path), "--to", "tas", "--chunk-size", "3"])
+
+        if suffix == ".npy":
+            data = np.load(path)
+        else:
+            with np.load(path) as npz:
+                data = dict(npz)
+        assert data["hp"].tolist() == [row[0] for row in self.ROWS]
+        assert data["tas_result"].tolist() == pytest.approx(self._expected("tas"), rel=1e-12)
+        assert os.listdir(tmp_path) == [path.name]
+
+    def test_npz_and_raw_input_match_npy(self, tmp_path):
+        records = self._records()
+        np.save(tmp_path / "in.npy", records)
+        np.savez(tmp_path / "in.npz", **{name: records[name] for name in records.dtype.names})
+        records.tofile(tmp_path / "in.raw")
+        spec = "hp:f8,temperature:f8,speed_value:f8,speed_type:S4,speed_unit:S3"
+
+        main(["batch", str(tmp_path / "in.npy"), str(tmp_path / "a.npy"), "--to", "mach"])
+        main(["batch", str(tmp_path / "in.npz"), str(tmp_path / "b.npy"), "--to", "mach"])
+        main(["batch", str(tmp_path / "in.raw"), str(tmp_path / "c.npy"), "--to", "mach",
+              "--dtype", spec])
+
+        expected = np.load(tmp_path / "a.npy")
+        assert expected["mach_result"].tolist() == pytest.approx(self._expected("mach"))
+        np.testing.assert_array_equal(np.load(tmp_path / "b.npy"), expected)
+        np.testing.assert_array_equal(np.load(tmp_path / "c.npy"), expected)
+
+    def test_precision(self, tmp_path):
+        in_path = tmp_path / "input.csv"
+        with open(in_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["hp", "temperature", "speed_value", "speed_type"])
+            writer.writerow([31000, 20, 255.6, "cas"])
+
+        main(["batch", str(in_path), str(tmp_path / "out.csv"), "--to", "mach",
+              "--precision", "6"])
+
+        with open(tmp_path / "out.csv", newline="") as f:
+            result = next(csv.DictReader(f))["mach_result"]
+        assert len(result.split(".")[1]) == 6
+
+    def test_bool_column(self, tmp_path):
+        records = np.array([(31000.0, -36.4, 255.6, b"cas", False)],
+                           dtype=[("hp", "f8"), ("temperature", "f8"), ("speed_value", "f8"),
+                                  ("speed_type", "S3"), ("temp_is_delta_isa", "?")])
+        np.save(tmp_path / "in.npy", records)
+
+        main(["batch", str(tmp_path / "in.npy"), str(tmp_path / "out.npy"), "--to", "tas"])
+
+        from atmospeed import Atmo, Speed
+
+        expected = Speed(255.6, "cas").to_tas(
+            Atmo(hp=31000, temperature=-36.4, temp_is_delta_isa=False))
+        assert np.load(tmp_path / "out.npy")["tas_result"][0] == pytest.approx(expected)
+
+    def test_raw_size_mismatch(self, tmp_path):
+        (tmp_path / "in.raw").write_bytes(b"\0" * 10)
+        with pytest.raises(ValueError, match="multiple"):
+            main(["batch", str(tmp_path / "in.raw"), str(tmp_path / "out.npy"),
+                  "--to", "tas", "--dtype", "hp:f8,temperature:f8"])
+
+    def test_workers_need_csv(self, tmp_path, capsys):
+        np.save(tmp_path / "in.npy", self._records())
+        with pytest.raises(SystemExit):
+            main(["batch", str(tmp_path / "in.npy"), str(tmp_path / "out.npy"),
+                  "--to", "tas", "--workers", "2"])
+        assert "--workers" in capsys.readouterr().err
+
+
+class TestBatchParallel:
+    def _write_input(self, path, n_rows, line_terminator="\r\n"):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f, lineterminator=line_terminator)
+            writer.writerow(["hp", "temperature", "speed_value", "speed_type", "speed_unit"])
+            for i in range(n_rows):
+                writer.writerow([1000 * i, i % 7 - 3, 0.3 + i / 100, "mach",
+                                 ["kts", "kmh", "mps"][i % 3]])
+
+    @pytest.mark.parametrize("block_bytes", [1, 64, 1 << 20])
+    def test_byte_ranges_reassemble_in_order(self, block_bytes):
+        from atmospeed import _batch
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            in_path = os.path.join(tmpdir, "input.csv")
+            serial_path = os.path.join(tmpdir, "serial.csv")
+            parallel_path = os.path.join(tmpdir, "parallel.csv")
+            self._write_input(in_path, 40, line_terminator="\n")
+
+            n_serial = _batch.run(in_path, serial_path, "cas")
+            n_parallel = _batch.run_parallel(in_path, parallel_path, "cas",
+                                             workers=3, block_bytes=block_bytes)
+
+            assert n_serial == n_parallel == 40
+            with open(serial_path, "rb") as f_serial, open(parallel_path, "rb") as f_parallel:
+                assert f_serial.read() == f_parallel.read()
+
+    def test_workers_use_parent_precision(self):
+        from atmospeed import _batch
+        from atmospeed.precision import use_precision
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            in_path = os.path.join(tmpdir, "input.csv")
+            paths = [os.path.join(tmpdir, f"out{i}.csv") for i in range(3)]
+            self._write_input(in_path, 40)
+
+            _batch.run(in_path, paths[0], "cas", decimals=10)
+            with use_precision("float32"):
+                _batch.run(in_path, paths[1], "cas", decimals=10)
+                _batch.run_parallel(in_path, paths[2], "cas", workers=2, block_bytes=64,
+                                    decimals=10)
+
+            outputs = []
+            for path in paths:
+                with open(path, "rb") as f:
+                    outputs.append(f.read())
+            float64, serial, parallel = outputs
+            assert parallel == serial != float64
+
+    def test_line_ranges_cover_file_at_line_boundaries(self):
+        from atmospeed._batch import _line_ranges
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            in_path = os.path.join(tmpdir, "input.csv")
+            self._write_input(in_path, 25)
+            with open(in_path, "rb") as f:
+                data = f.read()
+                ranges = _line_ranges(f, 0, len(data), 50)
+
+        assert ranges[0][0] == 0
+        assert ranges[-1][1] == len(data)
+        for (_, stop), (start, _) in zip(ranges, ranges[1:]):
+            assert stop == start
+            assert data[stop - 1:stop] == b"\n"
+
+    def test_worker_error_propagates(self):
+        from atmospeed import _batch
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            in_path = os.path.join(tmpdir, "input.csv")
+            with open(in_path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["hp", "temperature", "speed_value", "speed_type"])
+                writer.writerow([31000, 0, 250, "cas"])
+                writer.writerow([31000, 0, 250, "knots"])
+
+            with pytest.raises(ValueError):
+                _batch.run_parallel(in_path, os.path.join(tmpdir, "out.csv"), "tas",
+                                    workers=2, block_bytes=16)
+
+
+class TestBatchProgress:
+    def test_reports_rate_and_eta(self):
+        import io
+        from atmospeed._batch import Progress
+
+        stream = io.StringIO()
+        progress = Progress(total_bytes=1000, interval=0.0, stream=stream)
+        progress.update(rows=500, bytes_done=250)
+        report = stream.getvalue()
+        assert "500 rows" in report
+        assert "rows/s" in report
+        assert "25.0% done" in report
+        assert "ETA" in report
+
+    def test_respects_interval(self):
+        import io
+        from atmospeed._batch import Progress
+
+        stream = io.StringIO()
+        progress = Progress(total_bytes=1000, interval=3600.0, stream=stream)
+        progress.update(rows=500, bytes_done=250)
+        assert stream.getvalue() == ""
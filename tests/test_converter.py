@@ -0,0 +1,90 @@
+"""Tests for prepared converters."""
+
+import numpy as np
+import pytest
+from atmospeed import Atmo, Converter, Speed, make_converter
+
+TYPES = ("cas", "eas", "tas", "mach")
+
+
+def _expected(from_type, to_type, value, hp, temp, speed_unit="kts", alt_unit="ft",
+              temp_unit="C", temp_is_delta_isa=True):
+    atmo = Atmo(hp, temp, temp_is_delta_isa, alt_unit, temp_unit)
+    return getattr(Speed(value, from_type, speed_unit), f"to_{to_type}")(atmo)
+
+
+class TestMakeConverter:
+    def test_returns_cached_converter(self):
+        converter = make_converter("cas", "tas")
+        assert isinstance(converter, Converter)
+        assert make_converter("cas", "tas") is converter
+
+    def test_resolves_units(self):
+        converter = make_converter("cas", "mach", "mps", "m", "F", False)
+        assert converter.from_type == "cas"
+        assert converter.to_type == "mach"
+        assert converter.speed_unit == "mps"
+        assert converter.alt_unit == "m"
+        assert converter.temp_unit == "F"
+        assert converter.temp_is_delta_isa is False
+
+    @pytest.mark.parametrize("args", [("cas", "foo"), ("cas", "tas", "furlong/s"),
+                                      ("cas", "tas", "kts", "parsec")])
+    def test_unknown_type_or_unit(self, args):
+        with pytest.raises(ValueError):
+            make_converter(*args)
+
+
+class TestConverterCall:
+    @pytest.mark.parametrize("from_type", TYPES)
+    @pytest.mark.parametrize("to_type", TYPES)
+    def test_point_matches_speed(self, from_type, to_type):
+        value = 0.78 if from_type == "mach" else 265.0
+        converter = make_converter(from_type, to_type)
+        assert converter(value, 33000, 12.0) == _expected(from_type, to_type, value, 33000, 12.0)
+
+    @pytest.mark.parametrize("units", [("mps", "m", "F", False), ("kmh", "km", "K", True),
+                                       ("fps", "nm", "R", False)])
+    def test_point_units_match_speed(self, units):
+        converter = make_converter("cas", "tas", *units)
+        temp = {"F": -40.0, "K": 5.0, "R": 420.0}[units[2]]
+        assert converter(150.0, 3.5, temp) == _expected("cas", "tas", 150.0, 3.5, temp, *units)
+
+    def test_arrays_match_speed(self):
+        hp = np.linspace(0, 60000, 7)
+        kcas = np.linspace(150, 350, 7)
+        converter = make_converter("cas", "mach")
+        expected = _expected("cas", "mach", kcas, hp, -5.0)
+        np.testing.assert_array_equal(converter(kcas, hp, -5.0), expected)
+
+        out = np.empty(7)
+        assert converter(kcas, hp, -5.0, out=out) is out
+        np.testing.assert_array_equal(out, expected)
+
+    @pytest.mark.filterwarnings("ignore::RuntimeWarning")
+    @pytest.mark.parametrize("from_type", TYPES)
+    @pytest.mark.parametrize("to_type", TYPES)
+    @pytest.mark.parametrize("value, temp", [(265.0, -400.0), (1e200, 0.0), (265.0, -288.15)])
+    def test_out_of_domain_point_matches_array(self, from_type, to_type, value, temp):
+        converter = make_converter(from_type, to_type)
+        expected = converter(np.array([value]), np.array([0.0]), np.array([temp]))[0]
+        np.testing.assert_equal(converter(value, 0.0, temp), expected)
+        atmo = Atmo(0.0, temp)
+        np.testing.assert_equal(converter.at(value, atmo), expected)
+        np.testing.assert_equal(getattr(Speed(value, from_type), f"to_{to_type}")(atmo),
+                                expected)
+
+    def test_same_type_returns_value(self):
+        assert make_converter("tas", "tas")(412.0, 31000) == 412.0
+
+    def test_rejects_altitude_above_top(self):
+        with pytest.raises(ValueError, match="86 km"):
+            make_converter("cas", "tas")(250.0, 300000)
+        with pytest.raises(ValueError, match="86 km"):
+            make_converter("cas", "tas", alt_unit="m")(250.0, 85000)
+
+    def test_at_existing_atmo(self):
+        atmo = Atmo(np.array([10000.0, 35000.0]), 10.0)
+        converter = make_converter("mach", "eas", "mph")
+        np.testing.assert_array_equal(converter.at(0.8, atmo),
+                                      Speed(0.8, "mach", "mph").to_eas(atmo))
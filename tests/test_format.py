@@ -0,0 +1,49 @@
+"""Tests for the vectorized CSV formatter."""
+
+import csv
+import io
+
+import numpy as np
+import pytest
+from atmospeed._format import csv_bytes, fixed_field, format_fixed, text_field
+
+
+class TestFormatFixed:
+    @pytest.mark.parametrize("decimals", [0, 1, 4, 7])
+    def test_matches_python_formatting(self, decimals):
+        rng = np.random.default_rng(0)
+        values = np.concatenate([
+            rng.normal(0, 1e4, 2000),
+            rng.normal(0, 1, 2000),
+            np.round(rng.normal(0, 100, 2000), decimals) + 0.5 * 10.0 ** -decimals,
+        ])
+        expected = [f"{value:.{decimals}f}" for value in values.tolist()]
+        assert format_fixed(values, decimals) == expected
+
+    def test_special_values(self):
+        values = [0.0, -0.0, -0.00001, 0.5, 1.5, 2.5, 0.00005, 1e300, -1e20,
+                  np.nan, np.inf, -np.inf]
+        expected = [f"{value:.4f}" for value in values]
+        assert format_fixed(values) == expected
+
+    def test_empty(self):
+        assert format_fixed(np.array([])) == []
+
+    @pytest.mark.parametrize("decimals", [18, 19, 25])
+    def test_many_decimals(self, decimals):
+        values = [0.1, -2.5, 1234.5678, 0.0, np.nan]
+        assert format_fixed(values, decimals) == [f"{value:.{decimals}f}" for value in values]
+        assert format_fixed([], decimals) == []
+
+
+class TestCsvBytes:
+    def test_matches_csv_writer(self):
+        rows = [[1.25, "cas", True], [-3.0, 'a,"b"', False], [1e6, "", True]]
+        columns = list(zip(*rows))
+        text = csv_bytes([fixed_field(columns[0], 2), text_field(np.array(columns[1])),
+                          text_field(np.array(columns[2]))])
+
+        expected = io.StringIO()
+        csv.writer(expected).writerows(
+            [f"{a:.2f}", b, str(c)] for a, b, c in rows)
+        assert text.decode() == expected.getvalue()
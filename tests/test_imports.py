@@ -0,0 +1,72 @@
+"""Tests for lazy package imports and CLI startup cost."""
+
+import subprocess
+import sys
+
+import pytest
+
+import atmospeed
+
+# Cumulative import time allowed for ``import atmospeed.cli`` (which is all
+# ``atmospeed --help`` loads). It takes a few ms; importing NumPy alone
+# takes several times the budget.
+CLI_IMPORT_BUDGET_US = 30_000
+
+
+def _run(code, *options):
+    result = subprocess.run([sys.executable, *options, "-c", code],
+                            capture_output=True, text=True, check=True)
+    return result
+
+
+def _import_times(code):
+    """Cumulative import time in microseconds of each module ``code`` imports."""
+    times = {}
+    for line in _run(code, "-X", "importtime").stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestLazyImports:
+    def test_every_public_name_resolves(self):
+        for name in atmospeed.__all__:
+            assert getattr(atmospeed, name) is not None
+        assert set(atmospeed.__all__) <= set(dir(atmospeed))
+
+    def test_star_import(self):
+        namespace = {}
+        exec("from atmospeed import *", namespace)
+        assert namespace["Atmo"] is atmospeed.Atmo
+        assert namespace["theta"] is atmospeed.theta
+
+    def test_unknown_name(self):
+        with pytest.raises(AttributeError, match="no_such_name"):
+            atmospeed.no_such_name
+
+    def test_package_import_loads_no_numpy(self):
+        out = _run("import sys, atmospeed; print('numpy' in sys.modules)").stdout
+        assert out.strip() == "False"
+
+
+class TestCLIStartup:
+    def test_help_import_budget(self):
+        times = _import_times("import atmospeed.cli")
+        assert "numpy" not in times
+        assert "atmospeed._batch" not in times
+        assert times["atmospeed.cli"] < CLI_IMPORT_BUDGET_US
+
+    def test_help_loads_no_numpy(self):
+        code = ("import sys\nfrom atmospeed.cli import main\n"
+                "try:\n    main(['--help'])\nexcept SystemExit:\n    pass\n"
+                "print('numpy' in sys.modules)")
+        assert _run(code).stdout.strip().endswith("False")
+
+    def test_convert_skips_batch_engine(self):
+        code = ("import sys\nfrom atmospeed.cli import main\n"
+                "main(['convert', '--hp', '31000', '--temp', '0', '--atmo'])\n"
+                "print('atmospeed._batch' in sys.modules, 'concurrent.futures' in sys.modules)")
+        assert _run(code).stdout.strip().endswith("False False")
@@ -0,0 +1,138 @@
+"""Tests for the float32 precision policy."""
+
+import threading
+
+import numpy as np
+import pytest
+
+from atmospeed import (
+    Atmo, RatioTable, Speed, SpeedArray, delta, get_precision, isa, oat, set_precision, sigma,
+    theta, use_precision,
+)
+from atmospeed import _speed_conv as sc
+
+KERNELS_BY_DELTA = [sc.kcas_to_keas, sc.kcas_to_mach, sc.keas_to_kcas, sc.keas_to_mach,
+                    sc.mach_to_kcas, sc.mach_to_keas]
+KERNELS_BY_DISA = [sc.kcas_to_ktas, sc.keas_to_ktas, sc.ktas_to_kcas, sc.ktas_to_keas,
+                   sc.ktas_to_mach, sc.mach_to_ktas]
+
+# Documented bound on the relative error of every float32 speed conversion
+SPEED_BOUND = 1e-6
+
+RNG = np.random.default_rng(11)
+N = 200_000
+HP = RNG.uniform(-1000.0, 65616.0, N).astype(np.float32)
+DISA = RNG.uniform(-40.0, 40.0, N).astype(np.float32)
+KTS = RNG.uniform(50.0, 600.0, N).astype(np.float32)
+MACH = RNG.uniform(0.1, 0.95, N).astype(np.float32)
+
+
+def rel_error(result, expected):
+    return np.max(np.abs(result / expected - 1.0))
+
+
+class TestPolicy:
+    def test_default_is_float64(self):
+        assert get_precision() == "float64"
+        assert delta(HP).dtype == np.float64
+
+    def test_unknown_precision(self):
+        with pytest.raises(ValueError):
+            set_precision("float16")
+        with pytest.raises(ValueError):
+            with use_precision("half"):
+                pass
+
+    def test_set_precision(self):
+        try:
+            assert set_precision("float32") == "float32"
+            assert delta(HP).dtype == np.float32
+        finally:
+            set_precision("float64")
+        assert delta(HP).dtype == np.float64
+
+    def test_use_precision_is_scoped(self):
+        with use_precision("float32"):
+            assert get_precision() == "float32"
+            assert theta(HP, DISA).dtype == np.float32
+        assert get_precision() == "float64"
+
+    def test_use_precision_is_per_thread(self):
+        seen = []
+        with use_precision("float32"):
+            thread = threading.Thread(target=lambda: seen.append(delta(HP[:10]).dtype))
+            thread.start()
+            thread.join()
+        assert seen == [np.float64]
+
+    def test_scalars_stay_python_floats(self):
+        with use_precision("float32"):
+            assert type(delta(30000.0)) is float
+            assert type(sc.kcas_to_ktas(250.0, 30000.0, 10.0)) is float
+
+
+class TestFloat32Kernels:
+    @pytest.fixture(autouse=True)
+    def float32(self):
+        with use_precision("float32"):
+            yield
+
+    @pytest.mark.parametrize("func", [isa, delta])
+    def test_altitude_functions(self, func):
+        result = func(HP)
+        assert result.dtype == np.float32
+        assert rel_error(result, func(HP.astype(float))) < 1e-6
+
+    def test_upper_layers(self):
+        hp = np.random.default_rng(12).uniform(65616.0, 167000.0, N).astype(np.float32)
+        result = delta(hp)
+        assert result.dtype == np.float32
+        with use_precision("float64"):
+            expected = delta(hp.astype(float))
+        assert rel_error(result, expected) < 1e-6
+
+    @pytest.mark.parametrize("func", [theta, sigma, oat])
+    def test_temperature_functions(self, func):
+        result = func(HP, DISA)
+        assert result.dtype == np.float32
+        expected = func(HP.astype(float), DISA.astype(float))
+        assert np.max(np.abs(result - expected)) <= 1e-6 * np.max(np.abs(expected))
+
+    @pytest.mark.parametrize("func", KERNELS_BY_DELTA + KERNELS_BY_DISA)
+    def test_speed_error_bound(self, func):
+        speed = MACH if func.__name__.startswith("mach") else KTS
+        args = (HP,) if func in KERNELS_BY_DELTA else (HP, DISA)
+        result = func(speed, *args)
+        assert result.dtype == np.float32
+        with use_precision("float64"):
+            expected = func(speed.astype(float), *(a.astype(float) for a in args))
+        assert rel_error(result, expected) < SPEED_BOUND
+
+    def test_float64_inputs_are_cast(self):
+        assert sc.kcas_to_ktas(KTS.astype(float), HP.astype(float), 0.0).dtype == np.float32
+
+    def test_out_and_float64_out(self):
+        out = np.empty(N, dtype=np.float32)
+        assert sc.ktas_to_kcas(KTS, HP, DISA, out=out) is out
+        wide = np.empty(N)
+        sc.ktas_to_kcas(KTS, HP, DISA, out=wide)
+        np.testing.assert_array_equal(wide, out)
+
+    def test_classes_keep_float32(self):
+        atmo = Atmo(hp=HP, temperature=DISA)
+        assert atmo.snapshot().sigma.dtype == np.float32
+        assert atmo.speed_of_sound("mps").dtype == np.float32
+        assert Speed(KTS, "cas", "kmh").to_tas(atmo).dtype == np.float32
+        speeds = SpeedArray(KTS, np.tile(["cas", "eas", "tas", "mach"], N // 4))
+        assert speeds.to_mach(atmo).dtype == np.float32
+
+    def test_atmo_keeps_its_construction_precision(self):
+        atmo = Atmo(hp=HP, temperature=DISA)
+        with use_precision("float64"):
+            assert atmo.theta.dtype == np.float32
+            assert Atmo(hp=HP, temperature=DISA).theta.dtype == np.float64
+
+    def test_table_mode(self):
+        result = sigma(HP, DISA, table=RatioTable())
+        assert result.dtype == np.float32
+        assert rel_error(result, sigma(HP, DISA)) < 1e-6
@@ -0,0 +1,113 @@
+"""Tests for the opt-in profiling layer."""
+
+import pickle
+import threading
+
+import numpy as np
+
+from atmospeed import profile, theta
+from atmospeed import _speed_conv as sc
+from atmospeed import profiling
+from atmospeed.cli import main
+
+
+class TestProfile:
+    def test_disabled_by_default(self):
+        assert profiling.active() is None
+        assert profiling.phase("anything") is profiling.phase("other")
+
+    def test_counts_calls_and_elements(self):
+        with profile() as prof:
+            theta(np.zeros(10))
+            theta(1000.0, 5.0)
+            sc.kcas_to_ktas(np.full(4, 250.0), np.zeros(4), np.zeros(4))
+        stats = prof.functions
+        assert stats["ratio.theta"].calls == 2
+        assert stats["ratio.theta"].elements == 11
+        assert stats["_speed_conv.kcas_to_ktas"].elements == 4
+        assert all(s.seconds >= 0 for s in stats.values())
+        assert profiling.active() is None
+
+    def test_results_unchanged(self):
+        hp = np.linspace(0.0, 60000.0, 50)
+        expected = sc.mach_to_kcas(np.full(50, 0.8), hp)
+        with profile():
+            assert np.array_equal(sc.mach_to_kcas(np.full(50, 0.8), hp), expected)
+
+    def test_nested_blocks(self):
+        with profile() as outer:
+            theta(0.0)
+            with profile() as inner:
+                theta(0.0)
+            theta(0.0)
+        assert outer.functions["ratio.theta"].calls == 2
+        assert inner.functions["ratio.theta"].calls == 1
+
+    def test_concurrent_blocks_in_threads(self):
+        first_in, second_in, first_out = (threading.Event() for _ in range(3))
+        profiles = {}
+
+        def first():
+            with profile() as prof:
+                first_in.set()
+                second_in.wait()
+                theta(0.0)
+            profiles["first"] = prof
+            first_out.set()
+
+        def second():
+            first_in.wait()
+            with profile() as prof:
+                second_in.set()
+                first_out.wait()
+                theta(0.0)
+                theta(0.0)
+            profiles["second"] = prof
+            profiles["after"] = profiling.active()
+
+        threads = [threading.Thread(target=first), threading.Thread(target=second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert profiles["first"].functions["ratio.theta"].calls == 1
+        assert profiles["second"].functions["ratio.theta"].calls == 2
+        assert profiles["after"] is None
+        assert profiling.active() is None
+
+    def test_phases(self):
+        with profile() as prof:
+            for _ in range(3):
+                with profiling.phase("work"):
+                    pass
+        assert prof.phases["work"].calls == 3
+        assert "work" in prof.report()
+
+    def test_wrapped_functions_keep_identity(self):
+        assert theta.__name__ == "theta"
+        assert "Args:" in theta.__doc__
+        assert pickle.loads(pickle.dumps(sc.kcas_to_keas)) is sc.kcas_to_keas
+
+
+class TestCLIProfile:
+    def test_batch_profile_report(self, capsys, tmp_path):
+        in_path = tmp_path / "input.csv"
+        in_path.write_text("hp,temperature,speed_value,speed_type,alt_unit\n"
+                           "31000,20,255.6,cas,ft\n10000,0,0.5,mach,m\n")
+        main(["batch", str(in_path), str(tmp_path / "out.csv"), "--to", "tas", "--profile"])
+        err = capsys.readouterr().err
+        for name in ("cli.batch", "batch.read", "batch.parse", "batch.units",
+                     "batch.convert", "batch.write", "convert.length_to_feet"):
+            assert name in err
+        assert profiling.active() is None
+
+    def test_no_report_without_flag(self, capsys):
+        main(["convert", "--hp", "31000", "--temp", "0", "--atmo"])
+        assert capsys.readouterr().err == ""
+
+    def test_parallel_batch_profile(self, capsys, tmp_path):
+        in_path = tmp_path / "input.csv"
+        in_path.write_text("hp,temperature,speed_value,speed_type\n31000,20,255.6,cas\n")
+        main(["batch", str(in_path), str(tmp_path / "out.csv"), "--to", "tas",
+              "--workers", "2", "--profile"])
+        assert "batch.wait" in capsys.readouterr().err
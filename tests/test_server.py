@@ -0,0 +1,162 @@
+"""Tests for the conversion server and its client."""
+
+import asyncio
+import socket
+import threading
+
+import pytest
+
+from atmospeed import Atmo, Speed, pressure_altitude
+from atmospeed import server
+from atmospeed.cli import main
+
+CONVERT = {"op": "convert", "hp": 31000, "temp": 0, "speed": 250, "from": "cas", "to": "tas"}
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield loop
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def _start(loop, **kwargs):
+    return asyncio.run_coroutine_threadsafe(server.start_server(**kwargs), loop).result(5)
+
+
+def _stop(loop, srv):
+    async def stop():
+        srv.close()
+        await srv.wait_closed()
+
+    asyncio.run_coroutine_threadsafe(stop(), loop).result(5)
+
+
+@pytest.fixture
+def port(loop):
+    srv = _start(loop, port=0)
+    yield srv.address[1]
+    _stop(loop, srv)
+
+
+class TestServer:
+    def test_convert(self, port):
+        response = server.request({**CONVERT, "id": 7}, port=port)
+        expected = Speed(250, "cas").to_tas(Atmo(hp=31000, temperature=0))
+        assert response["id"] == 7
+        assert response["result"] == pytest.approx(expected, rel=1e-14)
+
+    def test_convert_units_and_oat(self, port):
+        request = {"op": "convert", "hp": 3000, "temp": 10, "oat": True, "alt_unit": "m",
+                   "temp_unit": "F", "speed": 0.6, "from": "mach", "to": "eas",
+                   "speed_unit": "kmh"}
+        atmo = Atmo(hp=3000, temperature=10, temp_is_delta_isa=False, alt_unit="m",
+                    temp_unit="F")
+        expected = Speed(0.6, "mach", speed_unit="kmh").to_eas(atmo)
+        assert server.request(request, port=port)["result"] == pytest.approx(expected, rel=1e-14)
+
+    def test_atmo(self, port):
+        result = server.request({"op": "atmo", "hp": 41000, "temp": -5}, port=port)["result"]
+        state = Atmo(hp=41000, temperature=-5).snapshot()
+        for name, value in state._asdict().items():
+            assert result[name] == pytest.approx(value, rel=1e-14)
+
+    def test_pressure_alt(self, port):
+        request = {"op": "pressure-alt", "elevation": 500, "altimeter": 1000,
+                   "elev_unit": "m", "altimeter_unit": "hPa"}
+        expected = pressure_altitude(500, 1000, elev_unit="m", altimeter_unit="hPa")
+        assert server.request(request, port=port)["result"] == pytest.approx(expected, rel=1e-14)
+
+    def test_batch_keeps_order_and_isolates_errors(self, port):
+        requests = [{**CONVERT, "hp": hp, "id": i}
+                    for i, hp in enumerate([0, 10000, 300000, 30000])]
+        requests += [{"op": "convert", "hp": 0}, {"op": "unknown"}, {**CONVERT, "oat": "yes"}]
+        responses = server.request(requests, port=port)
+        assert [r.get("id") for r in responses[:4]] == [0, 1, 2, 3]
+        assert "86 km" in responses[2]["error"]
+        for i in (0, 1, 3):
+            assert responses[i]["result"] == pytest.approx(
+                Speed(250, "cas").to_tas(Atmo(hp=requests[i]["hp"], temperature=0)), rel=1e-14)
+        assert responses[4]["error"] == "Missing field: 'temp'"
+        assert "Unknown op" in responses[5]["error"]
+        assert "oat" in responses[6]["error"]
+
+    def test_invalid_json(self, port):
+        with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+            sock.sendall(b"not json\n[1, 2]\n")
+            f = sock.makefile("rb")
+            lines = f.readline(), f.readline()
+        assert all(b"Invalid request" in line for line in lines)
+
+    @pytest.mark.parametrize("value", [10 ** 400, float("nan"), float("inf")])
+    def test_non_finite_numbers_only_fail_their_request(self, port, value):
+        responses = server.request([CONVERT, {**CONVERT, "hp": value}, CONVERT], port=port)
+        assert "finite" in responses[1]["error"]
+        assert responses[0]["result"] == responses[2]["result"]
+
+    @pytest.mark.filterwarnings("error")
+    def test_nan_result_is_null(self, port):
+        response = server.request({"op": "atmo", "hp": 31000, "temp": -300, "oat": True},
+                                  port=port)
+        assert response["result"]["speed_of_sound_kts"] is None
+        assert response["result"]["oat"] == -300.0
+
+    def test_unexpected_error_answers_whole_batch(self, port, monkeypatch):
+        def fail(op, key, values):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(server, "_compute", fail)
+        responses = server.request([CONVERT, {**CONVERT, "speed": 300}], port=port)
+        assert [r["error"] for r in responses] == ["boom", "boom"]
+
+    def test_failed_batch_still_answers_every_request(self, port, monkeypatch):
+        def fail(op, key, values):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(server, "_evaluate", fail)
+        responses = server.request([CONVERT, CONVERT], port=port)
+        assert [r["error"] for r in responses] == ["Internal server error"] * 2
+
+    def test_concurrent_requests_are_batched(self, port):
+        responses = server.request([CONVERT] * 200, port=port)
+        assert len({r["result"] for r in responses}) == 1
+        stats = server.request({"op": "stats"}, port=port)["result"]
+        assert stats["requests"] == 200
+        assert stats["batches"] < 200
+        assert stats["latency_ms"]["p50"] <= stats["latency_ms"]["p99"]
+
+    def test_many_clients(self, port):
+        results = []
+
+        def client():
+            results.extend(r["result"] for r in server.request([CONVERT] * 20, port=port))
+
+        threads = [threading.Thread(target=client) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(results) == 160
+
+    @pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="needs Unix sockets")
+    def test_unix_socket(self, loop, tmp_path):
+        path = str(tmp_path / "atmospeed.sock")
+        srv = _start(loop, path=path, batch_window=0.001)
+        try:
+            assert server.request(CONVERT, path=path)["result"] == pytest.approx(400.168, abs=1e-3)
+        finally:
+            _stop(loop, srv)
+
+    def test_requires_one_address(self):
+        with pytest.raises(ValueError):
+            server.request(CONVERT)
+        with pytest.raises(ValueError):
+            asyncio.run(server.start_server(path="x.sock", port=0))
+
+    def test_cli_requires_address(self):
+        with pytest.raises(SystemExit):
+            main(["serve"])
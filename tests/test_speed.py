@@ -1,8 +1,14 @@
 """Tests for speed conversions — both internal functions and Speed class.
 Ported from Dart atmospeed_test.dart with identical expected values."""
 
+import tracemalloc
+
+import numpy as np
 import pytest
-from atmospeed import Atmo, Speed
+from atmospeed import (
+    Atmo, Speed, SpeedArray, cache_info, clear_cache, delta, disable_cache, enable_cache, sigma,
+    speed_convert,
+)
 from atmospeed._speed_conv import (
     kcas_to_keas, kcas_to_ktas, kcas_to_mach,
     keas_to_kcas, keas_to_ktas, keas_to_mach,
@@ -58,6 +64,53 @@ class TestMachConversions:
         assert mach_to_kcas(0.74, 21755) == pytest.approx(331.6, abs=0.1)
 
 
+class TestScalarKernels:
+    """Python float inputs take the pure-Python kernels."""
+
+    RNG = np.random.default_rng(11)
+    HP = RNG.uniform(0.0, 65616.0, 200)
+    DISA = RNG.uniform(-30.0, 30.0, 200)
+    KTS = RNG.uniform(80.0, 600.0, 200)
+    MACH = RNG.uniform(0.1, 0.95, 200)
+
+    @pytest.mark.parametrize("func", [
+        kcas_to_keas, kcas_to_mach, keas_to_kcas, keas_to_mach, mach_to_kcas, mach_to_keas,
+    ])
+    def test_matches_array_path(self, func):
+        value = self.MACH if func.__name__.startswith("mach") else self.KTS
+        scalars = [func(v, h) for v, h in zip(value.tolist(), self.HP.tolist())]
+        assert all(type(r) is float for r in scalars)
+        assert scalars == pytest.approx(func(value, self.HP), rel=1e-11)
+
+    @pytest.mark.parametrize("func", [
+        kcas_to_ktas, keas_to_ktas, ktas_to_kcas, ktas_to_keas, ktas_to_mach, mach_to_ktas,
+    ])
+    def test_matches_array_path_with_disa(self, func):
+        value = self.MACH if func.__name__.startswith("mach") else self.KTS
+        scalars = [func(v, h, d) for v, h, d in
+                   zip(value.tolist(), self.HP.tolist(), self.DISA.tolist())]
+        assert all(type(r) is float for r in scalars)
+        assert scalars == pytest.approx(func(value, self.HP, self.DISA), rel=1e-11)
+
+    @pytest.mark.filterwarnings("ignore::RuntimeWarning")
+    @pytest.mark.parametrize("func", [
+        kcas_to_ktas, keas_to_ktas, ktas_to_kcas, ktas_to_keas, ktas_to_mach, mach_to_ktas,
+    ])
+    @pytest.mark.parametrize("value, disa", [(250.0, -400.0), (1e200, 0.0)])
+    def test_out_of_domain_matches_array_path(self, func, value, disa):
+        # math raises for these; the scalar path gives NaN or inf like arrays
+        expected = func(np.array([value]), np.array([10000.0]), np.array([disa]))[0]
+        np.testing.assert_equal(func(value, 10000.0, disa), expected)
+
+    def test_speed_class(self):
+        atmo = Atmo(hp=31000, temperature=5)
+        arrays = Atmo(hp=[31000.0], temperature=[5.0])
+        for speed in (Speed(250, "cas"), Speed(0.8, "mach"), Speed(140, "eas", "mps")):
+            for to in ("to_cas", "to_eas", "to_tas", "to_mach"):
+                assert getattr(speed, to)(atmo) == pytest.approx(
+                    np.ravel(getattr(speed, to)(arrays))[0], rel=1e-11)
+
+
 class TestSpeedClassToCAS:
     def test_eas_to_cas_kts(self):
         spd = Speed(219.4, "eas")
@@ -174,3 +227,240 @@ class TestSpeedUnitConversion:
     def test_standalone_speed_convert(self):
         from atmospeed import speed_convert
         assert speed_convert(147.8, "kts", "fps") == pytest.approx(249.5, abs=0.1)
+
+
+class TestSpeedClassArrayAtmo:
+    def test_trace_matches_point_conversions(self):
+        hp = np.array([6944.0, 23030.0, 37844.0, 47854.0])
+        disa = np.array([0.0, -24.0, 17.0, 11.0])
+        kcas = np.array([148.7, 285.3, 281.7, 250.0])
+        atmo = Atmo(hp=hp, temperature=disa, temp_unit="F")
+        spd = Speed(kcas, "cas", speed_unit="mph")
+
+        for target in ("eas", "tas", "mach"):
+            result = getattr(spd, f"to_{target}")(atmo)
+            assert result.shape == (4,)
+            for i in range(4):
+                point = getattr(Speed(float(kcas[i]), "cas", speed_unit="mph"), f"to_{target}")(
+                    Atmo(hp=float(hp[i]), temperature=float(disa[i]), temp_unit="F"))
+                assert result[i] == pytest.approx(point, rel=1e-12)
+
+    def test_scalar_speed_over_trace(self):
+        atmo = Atmo(hp=np.linspace(0, 40000, 5), temperature=0)
+        tas = Speed(0.78, "mach").to_tas(atmo)
+        assert tas.shape == (5,)
+        assert tas[0] == pytest.approx(Speed(0.78, "mach").to_tas(Atmo(hp=0, temperature=0)))
+
+
+class TestSpeedArray:
+    VALUES = [148.7, 0.74, 285.3, 719.7, 528.4, 0.8474, 90.0]
+    TYPES = ["cas", "mach", "eas", "tas", "cas", "mach", "eas"]
+    UNITS = ["kts", "kts", "kts", "fps", "kmh", "mph", "mps"]
+    HP = np.array([6944.0, 21755.0, 23030.0, 33485.0, 37844.0, 47854.0, 16543.0])
+    DISA = np.array([0.0, 5.0, -24.0, 15.0, -10.0, 11.0, 33.0])
+
+    @pytest.mark.parametrize("target", ["cas", "eas", "tas", "mach"])
+    def test_mixed_types_match_speed(self, target):
+        atmo = Atmo(hp=self.HP, temperature=self.DISA)
+        result = getattr(SpeedArray(self.VALUES, self.TYPES, self.UNITS), f"to_{target}")(atmo)
+        assert result.shape == (7,)
+        for i in range(7):
+            spd = Speed(self.VALUES[i], self.TYPES[i], speed_unit=self.UNITS[i])
+            point = Atmo(hp=float(self.HP[i]), temperature=float(self.DISA[i]))
+            assert result[i] == getattr(spd, f"to_{target}")(point)
+
+    def test_single_type_and_unit_broadcast(self):
+        atmo = Atmo(hp=self.HP, temperature=0)
+        result = SpeedArray(np.full(7, 250.0), "cas", "kts").to_tas(atmo)
+        expected = Speed(np.full(7, 250.0), "cas").to_tas(atmo)
+        assert np.array_equal(result, expected)
+
+    def test_scalar_atmo_broadcasts(self):
+        speeds = SpeedArray([250.0, 0.78], ["cas", "mach"])
+        result = speeds.to_eas(Atmo(hp=35000, temperature=0))
+        assert result[0] == pytest.approx(Speed(250.0, "cas").to_eas(Atmo(hp=35000, temperature=0)))
+        assert result[1] == pytest.approx(Speed(0.78, "mach").to_eas(Atmo(hp=35000, temperature=0)))
+
+    def test_from_codes(self):
+        type_codes = [SpeedArray.TYPES.index(t) for t in self.TYPES]
+        unit_codes = [SpeedArray.UNITS.index(u) for u in self.UNITS]
+        atmo = Atmo(hp=self.HP, temperature=self.DISA)
+        from_codes = SpeedArray.from_codes(self.VALUES, type_codes, unit_codes)
+        from_labels = SpeedArray(self.VALUES, self.TYPES, self.UNITS)
+        assert np.array_equal(from_codes.type_codes, from_labels.type_codes)
+        assert np.array_equal(from_codes.to_mach(atmo), from_labels.to_mach(atmo))
+
+    def test_from_codes_rejects_out_of_range(self):
+        with pytest.raises(ValueError):
+            SpeedArray.from_codes([250.0], [4], [0])
+
+    def test_rejects_unknown_type(self):
+        with pytest.raises(ValueError):
+            SpeedArray([250.0, 300.0], ["cas", "ias"])
+
+
+class TestResultCache:
+    @pytest.fixture(autouse=True)
+    def cache(self):
+        enable_cache(maxsize=4)
+        yield
+        disable_cache()
+
+    def test_disabled_by_default(self):
+        disable_cache()
+        assert cache_info() is None
+        Speed(250, "cas").to_tas(Atmo(hp=31000, temperature=5))
+        assert cache_info() is None
+
+    def test_hit_returns_same_result(self):
+        expected = Speed(250, "cas").to_tas(Atmo(hp=31000, temperature=5))
+        for _ in range(3):
+            assert Speed(250, "cas").to_tas(Atmo(hp=31000, temperature=5)) == expected
+        info = cache_info()
+        assert info.hits == 3
+        assert info.misses == 2  # one conversion, one atmosphere lookup
+
+    def test_keys_normalized_to_si(self):
+        Speed(250, "cas").to_mach(Atmo(hp=10000, temperature=10))
+        result = Speed(250 * 1.852, "cas", "kmh").to_mach(
+            Atmo(hp=10000, temperature=18, temp_unit="F"))
+        assert cache_info().hits == 1
+        assert result == pytest.approx(Speed(250, "cas").to_mach(Atmo(hp=10000, temperature=10)))
+
+    def test_quantized_keys(self):
+        enable_cache(altitude_step=1.0, temperature_step=0.1, speed_step=0.01)
+        first = Atmo(hp=31000.0, temperature=5.0).sigma
+        assert Atmo(hp=31000.1, temperature=5.01).sigma == first
+        assert cache_info().hits == 1
+
+    def test_mach_and_units_in_key(self):
+        atmo = Atmo(hp=31000, temperature=5)
+        kts = Speed(0.8, "mach").to_tas(atmo)
+        assert Speed(0.8, "mach", "mps").to_tas(Atmo(hp=31000, temperature=5)) == pytest.approx(
+            kts * 0.51444)
+        assert Speed(0.81, "mach").to_tas(Atmo(hp=31000, temperature=5)) != kts
+
+    def test_eviction_and_clear(self):
+        for hp in range(0, 6000, 1000):
+            Atmo(hp=hp, temperature=0).theta
+        info = cache_info()
+        assert info.currsize == 4
+        assert info.evictions == 2
+        clear_cache()
+        assert cache_info() == (0, 0, 0, 4, 0)
+
+    def test_arrays_bypass_cache(self):
+        Speed(np.array([250.0, 300.0]), "cas").to_tas(Atmo(hp=[1000.0, 2000.0], temperature=0))
+        assert cache_info().currsize == 0
+
+    @pytest.mark.filterwarnings("ignore::RuntimeWarning")
+    @pytest.mark.parametrize("steps", [{}, {"altitude_step": 1.0, "speed_step": 0.01}])
+    def test_non_finite_inputs_bypass_cache(self, steps):
+        enable_cache(maxsize=4, temperature_step=0.1, **steps)
+        for _ in range(3):
+            assert np.isnan(Atmo(hp=float("nan"), temperature=0).theta)
+            assert np.isnan(Speed(float("nan"), "cas").to_tas(Atmo(hp=1000, temperature=0)))
+            assert np.isnan(Speed(float("nan"), "mach").to_cas(Atmo(hp=1000, temperature=0)))
+            Speed(float("inf"), "cas").to_tas(Atmo(hp=1000, temperature=0))
+        info = cache_info()
+        assert (info.misses, info.currsize) == (1, 1)  # only the finite Atmo
+
+    def test_invalid_settings(self):
+        with pytest.raises(ValueError):
+            enable_cache(maxsize=0)
+        with pytest.raises(ValueError):
+            enable_cache(speed_step=-1)
+
+
+KERNELS_BY_DELTA = [kcas_to_keas, kcas_to_mach, keas_to_kcas, keas_to_mach, mach_to_kcas, mach_to_keas]
+KERNELS_BY_DISA = [kcas_to_ktas, keas_to_ktas, ktas_to_kcas, ktas_to_keas, ktas_to_mach, mach_to_ktas]
+
+
+class TestOutArgument:
+    N = 100_000
+    HP = np.sort(np.random.default_rng(1).uniform(-1000.0, 65000.0, N))
+    DISA = np.random.default_rng(2).uniform(-30.0, 30.0, N)
+    KTS = np.random.default_rng(3).uniform(100.0, 500.0, N)
+    MACH = KTS / 600.0
+
+    def speed(self, func):
+        return self.MACH if func.__name__.startswith("mach") else self.KTS
+
+    def args(self, func):
+        return (self.HP,) if func in KERNELS_BY_DELTA else (self.HP, self.DISA)
+
+    @pytest.mark.parametrize("func", KERNELS_BY_DELTA + KERNELS_BY_DISA)
+    def test_kernels_match_allocating_call(self, func):
+        out = np.empty(self.N)
+        assert func(self.speed(func), *self.args(func), out=out) is out
+        np.testing.assert_array_equal(out, func(self.speed(func), *self.args(func)))
+
+    def test_in_place_on_input(self):
+        mach = self.MACH.copy()
+        expected = mach_to_kcas(mach, self.HP)
+        mach_to_kcas(mach, self.HP, out=mach)
+        np.testing.assert_array_equal(mach, expected)
+
+    def test_float32_out(self):
+        out = np.empty(self.N, dtype=np.float32)
+        kcas_to_ktas(self.KTS, self.HP, self.DISA, out=out)
+        np.testing.assert_array_equal(out, kcas_to_ktas(self.KTS, self.HP, self.DISA).astype(np.float32))
+
+    def test_speed_class(self):
+        atmo = Atmo(hp=self.HP, temperature=self.DISA)
+        speed = Speed(self.KTS, "cas", "kmh")
+        for to in ("to_cas", "to_eas", "to_tas", "to_mach"):
+            out = np.empty(self.N)
+            assert getattr(speed, to)(atmo, out=out) is out
+            np.testing.assert_array_equal(out, getattr(speed, to)(atmo))
+
+    def test_speed_array(self):
+        atmo = Atmo(hp=self.HP, temperature=self.DISA)
+        speeds = SpeedArray(self.KTS, np.tile(["cas", "eas", "tas", "mach"], self.N // 4), "mps")
+        out = np.empty(self.N)
+        assert speeds.to_tas(atmo, out=out) is out
+        np.testing.assert_array_equal(out, speeds.to_tas(atmo))
+
+    def test_wrong_shape(self):
+        with pytest.raises(ValueError, match="shape"):
+            kcas_to_keas(self.KTS, self.HP, out=np.empty(10))
+        with pytest.raises(ValueError, match="shape"):
+            Speed(self.KTS, "cas").to_tas(Atmo(hp=self.HP, temperature=0), out=np.empty((2, 2)))
+
+    def test_wrong_dtype(self):
+        with pytest.raises(TypeError):
+            mach_to_ktas(self.KTS, self.HP, self.DISA, out=np.empty(self.N, dtype=int))
+
+    @pytest.mark.parametrize("call", [
+        lambda t, out: kcas_to_ktas(t.KTS, t.HP, t.DISA, out=out),
+        lambda t, out: mach_to_kcas(t.MACH, t.HP, out=out),
+        lambda t, out: delta(t.HP, out=out),
+        lambda t, out: sigma(t.HP, t.DISA, out=out),
+        lambda t, out: speed_convert(t.KTS, "kts", "kmh", out=out),
+    ])
+    def test_steady_state_allocates_nothing(self, call):
+        out = np.empty(self.N)
+        call(self, out)  # warm-up fills the per-thread scratch
+        tracemalloc.start()
+        try:
+            for _ in range(3):
+                call(self, out)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        # A single temporary of the input size would be 800 kB
+        assert peak < 64 * 1024
+
+    def test_speed_class_steady_state_allocates_nothing(self):
+        atmo = Atmo(hp=self.HP, temperature=self.DISA)
+        speed = Speed(self.KTS, "cas")
+        out = np.empty(self.N)
+        speed.to_tas(atmo, out=out)
+        tracemalloc.start()
+        try:
+            for _ in range(3):
+                speed.to_tas(atmo, out=out)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        assert peak < 64 * 1024
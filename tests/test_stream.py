@@ -0,0 +1,157 @@
+"""Tests for the micro-batched flight-data stream processor."""
+
+import time
+
+import numpy as np
+import pytest
+
+from atmospeed import Atmo, Speed, density_altitude
+from atmospeed.stream import OUTPUT_FIELDS, enrich_stream
+
+RNG = np.random.default_rng(5)
+N = 1000
+HP = RNG.uniform(0.0, 45000.0, N)
+OAT = RNG.uniform(-60.0, 30.0, N)
+CAS = RNG.uniform(120.0, 350.0, N)
+
+
+def records(n=N):
+    return [{"t": float(i), "hp": HP[i], "temperature": OAT[i], "speed_value": CAS[i]}
+            for i in range(n)]
+
+
+def expected(n=N):
+    atmo = Atmo(hp=HP[:n], temperature=OAT[:n], temp_is_delta_isa=False)
+    speed = Speed(CAS[:n], "cas")
+    return {
+        "cas": CAS[:n],
+        "eas": speed.to_eas(atmo),
+        "tas": speed.to_tas(atmo),
+        "mach": speed.to_mach(atmo),
+        "delta_isa": atmo.delta_isa,
+        "density_altitude": density_altitude(atmo.sigma),
+        "speed_of_sound": atmo.speed_of_sound(),
+    }
+
+
+class TestEnrichStream:
+    @pytest.mark.parametrize("max_batch", [1, 7, 256, 5000])
+    def test_records_match_vectorized(self, max_batch):
+        result = list(enrich_stream(records(), max_batch=max_batch))
+        assert len(result) == N
+        assert list(result[0]) == ["t", "hp", "temperature", "speed_value", *OUTPUT_FIELDS]
+        assert [r["t"] for r in result] == list(range(N))
+        for name, values in expected().items():
+            np.testing.assert_allclose([r[name] for r in result], values, rtol=1e-12)
+
+    def test_record_batches(self):
+        batches = [{"t": np.arange(i, i + 100), "hp": HP[i:i + 100],
+                    "temperature": OAT[i:i + 100], "speed_value": CAS[i:i + 100]}
+                   for i in range(0, N, 100)]
+        result = list(enrich_stream(batches, max_batch=300, batches=True))
+        assert [len(b["tas"]) for b in result] == [300, 300, 300, 100]
+        tas = np.concatenate([b["tas"] for b in result])
+        np.testing.assert_allclose(tas, expected()["tas"], rtol=1e-12)
+        assert np.array_equal(np.concatenate([b["t"] for b in result]), np.arange(N))
+
+    def test_structured_arrays_and_records_mixed(self):
+        rows = np.zeros(10, [("hp", float), ("temperature", float), ("speed_value", float)])
+        rows["hp"], rows["temperature"], rows["speed_value"] = HP[:10], OAT[:10], CAS[:10]
+        single = {"hp": HP[10], "temperature": OAT[10], "speed_value": CAS[10]}
+        result = list(enrich_stream([rows[:4], single, rows[4:]], max_batch=4))
+        assert len(result) == 11
+        assert result[4]["tas"] == pytest.approx(expected(11)["tas"][10], rel=1e-12)
+
+    def test_speed_and_units(self):
+        atmo = Atmo(hp=3000.0, temperature=10.0, alt_unit="m", temp_unit="F")
+        record = {"hp": 3000.0, "temperature": 10.0, "speed_value": 0.7}
+        result, = enrich_stream([record], speed_type="mach", speed_unit="kmh", alt_unit="m",
+                                temp_unit="F", temp_is_delta_isa=True)
+        assert result["cas"] == pytest.approx(Speed(0.7, "mach", "kmh").to_cas(atmo))
+        assert result["delta_isa"] == pytest.approx(10.0)
+        assert result["density_altitude"] == pytest.approx(atmo.density_altitude("m"))
+        assert result["speed_of_sound"] == pytest.approx(atmo.speed_of_sound("kmh"))
+
+    def test_max_latency_flushes_stalled_stream(self):
+        def source():
+            yield from records(3)
+            time.sleep(0.5)
+            yield from records(4)[3:]
+
+        start = time.monotonic()
+        times = [(r["t"], time.monotonic() - start)
+                 for r in enrich_stream(source(), max_batch=100, max_latency=0.05)]
+        assert [t for t, _ in times] == [0.0, 1.0, 2.0, 3.0]
+        # The first three records do not wait for the stalled source
+        assert times[2][1] < 0.4
+        assert times[3][1] >= 0.5
+
+    def test_max_latency_full_batches(self):
+        result = list(enrich_stream(records(), max_batch=64, max_latency=10.0))
+        np.testing.assert_allclose([r["mach"] for r in result], expected()["mach"], rtol=1e-12)
+
+    @pytest.mark.parametrize("max_latency", [None, 1.0])
+    def test_source_error_after_pending_records(self, max_latency):
+        def source():
+            yield from records(5)
+            raise RuntimeError("telemetry lost")
+
+        result = []
+        with pytest.raises(RuntimeError, match="telemetry lost"):
+            for r in enrich_stream(source(), max_batch=100, max_latency=max_latency):
+                result.append(r)
+        assert len(result) == 5
+
+    def test_missing_field_raises(self):
+        with pytest.raises(ValueError, match="speed_value"):
+            list(enrich_stream([{"hp": 0.0, "temperature": 15.0}]))
+
+    def test_different_fields_raise(self):
+        rows = [{"hp": 0.0, "temperature": 15.0, "speed_value": 200.0},
+                {"hp": 0.0, "oat": 15.0, "speed_value": 200.0}]
+        with pytest.raises(ValueError, match="missing field"):
+            list(enrich_stream(rows))
+
+    @pytest.mark.parametrize("max_batch", [1, 100])
+    def test_invalid_records_only_fail_themselves(self, max_batch):
+        rows = records(100)
+        rows[3]["hp"] = 300000.0
+        # A valid altitude whose density altitude is above 86 km
+        rows[70].update(hp=275000.0, temperature=-40.0)
+        result = list(enrich_stream(rows, max_batch=max_batch))
+        assert [r["t"] for r in result] == list(range(100))
+        for i in (3, 70):
+            assert "86 km" in result[i]["error"]
+            assert all(np.isnan(result[i][name]) for name in OUTPUT_FIELDS)
+        valid = [i for i in range(100) if i not in (3, 70)]
+        assert not any("error" in result[i] for i in valid)
+        np.testing.assert_allclose([result[i]["tas"] for i in valid], expected(100)["tas"][valid],
+                                   rtol=1e-12)
+
+    def test_invalid_records_in_batches(self):
+        rows = records(10)
+        rows[9]["hp"] = 300000.0
+        result, = enrich_stream(rows, batches=True)
+        assert list(result["error"][:9]) == [None] * 9
+        assert "86 km" in result["error"][9]
+        assert np.isnan(result["tas"][9]) and not np.isnan(result["tas"][:9]).any()
+
+    def test_list_field_in_single_record(self):
+        record = {"tags": ["climb", "icing"], "hp": 10000.0, "temperature": -5.0,
+                  "speed_value": 250.0}
+        result, = enrich_stream([record])
+        assert result["tags"] == ["climb", "icing"]
+        assert result["tas"] > 250.0
+
+    @pytest.mark.parametrize("extra", [[1.0, 2.0], [[1.0]] * 3])
+    def test_batch_columns_must_match(self, extra):
+        batch = {"hp": HP[:3], "temperature": OAT[:3], "speed_value": CAS[:3], "extra": extra}
+        with pytest.raises(ValueError, match="same length"):
+            list(enrich_stream([batch]))
+
+    @pytest.mark.parametrize("kwargs", [{"max_batch": 0}, {"max_latency": -1.0},
+                                        {"speed_type": "ias"}, {"speed_unit": "furlong"},
+                                        {"alt_unit": "yd"}, {"temp_unit": "X"}])
+    def test_bad_arguments_raise_eagerly(self, kwargs):
+        with pytest.raises(ValueError):
+            enrich_stream([], **kwargs)
@@ -0,0 +1,111 @@
+"""Tests for the speed schedule and atmosphere table generator."""
+
+import numpy as np
+import pytest
+
+from atmospeed import Atmo, Speed, Table, make_table, use_precision
+from atmospeed.table import ATMO_COLUMNS, SPEED_COLUMNS
+
+HP = np.arange(0.0, 40000.0, 4000.0)
+DISA = [-20.0, 0.0, 15.0]
+KCAS = np.arange(200.0, 350.0, 25.0)
+
+
+class TestMakeTable:
+    def test_shape_and_columns(self):
+        table = make_table(HP, DISA, KCAS)
+        assert table.shape == (10, 3, 6)
+        assert table.size == 180
+        assert list(table.columns) == list(SPEED_COLUMNS + ATMO_COLUMNS)
+        assert all(column.shape == table.shape for column in table.columns.values())
+
+    def test_matches_point_conversions(self):
+        table = make_table(HP, DISA, KCAS)
+        for i, j, k in [(0, 0, 0), (4, 1, 3), (9, 2, 5)]:
+            atmo = Atmo(hp=HP[i], temperature=DISA[j])
+            speed = Speed(KCAS[k], "cas")
+            assert table["tas"][i, j, k] == pytest.approx(speed.to_tas(atmo), rel=1e-12)
+            assert table["mach"][i, j, k] == pytest.approx(speed.to_mach(atmo), rel=1e-12)
+            assert table["cas"][i, j, k] == KCAS[k]
+            assert table["oat"][i, j, k] == pytest.approx(atmo.oat)
+            assert table["pressure"][i, j, k] == pytest.approx(atmo.pressure())
+
+    def test_atmosphere_only(self):
+        table = make_table(range(0, 30000, 10000), 10.0)
+        assert table.shape == (3, 1)
+        assert list(table.axes) == ["hp", "delta_isa"]
+        assert list(table.columns) == list(ATMO_COLUMNS)
+        assert table["sigma"][1, 0] == pytest.approx(Atmo(hp=10000.0, temperature=10.0).sigma)
+
+    def test_units(self):
+        table = make_table([3000.0], [0.0], [0.8], speed_type="mach", columns=["tas", "speed_of_sound"],
+                           alt_unit="m", speed_unit="kmh")
+        atmo = Atmo(hp=3000.0, temperature=0, alt_unit="m")
+        assert table["tas"][0, 0, 0] == pytest.approx(Speed(0.8, "mach", "kmh").to_tas(atmo))
+        assert table["speed_of_sound"][0, 0, 0] == pytest.approx(atmo.speed_of_sound("kmh"))
+
+    def test_float32(self):
+        with use_precision("float32"):
+            table = make_table(HP, DISA, KCAS, columns=["tas", "sigma"])
+        assert table["tas"].dtype == table["sigma"].dtype == np.float32
+
+    @pytest.mark.parametrize("kwargs, match", [
+        ({"columns": ["tas"]}, "needs a speed axis"),
+        ({"columns": ["vmo"], "speed": KCAS}, "Unknown table column"),
+        ({"delta_isa": []}, "non-empty 1-D"),
+        ({"delta_isa": [[0.0]]}, "non-empty 1-D"),
+    ])
+    def test_invalid(self, kwargs, match):
+        with pytest.raises(ValueError, match=match):
+            make_table(HP, **kwargs)
+
+    def test_above_top(self):
+        with pytest.raises(ValueError, match="86 km"):
+            make_table([300000.0])
+
+
+class TestTableSave:
+    @pytest.fixture
+    def table(self):
+        return make_table(HP, DISA, KCAS, columns=["tas", "mach", "sigma"])
+
+    def test_csv(self, table, tmp_path):
+        path = tmp_path / "table.csv"
+        table.save(str(path))
+        lines = path.read_text().splitlines()
+        assert lines[0] == "hp,delta_isa,speed,tas,mach,sigma"
+        assert len(lines) == 1 + table.size
+        row = [float(value) for value in lines[1 + 6 * 3 + 6 + 2].split(",")]
+        assert row[:3] == [4000.0, 0.0, 250.0]
+        assert row[3] == pytest.approx(table["tas"][1, 1, 2], abs=1e-4)
+
+    def test_npz(self, table, tmp_path):
+        path = tmp_path / "table.npz"
+        table.save(str(path))
+        with np.load(path) as data:
+            np.testing.assert_array_equal(data["hp"], HP)
+            np.testing.assert_array_equal(data["speed"], KCAS)
+            np.testing.assert_array_equal(data["mach"], table["mach"])
+
+    def test_npy_structured(self, table, tmp_path):
+        path = tmp_path / "table.npy"
+        table.save(str(path))
+        records = np.load(path)
+        assert records.shape == table.shape
+        assert records.dtype.names == ("hp", "delta_isa", "speed", "tas", "mach", "sigma")
+        assert records["delta_isa"][0, 2, 0] == DISA[2]
+        np.testing.assert_array_equal(records["tas"], table["tas"])
+
+    def test_explicit_format(self, table, tmp_path):
+        path = tmp_path / "table.bin"
+        table.save(str(path), fmt="npz")
+        with np.load(path) as data:
+            assert "tas" in data
+
+    def test_unknown_format(self, table, tmp_path):
+        with pytest.raises(ValueError, match="Unknown table format"):
+            table.save(str(tmp_path / "table.xlsx"))
+
+    def test_repr(self, table):
+        assert isinstance(table, Table)
+        assert "(10, 3, 6)" in repr(table)